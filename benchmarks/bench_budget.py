@@ -0,0 +1,76 @@
+"""
+Benchmark: accuracy versus byte budget for head truncation and excerpts
+
+For each budget, runs the workload with plain head truncation
+(``max_len=budget``) and with byte-budget excerpt sampling
+(``LarkDetector(byte_budget=budget)``), reporting accuracy against the
+workload's language labels, agreement with the full 1024-token run and
+throughput.
+
+Usage:
+    python -m benchmarks.bench_budget --budgets 128,256,512 --profile doc
+"""
+
+import argparse
+import json
+import time
+from typing import List, Optional
+
+from benchmarks.workload import generate_workload
+
+
+def _run(detector, texts: List[str], max_len: int, batch_size: int):
+    start = time.perf_counter()
+    predictions = []
+    for i in range(0, len(texts), batch_size):
+        predictions.extend(lang for lang, _ in
+                           detector.detect_batch(texts[i:i + batch_size], max_len=max_len))
+    return predictions, len(texts) / (time.perf_counter() - start)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Byte budget accuracy benchmark")
+    parser.add_argument("--budgets", default="128,256,512")
+    parser.add_argument("--n-excerpts", type=int, default=3)
+    parser.add_argument("--n-texts", type=int, default=256)
+    parser.add_argument("--profile", default="doc")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model-path", default=None)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    from lark import LarkDetector
+
+    workload = generate_workload(args.n_texts, seed=args.seed, profile=args.profile)
+    texts = [t for t, _ in workload]
+    labels = [l for _, l in workload]
+
+    head = LarkDetector(model_path=args.model_path)
+    reference, ref_tput = _run(head, texts, 1024, args.batch_size)
+    rows = [{"mode": "head", "budget": 1024, "throughput_texts_per_s": ref_tput,
+             "accuracy": sum(p == l for p, l in zip(reference, labels)) / len(texts),
+             "agreement_with_1024": 1.0}]
+
+    for budget in [int(b) for b in args.budgets.split(",") if b]:
+        excerpts = LarkDetector(model_path=args.model_path, byte_budget=budget,
+                                n_excerpts=args.n_excerpts)
+        for mode, detector in (("head", head), ("excerpts", excerpts)):
+            predictions, tput = _run(detector, texts, budget, args.batch_size)
+            rows.append({
+                "mode": mode, "budget": budget, "throughput_texts_per_s": tput,
+                "accuracy": sum(p == l for p, l in zip(predictions, labels)) / len(texts),
+                "agreement_with_1024": sum(p == r for p, r in zip(predictions, reference)) / len(texts),
+            })
+
+    for r in rows:
+        print(f"{r['mode']:9} budget={r['budget']:5}  accuracy {r['accuracy']:.2%}  "
+              f"agreement {r['agreement_with_1024']:.2%}  "
+              f"{r['throughput_texts_per_s']:8.1f} texts/s")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: single-text ``detect()`` latency against p50/p99 targets
+
+Times ``detect(text)`` one text at a time for fixed input sizes (16, 64
+and 256 bytes by default) on the single-text path (``single_path=True``,
+graphs captured up front) and, for comparison, on the general batch path
+(``single_path=False``). Each size is checked against its p50/p99 target;
+``--check`` exits non-zero when the single-text path misses one.
+
+Usage:
+    python -m benchmarks.bench_latency --requests 500
+    python -m benchmarks.bench_latency --targets 16:15:30,64:25:50,256:60:120 --check
+"""
+
+import argparse
+import json
+import platform
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.run import percentile
+from benchmarks.workload import generate_workload
+
+# bytes -> (p50 ms, p99 ms), fp16 on one CPU core
+DEFAULT_TARGETS = {16: (15.0, 30.0), 64: (25.0, 50.0), 256: (60.0, 120.0)}
+
+
+def parse_targets(value: str) -> Dict[int, tuple]:
+    """Parse ``"16:15:30,64:25:50"`` (bytes:p50_ms:p99_ms)."""
+    targets = {}
+    for item in value.split(","):
+        size, p50, p99 = item.split(":")
+        targets[int(size)] = (float(p50), float(p99))
+    return targets
+
+
+def texts_of_size(size: int, n: int, seed: int = 0) -> List[str]:
+    """``n`` texts of at most ``size`` UTF-8 bytes, cut at a character boundary."""
+    texts = []
+    for text, _ in generate_workload(n, seed=seed, profile="doc"):
+        while len(text.encode("utf-8")) < size:
+            text += " " + text
+        texts.append(text.encode("utf-8")[:size].decode("utf-8", errors="ignore"))
+    return texts
+
+
+def time_detect(detector, texts: List[str], requests: int) -> Dict:
+    """Latency percentiles (ms) of ``requests`` sequential ``detect`` calls."""
+    for text in texts[:10]:
+        detector.detect(text)
+    latencies = []
+    for i in range(requests):
+        text = texts[i % len(texts)]
+        t0 = time.perf_counter()
+        detector.detect(text)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return {"p50": percentile(latencies, 50), "p99": percentile(latencies, 99),
+            "mean": sum(latencies) / len(latencies)}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Single-text detect() latency benchmark")
+    parser.add_argument("--targets", type=parse_targets, default=DEFAULT_TARGETS,
+                        help="Comma-separated bytes:p50_ms:p99_ms targets")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--baseline-requests", type=int, default=30,
+                        help="Requests per size on the general batch path (0 to skip)")
+    parser.add_argument("--dtype", default=None)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model-path", default=None)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--check", action="store_true", help="Exit 1 if a target is missed")
+    args = parser.parse_args(argv)
+
+    from lark import LarkDetector
+
+    options = {"model_path": args.model_path, "dtype": args.dtype, "num_threads": args.threads,
+               "metrics": False}
+    fast = LarkDetector(**options)
+    t0 = time.perf_counter()
+    fast.single_path.capture()
+    capture_seconds = time.perf_counter() - t0
+    print(f"Captured {len(fast.single_path.buckets)} bucket graphs in {capture_seconds:.1f} s")
+    general = LarkDetector(**options, single_path=False) if args.baseline_requests else None
+
+    results = []
+    missed = 0
+    for size, (p50_target, p99_target) in sorted(args.targets.items()):
+        texts = texts_of_size(size, 64, seed=args.seed)
+        single = time_detect(fast, texts, args.requests)
+        row = {"bytes": size, "single_path_ms": single,
+               "target_ms": {"p50": p50_target, "p99": p99_target},
+               "met": single["p50"] <= p50_target and single["p99"] <= p99_target}
+        if general is not None:
+            row["batch_path_ms"] = time_detect(general, texts, args.baseline_requests)
+        missed += not row["met"]
+        results.append(row)
+        baseline = (f"  batch path p50 {row['batch_path_ms']['p50']:7.2f} ms"
+                    if general is not None else "")
+        print(f"{'✅' if row['met'] else '❌'} {size:>5} B  p50 {single['p50']:6.2f} ms "
+              f"(target {p50_target:g})  p99 {single['p99']:6.2f} ms (target {p99_target:g}){baseline}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"host": {"machine": platform.machine(), "python": platform.python_version()},
+                       "config": {k: v for k, v in vars(args).items() if k != "targets"},
+                       "capture_seconds": capture_seconds, "results": results}, f, indent=2)
+    return 1 if args.check and missed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,95 @@
+"""
+Benchmark: shared-prefix encoder cache on templated inputs
+
+Builds a workload where a share of the texts start with one of a few
+fixed templates (notification text, "RT @<user>: ", an email quote header)
+followed by a synthetic message, then labels it in batches with and
+without ``prefix_cache=True``. Reports throughput, label agreement, prefix
+hit rate and the fraction of encoder positions (bytes) saved.
+
+Usage:
+    python -m benchmarks.bench_prefix --texts 2000 --templated 0.8
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.workload import generate_workload
+
+TEMPLATES = [
+    "Your order #{n} has shipped and will arrive within 3-5 business days. Track it in the app: ",
+    "RT @newsdesk{n}: ",
+    "On Mon, Jan 5, 2026 at 10:12 AM Customer Support <support@example.com> wrote:\n> ",
+    "[Reminder] You have {n} unread notifications from your team workspace. Latest message: ",
+]
+
+
+def templated_workload(n: int, templated: float, seed: int = 0) -> List[str]:
+    """``n`` texts, a ``templated`` fraction of them prefixed by one of ``TEMPLATES``."""
+    rng = random.Random(seed)
+    texts = []
+    for body, _ in generate_workload(n, seed=seed, profile="chat"):
+        if rng.random() < templated:
+            body = rng.choice(TEMPLATES).format(n=rng.randint(1, 5)) + body
+        texts.append(body)
+    return texts
+
+
+def run(detector, texts: List[str], batch_size: int, max_len: int):
+    results = []
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        results.extend(detector.detect_batch(texts[i:i + batch_size], max_len=max_len))
+    return results, time.perf_counter() - start
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Shared-prefix cache benchmark")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--templated", type=float, default=0.8,
+                        help="Fraction of texts starting with a template")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--max-len", type=int, default=512)
+    parser.add_argument("--cache-mb", type=int, default=64)
+    parser.add_argument("--dtype", default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model-path", default=None)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    from lark import LarkDetector
+    from lark.prefix_cache import PrefixCache
+
+    texts = templated_workload(args.texts, args.templated, seed=args.seed)
+    options = {"model_path": args.model_path, "dtype": args.dtype, "metrics": False}
+    baseline = LarkDetector(**options)
+    cached = LarkDetector(**options, prefix_cache=PrefixCache(max_bytes=args.cache_mb << 20))
+
+    report: Dict = {"config": vars(args)}
+    expected, seconds = run(baseline, texts, args.batch_size, args.max_len)
+    report["baseline"] = {"texts_per_s": len(texts) / seconds}
+    results, seconds = run(cached, texts, args.batch_size, args.max_len)
+    stats = cached.prefix_cache.stats()
+    report["prefix_cache"] = {
+        "texts_per_s": len(texts) / seconds,
+        "agreement": sum(a[0] == b[0] for a, b in zip(results, expected)) / len(texts),
+        **stats,
+    }
+    speedup = report["prefix_cache"]["texts_per_s"] / report["baseline"]["texts_per_s"]
+    print(f"Baseline:      {report['baseline']['texts_per_s']:9.1f} texts/s")
+    print(f"Prefix cache:  {report['prefix_cache']['texts_per_s']:9.1f} texts/s  ({speedup:.2f}x)  "
+          f"agreement {report['prefix_cache']['agreement']:.4f}")
+    print(f"  hit rate {stats['hit_rate']:.3f}  bytes saved {stats['bytes_saved']:,} "
+          f"({stats['saved_fraction']:.1%} of encoder positions)  prefixes {stats['prefixes']}  "
+          f"{stats['cached_bytes'] / 2 ** 20:.1f} MB  evictions {stats['evictions']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
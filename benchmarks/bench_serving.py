@@ -0,0 +1,108 @@
+"""
+Benchmark: steady-state serving with and without the input buffer pool
+
+Replays a long stream of requests with varying batch sizes against one
+detector, once allocating fresh input tensors per call and once with
+``buffer_pool=True``. Each mode runs in its own spawned subprocess and
+reports latency percentiles plus RSS sampled over the run, so allocator
+jitter and memory growth are visible.
+
+Usage:
+    python -m benchmarks.bench_serving --requests 2000 --max-len 256
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.run import peak_rss_mb, percentile
+from benchmarks.workload import generate_workload
+
+
+def current_rss_mb() -> float:
+    """Current resident set size in MB (Linux), falling back to peak RSS."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 ** 2)
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def run_mode(config: Dict) -> Dict:
+    """Serve ``config["requests"]`` requests in the current process."""
+    from lark import LarkDetector
+
+    detector = LarkDetector(model_path=config["model_path"], dtype=config["dtype"],
+                            num_threads=config["threads"],
+                            buffer_pool=config["buffer_pool"])
+    texts = [t for t, _ in generate_workload(512, seed=config["seed"], profile="chat")]
+    rng = random.Random(config["seed"])
+    sizes = [rng.randint(1, config["max_batch"]) for _ in range(config["requests"])]
+
+    for size in sizes[:config["warmup"]]:
+        detector.detect_batch(rng.sample(texts, size), max_len=config["max_len"])
+
+    latencies = []
+    rss = []
+    sample_every = max(1, len(sizes) // 10)
+    for i, size in enumerate(sizes):
+        batch = rng.sample(texts, size)
+        t0 = time.perf_counter()
+        detector.detect_batch(batch, max_len=config["max_len"])
+        latencies.append(time.perf_counter() - t0)
+        if i % sample_every == 0:
+            rss.append(current_rss_mb())
+    rss.append(current_rss_mb())
+
+    return {
+        "buffer_pool": config["buffer_pool"],
+        "latency_ms": {
+            "p50": percentile(latencies, 50) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "p999": percentile(latencies, 99.9) * 1000,
+            "stdev": (sum((l - sum(latencies) / len(latencies)) ** 2 for l in latencies)
+                      / len(latencies)) ** 0.5 * 1000,
+        },
+        "rss_mb": rss,
+        "rss_growth_mb": rss[-1] - rss[0],
+        "buffers": detector.buffer_pool.stats() if detector.buffer_pool else None,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Input buffer pool serving benchmark")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-len", type=int, default=256)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--dtype", default="bfloat16")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model-path", default=None)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for buffer_pool in (False, True):
+        config = {**vars(args), "buffer_pool": buffer_pool}
+        with ctx.Pool(1) as pool:
+            result = pool.map(run_mode, [config])[0]
+        results.append(result)
+        lat = result["latency_ms"]
+        print(f"buffer_pool={str(buffer_pool):5}  p50 {lat['p50']:7.2f} ms  "
+              f"p99 {lat['p99']:7.2f} ms  p99.9 {lat['p999']:7.2f} ms  "
+              f"stdev {lat['stdev']:6.2f} ms  "
+              f"rss {result['rss_mb'][0]:.1f} -> {result['rss_mb'][-1]:.1f} MB")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: throughput of multi-process worker layouts
+
+Runs the same workload through a ``DetectorPool`` for each layout
+(workers x threads per worker, e.g. 4x8 versus 32x1). Every worker is
+pinned to its own cores on one NUMA node and loads a node-local copy of
+the weights. Reports texts/s and batch latency per layout, and the layout
+with the best throughput on this host.
+
+Usage:
+    python -m benchmarks.bench_workers --layouts 1x32,2x16,4x8,8x4,32x1
+    python -m benchmarks.bench_workers            # layouts derived from the CPU count
+"""
+
+import argparse
+import json
+import platform
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.run import percentile
+from benchmarks.workload import describe_workload, generate_workload
+from lark.workers import DetectorPool, available_cpus, numa_topology
+
+
+def default_layouts(n_cpus: int) -> List[str]:
+    """``<workers>x<threads>`` for every power-of-two split of the usable CPUs."""
+    layouts = []
+    threads = 1
+    while threads <= n_cpus:
+        layouts.append(f"{n_cpus // threads}x{threads}")
+        threads *= 2
+    if f"1x{n_cpus}" not in layouts:
+        layouts.append(f"1x{n_cpus}")
+    return layouts
+
+
+def run_layout(layout: str, texts: List[str], config: Dict) -> Dict:
+    """Start a pool for ``layout``, warm it up and time ``config["rounds"]`` passes over ``texts``."""
+    options = {"model_path": config["model_path"], "dtype": config["dtype"], "metrics": False}
+    start = time.perf_counter()
+    with DetectorPool(layout, detector_options=options, chunk_size=config["chunk_size"],
+                      oversubscribe=config["oversubscribe"]) as pool:
+        startup_seconds = time.perf_counter() - start
+        pool.detect_batch(texts[:config["chunk_size"] * len(pool.slots)], max_len=config["max_len"])
+
+        batch_seconds = []
+        for _ in range(config["rounds"]):
+            t0 = time.perf_counter()
+            pool.detect_batch(texts, max_len=config["max_len"])
+            batch_seconds.append(time.perf_counter() - t0)
+        slots = [{"node": s.node, "cpus": s.cpus} for s in pool.slots]
+        numa = sorted({p["numa"] for p in pool.placements.values()})
+
+    total = sum(batch_seconds)
+    return {
+        "layout": layout,
+        "workers": len(slots),
+        "threads_per_worker": len(slots[0]["cpus"]),
+        "texts_per_s": len(texts) * len(batch_seconds) / total if total else 0.0,
+        "pass_seconds": {"p50": percentile(batch_seconds, 50), "max": max(batch_seconds)},
+        "startup_seconds": startup_seconds,
+        "numa_policy": numa,
+        "slots": slots,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Worker layout throughput benchmark")
+    parser.add_argument("--layouts", default=None,
+                        help="Comma-separated <workers>x<threads> layouts (default: derived from CPUs)")
+    parser.add_argument("--texts", type=int, default=2048)
+    parser.add_argument("--profile", default="mixed", choices=["chat", "web", "doc", "mixed"])
+    parser.add_argument("--max-len", type=int, default=512)
+    parser.add_argument("--chunk-size", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--dtype", default=None)
+    parser.add_argument("--oversubscribe", action="store_true",
+                        help="Allow layouts with more threads than usable CPUs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model-path", default=None)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    topology = numa_topology()
+    cpus = available_cpus()
+    layouts = args.layouts.split(",") if args.layouts else default_layouts(len(cpus))
+    workload = generate_workload(args.texts, seed=args.seed, profile=args.profile)
+    texts = [t for t, _ in workload]
+    print(f"Host: {len(cpus)} CPUs on {len(topology)} NUMA node(s) "
+          f"{ {node: len(c) for node, c in topology.items()} }")
+
+    results = []
+    for layout in layouts:
+        result = run_layout(layout, texts, vars(args))
+        results.append(result)
+        print(f"{layout:>8}  {result['texts_per_s']:9.1f} texts/s  "
+              f"pass p50 {result['pass_seconds']['p50']:7.2f} s  "
+              f"startup {result['startup_seconds']:5.1f} s  numa {','.join(result['numa_policy'])}")
+    best = max(results, key=lambda r: r["texts_per_s"])
+    print(f"✅ Best layout on this host: {best['layout']} ({best['texts_per_s']:.1f} texts/s)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"host": {"machine": platform.machine(), "cpus": len(cpus),
+                                "numa_nodes": {str(k): v for k, v in topology.items()}},
+                       "workload": describe_workload(workload),
+                       "config": vars(args), "results": results, "best": best["layout"]},
+                      f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Throughput / latency / memory sweep for LarkDetector
+
+Each sweep point runs in a fresh subprocess so thread settings and peak
+RSS are isolated. Results are written as JSON and can be compared with a
+saved baseline to flag regressions.
+
+Usage:
+    python -m benchmarks.run --batch-sizes 1,16,64 --max-lens 256,1024 \\
+        --threads 1,4 --backends float16,float32 --output results.json
+    python -m benchmarks.run ... --baseline baseline.json --tolerance 0.1
+"""
+
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.workload import describe_workload, generate_workload
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of ``values`` (``q`` in [0, 100])."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(q / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the current process in MB."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return rss / (1024 ** 2) if sys.platform == "darwin" else rss / 1024
+
+
+def point_key(point: Dict) -> str:
+    """Stable identifier of a sweep point, used to match baseline entries."""
+    return (f"{point['backend']}/threads={point['threads']}"
+            f"/batch={point['batch_size']}/max_len={point['max_len']}")
+
+
+def run_point(point: Dict, model_path: Optional[str] = None) -> Dict:
+    """
+    Run one sweep point in the current process.
+
+    Args:
+        point: Dict with batch_size, max_len, threads, backend, n_texts,
+            seed, profile, warmup
+        model_path: Optional path to model weights
+
+    Returns:
+        Result dict with throughput, latency percentiles and peak RSS
+    """
+    from lark import LarkDetector
+
+    detector = LarkDetector(model_path=model_path, dtype=point["backend"],
+                            num_threads=point["threads"])
+    texts = [t for t, _ in generate_workload(point["n_texts"], seed=point["seed"],
+                                             profile=point["profile"])]
+    batch_size = point["batch_size"]
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+
+    for batch in batches[:point.get("warmup", 1)]:
+        detector.detect_batch(batch, max_len=point["max_len"])
+
+    latencies = []
+    start = time.perf_counter()
+    for batch in batches:
+        t0 = time.perf_counter()
+        detector.detect_batch(batch, max_len=point["max_len"])
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    return {
+        **point,
+        "key": point_key(point),
+        "throughput_texts_per_s": len(texts) / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "mean": sum(latencies) / len(latencies) * 1000,
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _run_point_worker(args):
+    point, model_path = args
+    return run_point(point, model_path)
+
+
+def run_sweep(points: List[Dict], model_path: Optional[str] = None) -> List[Dict]:
+    """Run each point in its own spawned subprocess."""
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for point in points:
+        with ctx.Pool(1) as pool:
+            result = pool.map(_run_point_worker, [(point, model_path)])[0]
+        print(f"{result['key']:45} {result['throughput_texts_per_s']:9.1f} texts/s  "
+              f"p50 {result['latency_ms']['p50']:8.2f} ms  "
+              f"p99 {result['latency_ms']['p99']:8.2f} ms  "
+              f"rss {result['peak_rss_mb']:7.1f} MB")
+        results.append(result)
+    return results
+
+
+def compare_with_baseline(results: List[Dict], baseline: List[Dict],
+                          tolerance: float = 0.1) -> List[Dict]:
+    """
+    Flag points that regressed against a baseline.
+
+    A point regresses if throughput drops, or p99 latency or peak RSS grows,
+    by more than ``tolerance`` (relative).
+
+    Returns:
+        List of regression records with key, metric, baseline and current values
+    """
+    base_by_key = {r["key"]: r for r in baseline}
+    regressions = []
+    for result in results:
+        base = base_by_key.get(result["key"])
+        if base is None:
+            continue
+        checks = [
+            ("throughput_texts_per_s", base["throughput_texts_per_s"],
+             result["throughput_texts_per_s"], -1),
+            ("latency_ms.p99", base["latency_ms"]["p99"], result["latency_ms"]["p99"], 1),
+            ("peak_rss_mb", base["peak_rss_mb"], result["peak_rss_mb"], 1),
+        ]
+        for metric, old, new, direction in checks:
+            if old <= 0:
+                continue
+            change = (new - old) / old * direction
+            if change > tolerance:
+                regressions.append({
+                    "key": result["key"], "metric": metric,
+                    "baseline": old, "current": new, "change": change,
+                })
+    return regressions
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def _str_list(value: str) -> List[str]:
+    return [v for v in value.split(",") if v]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Lark inference benchmark sweep")
+    parser.add_argument("--batch-sizes", type=_int_list, default=[1, 16, 64])
+    parser.add_argument("--max-lens", type=_int_list, default=[256, 1024])
+    parser.add_argument("--threads", type=_int_list, default=[1])
+    parser.add_argument("--backends", type=_str_list, default=["float16"],
+                        help="Compute dtypes: float16, bfloat16, float32")
+    parser.add_argument("--n-texts", type=int, default=256)
+    parser.add_argument("--profile", default="mixed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warmup", type=int, default=1, help="Warmup batches per point")
+    parser.add_argument("--model-path", default=None)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=None, help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    points = [
+        {
+            "backend": backend, "threads": threads, "batch_size": batch_size,
+            "max_len": max_len, "n_texts": args.n_texts, "seed": args.seed,
+            "profile": args.profile, "warmup": args.warmup,
+        }
+        for backend, threads, batch_size, max_len in itertools.product(
+            args.backends, args.threads, args.batch_sizes, args.max_lens)
+    ]
+
+    workload = generate_workload(args.n_texts, seed=args.seed, profile=args.profile)
+    print(f"Workload: {json.dumps(describe_workload(workload), ensure_ascii=False)}")
+    results = run_sweep(points, model_path=args.model_path)
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": multiprocessing.cpu_count(),
+        },
+        "workload": describe_workload(workload),
+        "results": results,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        report["regressions"] = regressions
+        for r in regressions:
+            print(f"❌ Regression {r['key']} {r['metric']}: "
+                  f"{r['baseline']:.2f} -> {r['current']:.2f} ({r['change']:+.1%})")
+        if regressions:
+            exit_code = 1
+        else:
+            print("✅ No regressions against baseline")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Results written to {args.output}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Reproducible synthetic multilingual workload generator
+
+Texts are assembled from small per-language word pools so that the byte
+length distribution and script mix resemble production traffic, while
+staying fully deterministic for a given seed.
+"""
+
+import random
+from typing import Dict, List, Optional, Tuple
+
+
+# Small word pools per language, covering the main scripts the model sees
+WORD_POOLS: Dict[str, List[str]] = {
+    "en": "the of and to in is you that it he was for on are as with his they at be this have from or one had by word but not what all were we when your can said there use an each which she do how their if will up other about out many then them these so some her would make like him into time has look two more write go see number no way could people my than first water been call who oil its now find long down day did get come made may part".split(),
+    "fr": "le de un être et à il avoir ne je son que se qui ce dans en du elle au pour pas que vous par sur faire plus dire me on mon lui nous comme mais pouvoir avec tout y aller voir en bien où sans tu ou leur homme si deux mari moi vouloir te femme venir quand grand celui".split(),
+    "de": "der die und in den von zu das mit sich des auf für ist im dem nicht ein eine als auch es an werden aus er hat dass sie nach wird bei einer um am sind noch wie einem über einen so zum war haben nur oder aber vor zur bis mehr durch man sein wurde".split(),
+    "es": "de la que el en y a los se del las un por con no una su para es al lo como más o pero sus le ha me si sin sobre este ya entre cuando todo esta ser son dos también fue había era muy años hasta desde está mi porque qué sólo han yo hay".split(),
+    "ru": "и в не на я быть он с что а по это она этот к но они мы как из у который то за свой что весь год от так о для ты же все тот мочь вы человек такой его сказать только или ещё бы себя один как уже до время если сам когда другой".split(),
+    "uk": "і в не що він на я з як а то вона це до та у ми але по ти так за його від вони все бути там ще коли були якщо був мене тільки вже де тут може дуже".split(),
+    "el": "και το να η ο της του με που τα για την σε από στο είναι τη οι θα δεν των τον ένα στην μου στη έχει όπως τους αλλά μια ως ότι στα".split(),
+    "zh": "的 一 是 不 了 在 人 有 我 他 这 个 们 中 来 上 大 为 和 国 地 到 以 说 时 要 就 出 会 可 也 你 对 生 能 而 子 那 得 于 着 下 自 之 年 过 发 后 作 里 用 道 行 所 然 家 种 事 成 方 多 经 么 去 法 学 如 都 同 现 当 没 动 面 起 看 定 天 分 还 进 好 小 部 其 些 主 样 理 心 她 本 前 开 但 因 只 从 想 实".split(),
+    "ja": "の に は を た が で て と し れ さ ある いる も する から な こと として い や れる など なっ ない この ため その あっ よう また もの という あり まで られ なる へ か だ これ によって により おり より による ず なり られる において ば なかっ なく しかし について せ だっ".split(),
+    "ko": "이 그 저 것 수 등 들 및 년 때 더 중 안 위 말 일 사람 우리 하다 있다 되다 없다 나 않다 같다 보다 주다 가다 오다 알다 많다 크다 좋다 새 한 두 세 네".split(),
+    "ar": "في من على إلى أن عن مع هذا التي الذي كان ما لا هو هي قد كل بين بعد عند ذلك لم أو حتى إذا ثم كانت هذه فيه منذ لكن".split(),
+    "hi": "के है में की और को से का एक यह पर भी कि था हैं नहीं लिए तो हो गया कर किया जो थे साथ कुछ वह अपने सकते".split(),
+    "th": "ที่ และ ใน การ เป็น ของ มี ได้ ไม่ ให้ ว่า จะ มา กับ นี้ แล้ว คน ไป ก็ อยู่ ความ จาก โดย เรา ทำ".split(),
+    "he": "של את על לא הוא זה עם כל גם אם היא אני יש או אבל מה רק כי היה בין עוד אחד".split(),
+    "ka": "და არის რომ ეს არ მე ის რა თუ მაგრამ ერთი ყველა როგორც იყო უნდა მისი ჩვენ".split(),
+    "hy": "և է որ այդ չի ես նա ինչ եթե բայց մեկ բոլոր ինչպես էր պետք նրա մենք".split(),
+}
+
+# Length profiles: (weight, median bytes, log-normal sigma)
+LENGTH_PROFILES: Dict[str, List[Tuple[float, float, float]]] = {
+    "chat": [(1.0, 40, 0.7)],
+    "web": [(1.0, 300, 0.8)],
+    "doc": [(1.0, 1500, 0.6)],
+    "mixed": [(0.6, 40, 0.7), (0.3, 300, 0.8), (0.1, 1500, 0.6)],
+}
+
+MAX_TEXT_BYTES = 8192
+
+# Languages written without spaces between words
+_NO_SPACE = {"zh", "ja", "th"}
+
+
+def _sample_length(rng: random.Random, profile: str) -> int:
+    components = LENGTH_PROFILES[profile]
+    r = rng.random() * sum(c[0] for c in components)
+    for weight, median, sigma in components:
+        r -= weight
+        if r <= 0:
+            break
+    length = int(rng.lognormvariate(0.0, sigma) * median)
+    return max(1, min(length, MAX_TEXT_BYTES))
+
+
+def _build_text(rng: random.Random, languages: List[str], target_bytes: int) -> str:
+    parts = []
+    size = 0
+    while size < target_bytes:
+        lang = rng.choice(languages)
+        word = rng.choice(WORD_POOLS[lang])
+        sep = "" if lang in _NO_SPACE else " "
+        piece = (sep + word) if parts else word
+        parts.append(piece)
+        size += len(piece.encode("utf-8"))
+    return "".join(parts)
+
+
+def generate_workload(n: int, seed: int = 0, profile: str = "mixed",
+                      languages: Optional[List[str]] = None,
+                      mixed_script_ratio: float = 0.05) -> List[Tuple[str, str]]:
+    """
+    Generate a deterministic synthetic workload.
+
+    Args:
+        n: Number of texts
+        seed: Random seed; the same seed always yields the same workload
+        profile: Length profile name from ``LENGTH_PROFILES``
+        languages: Language codes to draw from (defaults to all pools)
+        mixed_script_ratio: Fraction of texts code-switching between two languages
+
+    Returns:
+        List of (text, language) pairs; mixed texts are labeled with the
+        language of the first word
+    """
+    if profile not in LENGTH_PROFILES:
+        raise ValueError(f"Unknown length profile: {profile}")
+    rng = random.Random(seed)
+    languages = languages or sorted(WORD_POOLS)
+    workload = []
+    for _ in range(n):
+        lang = rng.choice(languages)
+        target = _sample_length(rng, profile)
+        if rng.random() < mixed_script_ratio:
+            other = rng.choice([l for l in languages if l != lang] or [lang])
+            first = _build_text(rng, [lang], max(1, target // 2))
+            text = first + " " + _build_text(rng, [other], max(1, target - target // 2))
+        else:
+            text = _build_text(rng, [lang], target)
+        workload.append((text, lang))
+    return workload
+
+
+def describe_workload(workload: List[Tuple[str, str]]) -> Dict:
+    """Summarize the byte length distribution and language mix of a workload."""
+    lengths = sorted(len(text.encode("utf-8")) for text, _ in workload)
+    langs: Dict[str, int] = {}
+    for _, lang in workload:
+        langs[lang] = langs.get(lang, 0) + 1
+    if not lengths:
+        return {"count": 0, "languages": langs}
+    return {
+        "count": len(lengths),
+        "bytes_p50": lengths[len(lengths) // 2],
+        "bytes_p95": lengths[min(len(lengths) - 1, int(len(lengths) * 0.95))],
+        "bytes_max": lengths[-1],
+        "languages": langs,
+    }
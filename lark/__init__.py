@@ -5,17 +5,44 @@ A powerful language detection model that supports 102 languages
 with byte-level processing and high accuracy.
 """
 
-from .detector import LarkDetector, detect_language
-from .model import LarkModel
-from .tokenizer import batch_tokenize
+import importlib
+
+# Public names are imported on first access so that torch-free modules such
+# as ``lark.client`` can be imported without loading torch and the model.
+_LAZY = {
+    "DetectorRegistry": ".detector",
+    "LarkDetector": ".detector",
+    "default_registry": ".detector",
+    "detect_language": ".detector",
+    "detect_languages": ".detector",
+    "get_detector": ".detector",
+    "LarkModel": ".model",
+    "batch_tokenize": ".tokenizer",
+}
 
 __version__ = "1.0.0"
 __author__ = "Jiang Chengcheng"
 __email__ = "3306065226@qq.com"
 
 __all__ = [
+    "DetectorRegistry",
     "LarkDetector",
     "LarkModel", 
     "batch_tokenize",
+    "default_registry",
     "detect_language",
+    "detect_languages",
+    "get_detector",
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,133 @@
+"""
+Zero-copy Arrow / pandas column detection
+
+Arrow string columns already hold UTF-8 bytes in one contiguous data
+buffer plus an offsets buffer, so token matrices can be built straight
+from those buffers without materializing a Python ``str`` per row.
+"""
+
+from typing import TYPE_CHECKING, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .detector import LarkDetector
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError(
+            "Arrow support requires pyarrow. Install it with: pip install pyarrow"
+        ) from e
+    return pa
+
+
+def string_buffers(array) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    View an Arrow string/binary array as NumPy buffers without copying.
+
+    Args:
+        array: ``pyarrow`` string, large_string, binary or large_binary array
+
+    Returns:
+        Tuple of (data, offsets, valid): the uint8 data buffer, int64 offsets
+        of length B+1 into it, and a bool validity mask of length B
+    """
+    pa = _require_pyarrow()
+    if pa.types.is_string(array.type) or pa.types.is_binary(array.type):
+        offset_dtype = np.int32
+    elif pa.types.is_large_string(array.type) or pa.types.is_large_binary(array.type):
+        offset_dtype = np.int64
+    else:
+        # e.g. string_view: fall back to a single conversion into large_string
+        array = array.cast(pa.large_string())
+        offset_dtype = np.int64
+
+    _, offsets_buf, data_buf = array.buffers()[:3]
+    n = len(array)
+    offsets = np.frombuffer(offsets_buf, dtype=offset_dtype)[array.offset:array.offset + n + 1]
+    data = (np.frombuffer(data_buf, dtype=np.uint8) if data_buf is not None
+            else np.zeros(0, dtype=np.uint8))
+    if array.null_count:
+        valid = array.is_valid().to_numpy(zero_copy_only=False)
+    else:
+        valid = np.ones(n, dtype=bool)
+    return data, offsets.astype(np.int64, copy=False), valid
+
+
+def detect_arrow(detector: "LarkDetector", array, max_len: int = 1024,
+                 batch_size: int = 256):
+    """
+    Detect languages for an Arrow string column.
+
+    Args:
+        detector: ``LarkDetector`` to run
+        array: ``pyarrow.Array`` or ``pyarrow.ChunkedArray`` of strings
+        max_len: Maximum sequence length
+        batch_size: Rows per forward pass
+
+    Returns:
+        ``pyarrow.StructArray`` with fields ``language`` (dictionary-encoded
+        string) and ``confidence`` (float32); null inputs give null rows
+    """
+    pa = _require_pyarrow()
+    chunks = array.chunks if isinstance(array, pa.ChunkedArray) else [array]
+
+    label_ids = []
+    confidences = []
+    valids = []
+    for chunk in chunks:
+        data, offsets, valid = string_buffers(chunk)
+        rows = np.flatnonzero(valid)
+        ids = np.full(len(chunk), -1, dtype=np.int64)
+        conf = np.zeros(len(chunk), dtype=np.float32)
+        for start in range(0, len(rows), batch_size):
+            batch_rows = rows[start:start + batch_size]
+            _, probabilities = detector._predict_buffer(data, offsets, max_len, rows=batch_rows)
+            best = probabilities.float().max(dim=-1)
+            ids[batch_rows] = best.indices.numpy()
+            conf[batch_rows] = best.values.numpy()
+        label_ids.append(ids)
+        confidences.append(conf)
+        valids.append(valid)
+
+    ids = np.concatenate(label_ids) if label_ids else np.zeros(0, dtype=np.int64)
+    conf = np.concatenate(confidences) if confidences else np.zeros(0, dtype=np.float32)
+    valid = np.concatenate(valids) if valids else np.zeros(0, dtype=bool)
+
+    labels = pa.array([detector.id2label[i] for i in range(len(detector.id2label))])
+    mask = pa.array(~valid)
+    language = pa.DictionaryArray.from_arrays(pa.array(ids.astype(np.int32), mask=~valid), labels)
+    confidence = pa.array(conf, mask=~valid)
+    return pa.StructArray.from_arrays([language, confidence], names=["language", "confidence"],
+                                      mask=mask)
+
+
+def detect_series(detector: "LarkDetector", series, max_len: int = 1024,
+                  batch_size: int = 256):
+    """
+    Detect languages for a pandas Series of strings.
+
+    Arrow-backed series are passed through without conversion; other string
+    series are converted to Arrow once.
+
+    Returns:
+        ``pandas.DataFrame`` with ``language`` (categorical) and ``confidence``
+        columns, indexed like ``series``
+    """
+    pa = _require_pyarrow()
+    import pandas as pd
+
+    array = pa.array(series, from_pandas=True)
+    if pa.types.is_null(array.type):
+        array = array.cast(pa.string())
+    result = detect_arrow(detector, array, max_len=max_len, batch_size=batch_size)
+    return pd.DataFrame({
+        "language": result.field("language").to_pandas().values,
+        "confidence": result.field("confidence").to_pandas().values,
+    }, index=series.index)
+
+
+__all__ = ["detect_arrow", "detect_series", "string_buffers"]
@@ -0,0 +1,126 @@
+"""
+Reusable preallocated model input buffers for steady-state serving
+"""
+
+import bisect
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Sequence, Tuple
+
+import torch
+
+from .tokenizer import PAD_BYTE, START_BYTE
+
+
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+Buffers = Tuple[torch.Tensor, torch.Tensor]
+
+
+class InputBufferPool:
+    """
+    Bounded pool of preallocated ``(token_ids, pad_mask)`` tensors.
+
+    Buffers are keyed by (batch bucket, sequence length): a batch of B rows
+    uses the smallest bucket >= B and fills its first B rows in place (see
+    ``tokenize_buffer(out=...)``). Released buffers are kept for reuse, at
+    most ``max_buffers`` in total; the least recently used bucket is evicted
+    first. Batches larger than the largest bucket get a one-off allocation.
+
+    With ``pad_rows`` the model runs on the whole bucket (unused rows hold
+    empty texts) and the decoder's segment dimension is rounded up to
+    ``segment_multiple``, so only a handful of distinct input shapes ever
+    reach the model. Shape-keyed kernel and allocator caches then stop
+    growing, which keeps RSS flat under mixed batch sizes.
+
+    Args:
+        batch_buckets: Batch sizes to allocate buffers for
+        max_buffers: Maximum number of idle buffer pairs kept in the pool
+        pad_rows: Run the model on full buckets instead of the first B rows
+        segment_multiple: Decoder segment length rounding used with ``pad_rows``
+    """
+
+    def __init__(self, batch_buckets: Sequence[int] = BATCH_BUCKETS, max_buffers: int = 16,
+                 pad_rows: bool = True, segment_multiple: int = 16):
+        self.batch_buckets = tuple(sorted(batch_buckets))
+        self.max_buffers = max_buffers
+        self.pad_rows = pad_rows
+        self.segment_multiple = segment_multiple
+        self._free: "OrderedDict[Tuple[int, int], List[Buffers]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _bucket(self, batch_size: int) -> int:
+        i = bisect.bisect_left(self.batch_buckets, batch_size)
+        return self.batch_buckets[i] if i < len(self.batch_buckets) else batch_size
+
+    def acquire(self, batch_size: int, max_len: int) -> Tuple[Buffers, bool]:
+        """
+        Take a buffer pair with room for ``batch_size`` x ``max_len``.
+
+        Returns:
+            Tuple of ((token_ids, pad_mask), hit) where ``hit`` tells whether
+            the buffers were reused from the pool. Pass the buffers back to
+            ``release`` once the model has consumed them.
+        """
+        key = (self._bucket(batch_size), max_len)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                self._free.move_to_end(key)
+                self.hits += 1
+                return free.pop(), True
+            self.misses += 1
+        return (torch.empty(key, dtype=torch.long),
+                torch.empty(key, dtype=torch.float32)), False
+
+    @staticmethod
+    def fill_unused(buffers: Buffers, batch_size: int) -> Buffers:
+        """Turn rows from ``batch_size`` on into empty texts and return the full buffers."""
+        token_ids, pad_mask = buffers
+        if batch_size < token_ids.shape[0]:
+            token_ids[batch_size:] = PAD_BYTE
+            token_ids[batch_size:, 0] = START_BYTE
+            pad_mask[batch_size:] = 0
+            pad_mask[batch_size:, 0] = 1
+        return buffers
+
+    def release(self, buffers: Buffers):
+        """Return buffers to the pool, evicting the least recently used if full."""
+        key = tuple(buffers[0].shape)
+        if key[0] not in self.batch_buckets:
+            return
+        with self._lock:
+            self._free.setdefault(key, []).append(buffers)
+            self._free.move_to_end(key)
+            while self._size() > self.max_buffers:
+                oldest_key, oldest = next(iter(self._free.items()))
+                oldest.pop(0)
+                if not oldest:
+                    del self._free[oldest_key]
+
+    def _size(self) -> int:
+        return sum(len(v) for v in self._free.values())
+
+    def clear(self):
+        """Drop all pooled buffers and reset the counters."""
+        with self._lock:
+            self._free.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and the number and size of idle pooled buffers."""
+        with self._lock:
+            pooled = [b for v in self._free.values() for b in v]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "pooled": len(pooled),
+                "pooled_bytes": sum(t.numel() * t.element_size() for b in pooled for t in b),
+                "keys": list(self._free.keys()),
+            }
+
+
+__all__ = ["BATCH_BUCKETS", "InputBufferPool"]
@@ -0,0 +1,466 @@
+"""
+Command line interface: ``lark <command>``
+
+Commands:
+    detect       Detect the language of texts given as arguments or on stdin
+    evaluate     Write a classification report for a labeled dataset
+    prune        Write smaller pruned model variants and report their trade-off
+    sweep        Accuracy-versus-latency sweep with Pareto frontier and recommendation
+    build-ngram  Build the byte n-gram cascade stage and report its trade-off
+    train-exits  Train early-exit heads by self-distillation and report their trade-off
+    daemon       Serve a warm detector on a Unix socket for ``lark client``
+    client       Detect texts with a running daemon (no torch import)
+    job          Plan, work on, inspect and merge a resumable corpus labeling job
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+from typing import List, Optional
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def _float_list(value: str) -> List[float]:
+    return [float(v) for v in value.split(",") if v]
+
+
+def _str_list(value: str) -> List[str]:
+    return [v for v in value.split(",") if v]
+
+
+def _cmd_detect(args) -> int:
+    from .detector import LarkDetector
+
+    texts = args.texts or [line.rstrip("\n") for line in sys.stdin]
+    options = {"model_path": args.model_path, "labels_path": args.labels_path,
+               "result_cache": args.result_cache, "prefix_cache": args.prefix_cache}
+    if args.workers:
+        from .workers import DetectorPool
+
+        with DetectorPool(args.workers, detector_options=options) as pool:
+            results = pool.detect_batch(texts, max_len=args.max_len)
+    else:
+        results = LarkDetector(**options).detect_batch(texts, max_len=args.max_len)
+    for text, (language, confidence) in zip(texts, results):
+        print(f"{language}\t{confidence:.4f}\t{text}")
+    return 0
+
+
+def _cmd_evaluate(args) -> int:
+    from .data import iter_labeled
+    from .detector import LarkDetector
+    from .evaluate import evaluate, format_report, result_to_json
+
+    detector = LarkDetector(model_path=args.model_path, labels_path=args.labels_path,
+                            dtype=args.dtype, prefilter=args.prefilter,
+                            byte_budget=args.byte_budget, cascade=args.cascade,
+                            cascade_threshold=args.cascade_threshold,
+                            early_exit=args.early_exit, exit_threshold=args.exit_threshold,
+                            metrics=False)
+    result = evaluate(detector, iter_labeled(args.data, limit=args.limit),
+                      batch_size=args.batch_size, max_len=args.max_len)
+    report = format_report(result)
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(report)
+    metrics_output = args.metrics_output or os.path.splitext(args.output)[0] + ".json"
+    with open(metrics_output, "w", encoding="utf-8") as f:
+        json.dump({**result_to_json(result), "config": {k: v for k, v in vars(args).items() if k != "func"}},
+                  f, indent=2, ensure_ascii=False)
+
+    throughput = result["throughput"]
+    print(report)
+    print(f"✅ Accuracy: {result['accuracy']:.4f}  macro F1: {result['macro']['f1']:.4f}  "
+          f"({throughput['texts']} texts, {throughput['texts_per_s']:.1f} texts/s, "
+          f"{throughput['bytes_per_s'] / 1e6:.2f} MB/s)")
+    if result["skipped"]:
+        print(f"⚠️ Skipped {result['skipped']} examples with labels unknown to the model")
+    print(f"Report written to {args.output}, metrics to {metrics_output}")
+    return 0
+
+
+def _cmd_prune(args) -> int:
+    from .data import load_labeled
+    from .prune import run_pruning
+
+    examples = load_labeled(args.data, limit=args.limit)
+    eval_examples = load_labeled(args.eval_data, limit=args.limit) if args.eval_data else None
+    rows = run_pruning(
+        examples, args.output_dir, levels=args.levels, targets=args.targets,
+        model_path=args.model_path, labels_path=args.labels_path,
+        eval_examples=eval_examples, max_len=args.max_len, batch_size=args.batch_size,
+    )
+    print(json.dumps([{k: r[k] for k in ("level", "checkpoint", "accuracy",
+                                          "throughput_texts_per_s", "size_mb")}
+                      for r in rows], indent=2))
+    return 0
+
+
+def _cmd_sweep(args) -> int:
+    from .sweep import grid, mark_pareto, per_text_latency, point_label, recommend, run_sweep
+
+    points = grid(args.max_lens, args.dtypes, args.threads, args.batch_sizes)
+    results = run_sweep(points, args.data, limit=args.limit, model_path=args.model_path,
+                        labels_path=args.labels_path, warmup=args.warmup)
+    mark_pareto(results, latency=args.latency)
+    recommendation = recommend(results, max_latency_ms=args.max_latency_ms,
+                               min_accuracy=args.min_accuracy, latency=args.latency)
+
+    print("\nPareto frontier (accuracy vs %s latency per text):" % args.latency)
+    frontier = [r for r in results if r["pareto"]]
+    for r in sorted(frontier, key=lambda r: per_text_latency(r, args.latency)):
+        print(f"  * {point_label(r):45} accuracy {r['accuracy']:.4f}  "
+              f"{args.latency} {per_text_latency(r, args.latency):8.3f} ms/text  "
+              f"({r['latency_ms'][args.latency]:8.2f} ms/batch)")
+    if recommendation is None:
+        print("❌ No configuration meets the target")
+    else:
+        print(f"✅ Recommended: {point_label(recommendation['point'])}")
+        print(f"   LarkDetector(**{recommendation['detector_options']}), "
+              f"per call {recommendation['call_options']}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"results": results, "recommendation": recommendation,
+                   "targets": {"max_latency_ms": args.max_latency_ms,
+                               "min_accuracy": args.min_accuracy, "latency": args.latency}},
+                  f, indent=2, ensure_ascii=False)
+    print(f"Results written to {args.output}")
+    return 0 if recommendation is not None else 1
+
+
+def _cmd_build_ngram(args) -> int:
+    from .data import load_labeled
+    from .detector import LarkDetector
+    from .ngram import build_ngram, cascade_report
+
+    detector = LarkDetector(model_path=args.model_path, labels_path=args.labels_path,
+                            dtype=args.dtype, metrics=False)
+    classifier = build_ngram(detector, load_labeled(args.data, limit=args.limit),
+                             distill=not args.gold, n_buckets=args.n_buckets,
+                             max_len=args.max_len, epochs=args.epochs, batch_size=args.batch_size)
+    classifier.save(args.output)
+    print(f"✅ N-gram model written to {args.output} "
+          f"({os.path.getsize(args.output) / 1024 ** 2:.2f} MB)")
+
+    eval_examples = load_labeled(args.eval_data or args.data, limit=args.limit)
+    report = cascade_report(detector, classifier, eval_examples, thresholds=args.thresholds,
+                            max_len=args.max_len, batch_size=args.batch_size)
+    transformer = report["transformer"]
+    print(f"Transformer alone: accuracy {transformer['accuracy']:.4f}  "
+          f"{transformer['texts_per_s']:9.1f} texts/s")
+    print(f"N-gram alone:      accuracy {report['ngram']['accuracy']:.4f}  "
+          f"{report['ngram']['texts_per_s']:9.1f} texts/s")
+    for row in report["cascade"]:
+        print(f"  threshold {row['threshold']:.2f}: escalated {row['escalation_rate']:6.1%}  "
+              f"accuracy {row['accuracy']:.4f}  agreement {row['agreement']:.4f}  "
+              f"~{row['texts_per_s']:9.1f} texts/s")
+    report_output = args.report_output or os.path.splitext(args.output)[0] + "_report.json"
+    with open(report_output, "w", encoding="utf-8") as f:
+        json.dump({**report, "config": {k: v for k, v in vars(args).items() if k != "func"}},
+                  f, indent=2, ensure_ascii=False)
+    print(f"Report written to {report_output}")
+    return 0
+
+
+def _cmd_train_exits(args) -> int:
+    from .data import load_labeled
+    from .detector import LarkDetector
+    from .early_exit import exit_report, train_exit_heads
+
+    detector = LarkDetector(model_path=args.model_path, labels_path=args.labels_path,
+                            dtype=args.dtype, metrics=False)
+    texts = [text for text, _ in load_labeled(args.data, limit=args.limit)]
+    heads = train_exit_heads(detector.model, texts, max_len=args.max_len,
+                             batch_size=args.batch_size, epochs=args.epochs)
+    heads.save(args.output)
+    print(f"✅ Exit heads written to {args.output}")
+
+    detector.early_exit = heads
+    report = exit_report(detector, load_labeled(args.eval_data or args.data, limit=args.limit),
+                         thresholds=args.thresholds, max_len=args.max_len,
+                         batch_size=args.batch_size)
+    full = report["full"]
+    print(f"Full model:        accuracy {full['accuracy']:.4f}  depth {report['max_depth']}  "
+          f"{full['texts_per_s']:9.1f} texts/s")
+    for row in report["early_exit"]:
+        print(f"  threshold {row['threshold']:.2f}: accuracy {row['accuracy']:.4f}  "
+              f"agreement {row['agreement']:.4f}  mean depth {row['mean_depth']:.2f}  "
+              f"{row['texts_per_s']:9.1f} texts/s")
+    report_output = args.report_output or os.path.splitext(args.output)[0] + "_report.json"
+    with open(report_output, "w", encoding="utf-8") as f:
+        json.dump({**report, "config": {k: v for k, v in vars(args).items() if k != "func"}},
+                  f, indent=2, ensure_ascii=False)
+    print(f"Report written to {report_output}")
+    return 0
+
+
+def _cmd_daemon(args) -> int:
+    import signal
+
+    from .daemon import LarkDaemon
+    from .detector import LarkDetector
+
+    detector = LarkDetector(model_path=args.model_path, labels_path=args.labels_path,
+                            dtype=args.dtype, num_threads=args.num_threads,
+                            prefilter=args.prefilter, byte_budget=args.byte_budget,
+                            buffer_pool=args.buffer_pool, batch_planner=args.batch_planner,
+                            cascade=args.cascade, cascade_threshold=args.cascade_threshold,
+                            early_exit=args.early_exit, exit_threshold=args.exit_threshold,
+                            result_cache=args.result_cache, prefix_cache=args.prefix_cache)
+    detector.detect_batch(["warmup"])
+    if detector.single_path is not None:
+        detector.single_path.capture()
+    server = LarkDaemon(detector, args.socket)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    print(f"✅ Lark daemon listening on {server.socket_path} (pid {os.getpid()})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def _cmd_job(args) -> int:
+    from .jobs import LabelingJob, read_manifest
+
+    if args.action == "plan":
+        job = LabelingJob.create(args.job_dir, read_manifest(args.manifest),
+                                 shard_bytes=int(args.shard_mb * (1 << 20)))
+        print(f"✅ Job {args.job_dir}: {len(job.shards)} shard(s) over {len(job.inputs)} input(s)")
+        return 0
+
+    job = LabelingJob(args.job_dir, lease=args.lease)
+    if args.action == "work":
+        options = {"model_path": args.model_path, "labels_path": args.labels_path,
+                   "dtype": args.dtype, "prefilter": args.prefilter,
+                   "cascade": args.cascade, "cascade_threshold": args.cascade_threshold,
+                   "early_exit": args.early_exit, "exit_threshold": args.exit_threshold,
+                   "result_cache": args.result_cache, "prefix_cache": args.prefix_cache,
+                   "metrics": False}
+        if args.workers:
+            from .workers import DetectorPool
+
+            with DetectorPool(args.workers, detector_options=options) as pool:
+                summary = job.run_worker(pool, batch_size=args.batch_size, max_len=args.max_len)
+        else:
+            from .detector import LarkDetector
+
+            summary = job.run_worker(LarkDetector(**options), batch_size=args.batch_size,
+                                     max_len=args.max_len)
+        print(json.dumps(summary))
+        return 0
+    if args.action == "status":
+        print(json.dumps(job.status(), indent=2))
+        return 0
+    try:
+        records = job.merge(args.output)
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(f"✅ Merged {records} record(s) into {args.output}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="lark", description="Lark language detection tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_model_args(p):
+        p.add_argument("--model-path", default=None, help="Model checkpoint (default: released weights)")
+        p.add_argument("--labels-path", default=None, help="Labels JSON (default: released labels)")
+
+    def add_adaptive_args(p):
+        p.add_argument("--cascade", default=None,
+                       help="N-gram first stage built with lark build-ngram")
+        p.add_argument("--cascade-threshold", type=float, default=0.9,
+                       help="Confidence below which texts escalate to the transformer")
+        p.add_argument("--early-exit", default=None,
+                       help="Exit heads trained with lark train-exits")
+        p.add_argument("--exit-threshold", type=float, default=0.9,
+                       help="Confidence at which a text leaves the model early")
+
+    detect = subparsers.add_parser("detect", help="Detect the language of texts")
+    detect.add_argument("texts", nargs="*", help="Texts to classify (default: one per stdin line)")
+    detect.add_argument("--max-len", type=int, default=1024)
+    detect.add_argument("--result-cache", default=None,
+                        help="SQLite file caching results across runs and processes")
+    detect.add_argument("--prefix-cache", action="store_true",
+                        help="Encode only the suffix of texts sharing a frequent cached prefix")
+    detect.add_argument("--workers", default=None, metavar="LAYOUT",
+                        help="Run pinned, NUMA-local worker processes, e.g. 4x8 (workers x threads)")
+    add_model_args(detect)
+    detect.set_defaults(func=_cmd_detect)
+
+    evaluate = subparsers.add_parser("evaluate", help="Evaluate on a labeled dataset")
+    evaluate.add_argument("data", help="Labeled dataset (.jsonl with text/label, or label<TAB>text)")
+    evaluate.add_argument("--output", default="classification_report.txt")
+    evaluate.add_argument("--metrics-output", default=None,
+                          help="JSON with metrics, confusion matrix and throughput "
+                               "(default: --output with a .json extension)")
+    evaluate.add_argument("--batch-size", type=int, default=256)
+    evaluate.add_argument("--max-len", type=int, default=1024)
+    evaluate.add_argument("--limit", type=int, default=None, help="Read at most this many examples")
+    evaluate.add_argument("--dtype", default=None, help="float16, bfloat16 or float32")
+    evaluate.add_argument("--byte-budget", type=int, default=None)
+    evaluate.add_argument("--prefilter", action="store_true",
+                          help="Resolve trivial and single-script texts without the model")
+    add_adaptive_args(evaluate)
+    add_model_args(evaluate)
+    evaluate.set_defaults(func=_cmd_evaluate)
+
+    prune = subparsers.add_parser("prune", help="Write pruned model variants")
+    prune.add_argument("--data", required=True,
+                       help="Labeled sample for ranking (.jsonl with text/label, or label<TAB>text)")
+    prune.add_argument("--eval-data", default=None,
+                       help="Labeled sample for the accuracy report (default: --data)")
+    prune.add_argument("--output-dir", default="pruned")
+    prune.add_argument("--levels", type=_float_list, default=[0.25, 0.5],
+                       help="Comma-separated pruning levels in [0, 1)")
+    prune.add_argument("--targets", type=_str_list, default=["ffn", "layers"],
+                       help="Comma-separated structures to prune: ffn, heads, layers")
+    prune.add_argument("--max-len", type=int, default=256)
+    prune.add_argument("--batch-size", type=int, default=32)
+    prune.add_argument("--limit", type=int, default=None, help="Read at most this many examples")
+    add_model_args(prune)
+    prune.set_defaults(func=_cmd_prune)
+
+    sweep = subparsers.add_parser("sweep", help="Accuracy-versus-latency settings sweep")
+    sweep.add_argument("data", help="Labeled dataset (.jsonl with text/label, or label<TAB>text)")
+    sweep.add_argument("--max-lens", type=_int_list, default=[256, 512, 1024])
+    sweep.add_argument("--dtypes", type=_str_list, default=["float16", "bfloat16", "float32"])
+    sweep.add_argument("--threads", type=_int_list, default=[1])
+    sweep.add_argument("--batch-sizes", type=_int_list, default=[32])
+    sweep.add_argument("--limit", type=int, default=None, help="Read at most this many examples")
+    sweep.add_argument("--warmup", type=int, default=1, help="Warmup batches per point")
+    sweep.add_argument("--latency", choices=["p50", "p95", "p99"], default="p99",
+                       help="Batch latency percentile (divided by batch size for the frontier)")
+    sweep.add_argument("--max-latency-ms", type=float, default=None,
+                       help="Recommend the most accurate point within this per-batch latency")
+    sweep.add_argument("--min-accuracy", type=float, default=None,
+                       help="Recommend the fastest point reaching this accuracy")
+    sweep.add_argument("--output", default="sweep_results.json")
+    add_model_args(sweep)
+    sweep.set_defaults(func=_cmd_sweep)
+
+    build_ngram = subparsers.add_parser("build-ngram",
+                                        help="Build the byte n-gram cascade stage")
+    build_ngram.add_argument("data", help="Training texts (.jsonl with text/label, or label<TAB>text)")
+    build_ngram.add_argument("--output", default="lark_ngram.npz")
+    build_ngram.add_argument("--report-output", default=None,
+                             help="JSON cascade report (default: --output with _report.json)")
+    build_ngram.add_argument("--eval-data", default=None,
+                             help="Labeled sample for the cascade report (default: data)")
+    build_ngram.add_argument("--gold", action="store_true",
+                             help="Train on the dataset labels instead of distilling the transformer")
+    build_ngram.add_argument("--n-buckets", type=int, default=1 << 16)
+    build_ngram.add_argument("--epochs", type=int, default=5)
+    build_ngram.add_argument("--batch-size", type=int, default=256)
+    build_ngram.add_argument("--max-len", type=int, default=1024)
+    build_ngram.add_argument("--limit", type=int, default=None, help="Read at most this many examples")
+    build_ngram.add_argument("--dtype", default=None, help="Transformer precision")
+    build_ngram.add_argument("--thresholds", type=_float_list, default=[0.5, 0.7, 0.8, 0.9, 0.95, 0.99],
+                             help="Comma-separated cascade thresholds to report")
+    add_model_args(build_ngram)
+    build_ngram.set_defaults(func=_cmd_build_ngram)
+
+    train_exits = subparsers.add_parser("train-exits",
+                                        help="Train early-exit heads by self-distillation")
+    train_exits.add_argument("data", help="Local texts (.jsonl with text/label, or label<TAB>text); "
+                                          "labels are only used for the report")
+    train_exits.add_argument("--output", default="lark_exits.pth")
+    train_exits.add_argument("--report-output", default=None,
+                             help="JSON report (default: --output with _report.json)")
+    train_exits.add_argument("--eval-data", default=None,
+                             help="Labeled sample for the report (default: data)")
+    train_exits.add_argument("--epochs", type=int, default=50)
+    train_exits.add_argument("--batch-size", type=int, default=64)
+    train_exits.add_argument("--max-len", type=int, default=1024)
+    train_exits.add_argument("--limit", type=int, default=None, help="Read at most this many examples")
+    train_exits.add_argument("--dtype", default=None, help="Model precision")
+    train_exits.add_argument("--thresholds", type=_float_list, default=[0.5, 0.7, 0.8, 0.9, 0.95, 0.99],
+                             help="Comma-separated exit thresholds to report")
+    add_model_args(train_exits)
+    train_exits.set_defaults(func=_cmd_train_exits)
+
+    daemon = subparsers.add_parser("daemon", help="Serve a warm detector on a Unix socket")
+    daemon.add_argument("--socket", default=None,
+                        help="Socket path (default: $LARK_SOCKET, $XDG_RUNTIME_DIR/lark.sock "
+                             "or /tmp/lark-<uid>.sock)")
+    daemon.add_argument("--dtype", default=None, help="float16, bfloat16 or float32")
+    daemon.add_argument("--num-threads", type=int, default=None)
+    daemon.add_argument("--byte-budget", type=int, default=None)
+    daemon.add_argument("--prefilter", action="store_true",
+                        help="Resolve trivial and single-script texts without the model")
+    daemon.add_argument("--buffer-pool", action="store_true", help="Reuse preallocated input buffers")
+    daemon.add_argument("--batch-planner", action="store_true",
+                        help="Split large requests into memory-bounded sub-batches")
+    daemon.add_argument("--result-cache", default=None,
+                        help="SQLite file caching results across runs and processes")
+    daemon.add_argument("--prefix-cache", action="store_true",
+                        help="Encode only the suffix of texts sharing a frequent cached prefix")
+    add_adaptive_args(daemon)
+    add_model_args(daemon)
+    daemon.set_defaults(func=_cmd_daemon)
+
+    job = subparsers.add_parser("job", help="Resumable corpus labeling job on shared storage")
+    actions = job.add_subparsers(dest="action", required=True)
+    plan = actions.add_parser("plan", help="Split the inputs of a manifest into shards")
+    plan.add_argument("manifest", help="Text file listing input files, one per line")
+    plan.add_argument("job_dir", help="Job directory on storage shared by all workers")
+    plan.add_argument("--shard-mb", type=float, default=64, help="Target input megabytes per shard")
+    work = actions.add_parser("work", help="Claim and label shards until the job is done")
+    work.add_argument("job_dir")
+    work.add_argument("--batch-size", type=int, default=256,
+                      help="Documents per batch and per checkpoint")
+    work.add_argument("--max-len", type=int, default=1024)
+    work.add_argument("--dtype", default=None, help="float16, bfloat16 or float32")
+    work.add_argument("--prefilter", action="store_true",
+                      help="Resolve trivial and single-script texts without the model")
+    work.add_argument("--result-cache", default=None,
+                      help="SQLite file caching results across runs and processes")
+    work.add_argument("--prefix-cache", action="store_true",
+                      help="Encode only the suffix of texts sharing a frequent cached prefix")
+    work.add_argument("--workers", default=None, metavar="LAYOUT",
+                      help="Run pinned, NUMA-local worker processes, e.g. 4x8 (workers x threads)")
+    add_adaptive_args(work)
+    add_model_args(work)
+    status = actions.add_parser("status", help="Show shard progress")
+    status.add_argument("job_dir")
+    merge = actions.add_parser("merge", help="Concatenate the shard outputs in input order")
+    merge.add_argument("job_dir")
+    merge.add_argument("output")
+    for p in (work, status, merge):
+        p.add_argument("--lease", type=float, default=600.0,
+                       help="Seconds without a heartbeat after which a shard is taken over")
+    job.set_defaults(func=_cmd_job)
+
+    client = subparsers.add_parser("client", help="Detect texts with a running daemon",
+                                   add_help=False)
+    client.add_argument("client_args", nargs=argparse.REMAINDER,
+                        help="Arguments of lark-client (see lark client --help)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["client"]:
+        # Forwarded verbatim: argparse cannot pass leading options through a subparser
+        from .client import main as client_main
+        return client_main(argv[1:])
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+def detect_main(argv: Optional[List[str]] = None) -> int:
+    """Entry point of the ``lark-detect`` script (``lark detect``)."""
+    return main(["detect", *(sys.argv[1:] if argv is None else argv)])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+Thin client for the ``lark daemon`` detection server
+
+Only the standard library is imported (no torch, no numpy), so a shell
+pipeline pays a few milliseconds of interpreter start-up per invocation
+instead of the full torch import and model load. Texts are sent over a
+Unix domain socket; batches larger than ``shm_threshold`` bytes are passed
+through a file in ``/dev/shm`` that the daemon maps and answers into.
+
+Wire format (both directions)::
+
+    >IQ  header length, payload length
+    header   UTF-8 JSON object
+    payload  optional binary data
+
+A ``detect`` request carries ``n + 1`` int64 offsets followed by the
+concatenated UTF-8 texts. The response carries ``n`` int32 indices into the
+header's ``labels`` list followed by ``n`` float32 confidences.
+"""
+
+import argparse
+import array
+import itertools
+import json
+import mmap
+import os
+import socket
+import struct
+import sys
+import tempfile
+from typing import Dict, Iterable, List, Optional, Tuple
+
+FRAME = struct.Struct(">IQ")
+SHM_DIR = "/dev/shm"
+SHM_PREFIX = "lark-"
+
+
+def default_socket_path() -> str:
+    """``$LARK_SOCKET``, else ``$XDG_RUNTIME_DIR/lark.sock``, else ``/tmp/lark-<uid>.sock``."""
+    path = os.environ.get("LARK_SOCKET")
+    if path:
+        return path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "lark.sock")
+    return os.path.join(tempfile.gettempdir(), f"lark-{os.getuid()}.sock")
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], size - received)
+        if not n:
+            raise ConnectionError("Connection closed by peer")
+        received += n
+    return bytes(buf)
+
+
+def send_message(sock: socket.socket, header: Dict, payload: bytes = b"") -> None:
+    """Send one framed message."""
+    encoded = json.dumps(header).encode("utf-8")
+    sock.sendall(FRAME.pack(len(encoded), len(payload)) + encoded)
+    if payload:
+        sock.sendall(payload)
+
+
+def recv_message(sock: socket.socket) -> Tuple[Dict, bytes]:
+    """Receive one framed message as (header, payload)."""
+    header_len, payload_len = FRAME.unpack(_recv_exact(sock, FRAME.size))
+    header = json.loads(_recv_exact(sock, header_len).decode("utf-8"))
+    payload = _recv_exact(sock, payload_len) if payload_len else b""
+    return header, payload
+
+
+def decode_results(labels: List[str], buffer, n: int) -> List[Tuple[str, float]]:
+    """Unpack ``n`` int32 label indices and ``n`` float32 confidences."""
+    indices = array.array("i")
+    confidences = array.array("f")
+    indices.frombytes(bytes(buffer[:4 * n]))
+    confidences.frombytes(bytes(buffer[4 * n:8 * n]))
+    return [(labels[i], c) for i, c in zip(indices, confidences)]
+
+
+class LarkClient:
+    """
+    Connection to a running ``lark daemon``.
+
+    Args:
+        socket_path: Daemon socket (default: ``default_socket_path()``)
+        timeout: Socket timeout in seconds, None to wait indefinitely
+        shm_threshold: Requests with more payload bytes than this go through
+            shared memory; None disables shared memory
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, timeout: Optional[float] = None,
+                 shm_threshold: Optional[int] = 1 << 20):
+        self.socket_path = socket_path or default_socket_path()
+        self.shm_threshold = shm_threshold if os.path.isdir(SHM_DIR) else None
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            self._sock.connect(self.socket_path)
+        except OSError as e:
+            self._sock.close()
+            raise ConnectionError(f"No lark daemon at {self.socket_path} ({e}); "
+                                  f"start one with `lark daemon`") from e
+
+    def _call(self, header: Dict, payload: bytes = b"") -> Tuple[Dict, bytes]:
+        send_message(self._sock, header, payload)
+        response, data = recv_message(self._sock)
+        if "error" in response:
+            raise RuntimeError(f"lark daemon: {response['error']}")
+        return response, data
+
+    def ping(self) -> Dict:
+        """Round trip without inference; returns daemon information."""
+        return self._call({"op": "ping"})[0]
+
+    def stats(self) -> Dict:
+        """Daemon counters and, if enabled, the detector's metrics snapshot."""
+        return self._call({"op": "stats"})[0]
+
+    def shutdown(self) -> None:
+        """Ask the daemon to stop serving."""
+        self._call({"op": "shutdown"})
+
+    def detect(self, text: str, max_len: int = 1024) -> Tuple[str, float]:
+        """Detect the language of one text; see ``detect_batch``."""
+        return self.detect_batch([text], max_len=max_len)[0]
+
+    def detect_batch(self, texts: List[str], max_len: int = 1024) -> List[Tuple[str, float]]:
+        """
+        Detect the language of each text with the daemon's detector.
+
+        Args:
+            texts: List of input text strings
+            max_len: Maximum sequence length
+
+        Returns:
+            List of tuples (detected_language, confidence_score) for each text,
+            as returned by ``LarkDetector.detect_batch``
+        """
+        if not texts:
+            return []
+        encoded = [text.encode("utf-8") for text in texts]
+        offsets = array.array("q", itertools.accumulate(map(len, encoded), initial=0))
+        n = len(texts)
+        size = len(offsets) * offsets.itemsize + offsets[-1]
+        header = {"op": "detect", "n": n, "max_len": max_len}
+
+        if self.shm_threshold is None or size <= self.shm_threshold:
+            response, data = self._call(header, offsets.tobytes() + b"".join(encoded))
+            return decode_results(response["labels"], data, n)
+
+        # The request is written into a shared file which the daemon maps;
+        # the response is written back after the request bytes.
+        fd, path = tempfile.mkstemp(prefix=SHM_PREFIX, dir=SHM_DIR)
+        try:
+            os.ftruncate(fd, size + 8 * n)
+            with mmap.mmap(fd, size + 8 * n) as shm:
+                shm[:len(offsets) * offsets.itemsize] = offsets.tobytes()
+                position = len(offsets) * offsets.itemsize
+                for chunk in encoded:
+                    shm[position:position + len(chunk)] = chunk
+                    position += len(chunk)
+                response, _ = self._call({**header, "shm": path, "size": size})
+                return decode_results(response["labels"], shm[size:size + 8 * n], n)
+        finally:
+            os.close(fd)
+            os.unlink(path)
+
+    def close(self):
+        self._sock.close()
+
+    def __enter__(self) -> "LarkClient":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _chunks(lines: Iterable[str], size: int) -> Iterable[List[str]]:
+    iterator = iter(lines)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point of ``lark-client`` / ``lark client``: same output as ``lark detect``."""
+    parser = argparse.ArgumentParser(prog="lark-client",
+                                     description="Detect languages with a running lark daemon")
+    parser.add_argument("texts", nargs="*", help="Texts to classify (default: one per stdin line)")
+    parser.add_argument("--socket", default=None, help="Daemon socket (default: $LARK_SOCKET, "
+                                                       "$XDG_RUNTIME_DIR/lark.sock or /tmp/lark-<uid>.sock)")
+    parser.add_argument("--max-len", type=int, default=1024)
+    parser.add_argument("--batch-size", type=int, default=1024, help="Lines per request")
+    parser.add_argument("--no-text", action="store_true", help="Print only language and confidence")
+    args = parser.parse_args(argv)
+
+    lines = args.texts or (line.rstrip("\n") for line in sys.stdin)
+    try:
+        client = LarkClient(args.socket)
+    except ConnectionError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    with client:
+        out = sys.stdout
+        for chunk in _chunks(lines, args.batch_size):
+            for text, (language, confidence) in zip(chunk, client.detect_batch(chunk, args.max_len)):
+                if args.no_text:
+                    out.write(f"{language}\t{confidence:.4f}\n")
+                else:
+                    out.write(f"{language}\t{confidence:.4f}\t{text}\n")
+        out.flush()
+    return 0
+
+
+__all__ = ["LarkClient", "default_socket_path", "main"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Persistent local detection daemon behind a Unix domain socket
+
+``lark daemon`` loads one warm ``LarkDetector`` and answers ``lark.client``
+requests until it is stopped, so shell jobs that classify a few lines per
+invocation skip the torch import and model load. Each connection is served
+by its own thread and may send any number of requests; inference itself is
+serialized on one lock so the detector's buffers and metrics are never
+shared between concurrent calls. See ``lark.client`` for the wire format.
+"""
+
+import mmap
+import os
+import socket
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .client import SHM_DIR, SHM_PREFIX, default_socket_path, recv_message, send_message
+
+
+def encode_results(results: List[Tuple[str, float]]) -> Tuple[List[str], bytes]:
+    """Pack detector results as (labels, int32 label indices + float32 confidences)."""
+    labels: List[str] = []
+    index: Dict[str, int] = {}
+    ids = np.empty(len(results), dtype=np.int32)
+    confidences = np.empty(len(results), dtype=np.float32)
+    for row, (label, confidence) in enumerate(results):
+        label_id = index.get(label)
+        if label_id is None:
+            label_id = index[label] = len(labels)
+            labels.append(label)
+        ids[row] = label_id
+        confidences[row] = confidence
+    return labels, ids.tobytes() + confidences.tobytes()
+
+
+def _decode_texts(buffer, n: int) -> List[str]:
+    offsets = np.frombuffer(buffer, dtype=np.int64, count=n + 1)
+    data = bytes(buffer[(n + 1) * 8:(n + 1) * 8 + int(offsets[-1])])
+    bounds = offsets.tolist()
+    return [data[bounds[i]:bounds[i + 1]].decode("utf-8", errors="replace") for i in range(n)]
+
+
+def _open_shm(path: str, size: int) -> mmap.mmap:
+    """Map a client's request file, refusing anything outside the shm directory."""
+    real = os.path.realpath(path)
+    if os.path.dirname(real) != os.path.realpath(SHM_DIR) or \
+            not os.path.basename(real).startswith(SHM_PREFIX):
+        raise ValueError(f"Refusing shared memory path {path!r}")
+    with open(real, "r+b") as f:
+        if os.fstat(f.fileno()).st_size < size:
+            raise ValueError(f"Shared memory file {path!r} is smaller than {size} bytes")
+        return mmap.mmap(f.fileno(), size)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server: LarkDaemon = self.server
+        server.count("connections")
+        while True:
+            try:
+                header, payload = recv_message(self.request)
+            except (ConnectionError, OSError):
+                return
+            try:
+                response, data = server.dispatch(header, payload)
+            except Exception as e:
+                response, data = {"error": f"{type(e).__name__}: {e}"}, b""
+                server.count("errors")
+            send_message(self.request, response, data)
+            if header.get("op") == "shutdown":
+                return
+
+
+class LarkDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix socket server around a ``LarkDetector``.
+
+    Args:
+        detector: Warm detector used for every request
+        socket_path: Socket to listen on (default: ``default_socket_path()``)
+    """
+
+    daemon_threads = True
+
+    def __init__(self, detector, socket_path: Optional[str] = None):
+        self.detector = detector
+        self.socket_path = socket_path or default_socket_path()
+        self.started = time.time()
+        self.counters = {"connections": 0, "requests": 0, "texts": 0, "shm_requests": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._inference_lock = threading.Lock()
+        self._remove_stale_socket()
+        super().__init__(self.socket_path, _Handler)
+        os.chmod(self.socket_path, 0o600)
+
+    def _remove_stale_socket(self):
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.unlink(self.socket_path)
+        else:
+            raise RuntimeError(f"A lark daemon is already listening on {self.socket_path}")
+        finally:
+            probe.close()
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    def dispatch(self, header: Dict, payload: bytes) -> Tuple[Dict, bytes]:
+        """Answer one request; returns the response header and payload."""
+        op = header.get("op")
+        self.count("requests")
+        if op == "detect":
+            return self._detect(header, payload)
+        if op == "ping":
+            return {"pid": os.getpid(), "model_path": self.detector.model_path}, b""
+        if op == "stats":
+            metrics = self.detector.metrics.snapshot() if self.detector.metrics is not None else None
+            with self._lock:
+                counters = dict(self.counters)
+            prefix_cache = self.detector.prefix_cache
+            return {"uptime_seconds": time.time() - self.started, **counters,
+                    "metrics": metrics,
+                    "prefix_cache": prefix_cache.stats() if prefix_cache is not None else None}, b""
+        if op == "shutdown":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {}, b""
+        raise ValueError(f"Unknown op {op!r}")
+
+    def _detect(self, header: Dict, payload: bytes) -> Tuple[Dict, bytes]:
+        n = int(header["n"])
+        max_len = int(header.get("max_len", 1024))
+        self.count("texts", n)
+        if not header.get("shm"):
+            with self._inference_lock:
+                results = self.detector.detect_batch(_decode_texts(payload, n), max_len=max_len)
+            labels, data = encode_results(results)
+            return {"labels": labels}, data
+
+        self.count("shm_requests")
+        size = int(header["size"])
+        with _open_shm(header["shm"], size + 8 * n) as shm:
+            texts = _decode_texts(shm, n)
+            with self._inference_lock:
+                results = self.detector.detect_batch(texts, max_len=max_len)
+            labels, data = encode_results(results)
+            shm[size:size + len(data)] = data
+        return {"labels": labels}, b""
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def serve(detector, socket_path: Optional[str] = None) -> LarkDaemon:
+    """
+    Start a daemon on a background thread.
+
+    Args:
+        detector: Warm ``LarkDetector``
+        socket_path: Socket to listen on (default: ``default_socket_path()``)
+
+    Returns:
+        The running ``LarkDaemon``; stop it with ``shutdown()`` then ``server_close()``
+    """
+    server = LarkDaemon(detector, socket_path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+__all__ = ["LarkDaemon", "encode_results", "serve"]
@@ -0,0 +1,61 @@
+"""
+Labeled sample loading for the evaluation and pruning tools
+"""
+
+import json
+import os
+from typing import Iterator, List, Optional, Tuple
+
+
+def load_labeled(path: str, limit: Optional[int] = None) -> List[Tuple[str, str]]:
+    """Load all (text, label) pairs of a labeled sample; see ``iter_labeled``."""
+    return list(iter_labeled(path, limit=limit))
+
+
+def iter_labeled(path: str, limit: Optional[int] = None) -> Iterator[Tuple[str, str]]:
+    """
+    Stream (text, label) pairs from a local labeled sample.
+
+    Supported formats, chosen by extension:
+
+    - ``.jsonl``: one object per line with ``text`` and ``label`` (or
+      ``lang`` / ``language``)
+    - ``.tsv`` / ``.txt``: one ``label<TAB>text`` pair per line
+
+    Args:
+        path: Path to the sample file
+        limit: Optional maximum number of examples to read
+
+    Yields:
+        (text, label) tuples in file order
+
+    Raises:
+        ValueError: If a line cannot be parsed
+    """
+    is_jsonl = os.path.splitext(path)[1].lower() in (".jsonl", ".json")
+    count = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if limit is not None and count >= limit:
+                break
+            line = line.rstrip("\n")
+            if not line.strip():
+                continue
+            if is_jsonl:
+                try:
+                    record = json.loads(line)
+                    label = record.get("label", record.get("lang", record.get("language")))
+                    text = record["text"]
+                except (ValueError, KeyError, AttributeError) as e:
+                    raise ValueError(f"{path}:{line_no}: invalid record: {e}") from e
+                if label is None:
+                    raise ValueError(f"{path}:{line_no}: record has no label")
+            else:
+                label, sep, text = line.partition("\t")
+                if not sep:
+                    raise ValueError(f"{path}:{line_no}: expected 'label<TAB>text'")
+            count += 1
+            yield text, str(label)
+
+
+__all__ = ["iter_labeled", "load_labeled"]
@@ -2,35 +2,62 @@
 LarkDetector - Main interface for language detection
 """
 
+import numpy as np
 import torch
+import hashlib
 import json
 import os
-import requests
-from typing import List, Tuple, Dict, Optional
-from .model import LarkModel
-from .tokenizer import batch_tokenize
+import threading
+import warnings
+from typing import Callable, List, Tuple, Dict, Optional, Sequence, Union
+from .model import LarkModel, PAD_BYTE, VOCAB_SIZE
+from .tokenizer import batch_tokenize, tokenize_buffer, tokenize_one
+from .profiling import StageProfiler
+from .metrics import DetectorMetrics, track
+from .prefilter import Prefilter, TO_MODEL, UNDEFINED
+from .buffers import InputBufferPool
+from .planner import BatchPlanner
+from .ngram import NgramClassifier
+from .early_exit import ExitHeads, early_exit_forward
+from .result_cache import ResultCache, make_keys
+from .single import SingleTextPath
+from .prefix_cache import PrefixCache, PrefixState, encode as encode_with_prefix
+from .download import (
+    LABELS_FILENAME, MODEL_FILENAME, download_file, get_base_url, get_cache_dir,
+)
 
+BytesLike = Union[bytes, bytearray, memoryview]
 
-def download_from_huggingface(url: str, local_path: str, timeout: int = 10) -> bool:
+# Architecture of the released checkpoint
+MODEL_CONFIG = {
+    "d_model": 256, "n_layers": 4, "n_heads": 8, "ff": 512,
+    "label_size": 102, "dropout": 0.0, "max_len": 1024,
+}
+
+# Vectors returned by embed_batch / detect_batch(return_embeddings=True)
+EMBEDDING_POOLINGS = ("cls", "encoder", "both")
+
+
+def download_from_huggingface(url: str, local_path: str, timeout: int = 10,
+                              sha256: Optional[str] = None) -> bool:
     """
     Download file from HuggingFace with timeout.
     
+    The file is streamed to disk in chunks, resumed on interruption and
+    verified against ``sha256`` (or the hash advertised by the server).
+    
     Args:
         url: HuggingFace file URL
         local_path: Local path to save the file
         timeout: Download timeout in seconds
+        sha256: Optional expected SHA-256 hex digest
         
     Returns:
         True if download successful, False otherwise
     """
     try:
         print(f"📥 Downloading from {url}...")
-        response = requests.get(url, timeout=timeout)
-        response.raise_for_status()
-        
-        with open(local_path, 'wb') as f:
-            f.write(response.content)
-        
+        download_file(url, local_path, sha256=sha256, timeout=timeout)
         print(f"✅ Downloaded successfully: {local_path}")
         return True
     except Exception as e:
@@ -38,6 +65,14 @@ def download_from_huggingface(url: str, local_path: str, timeout: int = 10) -> b
         return False
 
 
+def _default_path(filename: str, cache_dir: Optional[str]) -> str:
+    """Prefer a file shipped next to the package, else the shared cache."""
+    legacy_path = os.path.join(os.path.dirname(__file__), "..", filename)
+    if cache_dir is None and os.path.exists(legacy_path):
+        return legacy_path
+    return os.path.join(get_cache_dir(cache_dir), filename)
+
+
 class LarkDetector:
     """
     Main language detection interface for Lark model.
@@ -46,48 +81,143 @@ class LarkDetector:
     using the byte-level Lark model.
     """
     
-    def __init__(self, model_path: Optional[str] = None, labels_path: Optional[str] = None):
+    def __init__(self, model_path: Optional[str] = None, labels_path: Optional[str] = None,
+                 cache_dir: Optional[str] = None, model_sha256: Optional[str] = None,
+                 allow_random_init: bool = True, dtype: Optional[Union[str, torch.dtype]] = None,
+                 num_threads: Optional[int] = None, profile: bool = False,
+                 profile_callback: Optional[Callable[[Dict], None]] = None,
+                 metrics: bool = True, regroup_decoder: bool = False,
+                 prefilter: Union[bool, Prefilter] = False,
+                 byte_budget: Optional[int] = None, n_excerpts: int = 3,
+                 buffer_pool: Union[bool, InputBufferPool] = False,
+                 batch_planner: Union[bool, BatchPlanner] = False,
+                 cascade: Optional[Union[str, NgramClassifier]] = None,
+                 cascade_threshold: float = 0.9,
+                 early_exit: Optional[Union[str, ExitHeads]] = None,
+                 exit_threshold: float = 0.9,
+                 result_cache: Optional[Union[str, ResultCache]] = None,
+                 single_path: Union[bool, SingleTextPath] = True,
+                 prefix_cache: Union[bool, PrefixCache] = False):
         """
         Initialize the language detector.
         
         Args:
             model_path: Path to the model weights file. If None, uses default path.
             labels_path: Path to the labels JSON file. If None, uses default path.
+            cache_dir: Directory for downloaded files. Defaults to ``LARK_CACHE_DIR``
+                or ``~/.cache/lark``.
+            model_sha256: Expected SHA-256 of the weights file, checked on download.
+            allow_random_init: If False, raise instead of falling back to a
+                randomly initialized model when the weights are unavailable.
+            dtype: Compute precision ("float16", "bfloat16", "float32" or a torch
+                dtype). Defaults to the checkpoint's float16.
+            num_threads: If set, calls ``torch.set_num_threads`` (process-wide).
+            profile: Record per-stage timings, exposed through ``stats()``.
+            profile_callback: Called with each per-call timing record; implies
+                ``profile=True``.
+            metrics: Keep cumulative request, latency and batch-shape metrics,
+                exposed through ``metrics.snapshot()`` / ``metrics.to_prometheus()``.
+            regroup_decoder: Split batches after the boundary predictor and decode
+                rows in sub-batches of similar segment count.
+            prefilter: Resolve empty, digit/punctuation-only and single-label-script
+                texts without the model. ``True`` uses the default policy; pass a
+                ``Prefilter`` to configure it.
+            byte_budget: If set, caps every call's ``max_len`` at this many tokens
+                and represents longer texts by ``n_excerpts`` evenly spaced
+                excerpts aligned to UTF-8 character boundaries instead of the head.
+            n_excerpts: Number of excerpts in byte-budget mode.
+            buffer_pool: Serving mode: tokenize into preallocated input buffers
+                reused across calls instead of allocating new tensors per call.
+                ``True`` uses the default pool; pass an ``InputBufferPool`` to
+                configure buckets and size.
+            batch_planner: Split large text batches into sub-batches padded to
+                their own longest text whose estimated activation memory fits a
+                budget. ``True`` uses a 512 MB budget; pass a ``BatchPlanner``
+                to configure it.
+            cascade: Byte n-gram first stage (an ``NgramClassifier`` or the path
+                of one built with ``lark build-ngram``). Texts it predicts with
+                at least ``cascade_threshold`` confidence skip the transformer.
+            cascade_threshold: Confidence below which texts escalate to the
+                transformer.
+            early_exit: Intermediate exit heads (an ``ExitHeads`` or the path of
+                one trained with ``lark train-exits``). Each text stops at the
+                first exit whose confidence reaches ``exit_threshold``.
+            exit_threshold: Confidence at which a text leaves the model early.
+            result_cache: Persistent result cache (a ``ResultCache`` or a SQLite
+                file path) shared across runs and processes. Entries are keyed by
+                text, ``max_len`` and ``fingerprint()``, so other weights or
+                options never see them.
+            single_path: Run single-text calls (e.g. ``detect``) through an
+                unpadded, length-bucketed path with preallocated buffers and
+                captured graphs. ``True`` uses the default buckets; pass a
+                ``SingleTextPath`` to configure them.
+            prefix_cache: Cache the encoder states of frequently seen input
+                prefixes (templates, "RT @", quote headers) and encode only
+                the rest of each matching text. ``True`` uses a 64 MB cache;
+                pass a ``PrefixCache`` to configure it. Statistics are in
+                ``prefix_cache.stats()``.
         """
+        if num_threads is not None:
+            torch.set_num_threads(num_threads)
+        
         # Set default paths
         if model_path is None:
-            model_path = os.path.join(os.path.dirname(__file__), "..", "lark_epoch1.pth")
+            model_path = _default_path(MODEL_FILENAME, cache_dir)
         if labels_path is None:
-            labels_path = os.path.join(os.path.dirname(__file__), "..", "all_dataset_labels.json")
+            labels_path = _default_path(LABELS_FILENAME, cache_dir)
         
         # Download model and labels if they don't exist
         if not os.path.exists(model_path):
             print("🔍 Model file not found locally, downloading from HuggingFace...")
-            model_url = "https://hf-mirror.com/jiangchengchengNLP/Lark/resolve/main/lark_epoch1.pth"
-            if not download_from_huggingface(model_url, model_path):
+            model_url = f"{get_base_url()}/{MODEL_FILENAME}"
+            if not download_from_huggingface(model_url, model_path, sha256=model_sha256):
+                if not allow_random_init:
+                    raise FileNotFoundError("Model weights not found and download failed")
+                warnings.warn("Model weights unavailable, using randomly initialized model",
+                              RuntimeWarning)
                 print("⚠️ Using randomly initialized model")
         
         if not os.path.exists(labels_path):
             print("🔍 Labels file not found locally, downloading from HuggingFace...")
-            labels_url = "https://hf-mirror.com/jiangchengchengNLP/Lark/resolve/main/all_dataset_labels.json"
+            labels_url = f"{get_base_url()}/{LABELS_FILENAME}"
             if not download_from_huggingface(labels_url, labels_path):
                 raise FileNotFoundError("Labels file not found and download failed")
         
-        # Load model
-        self.model = LarkModel(
-            d_model=256, n_layers=4, n_heads=8, ff=512,
-            label_size=102, dropout=0.0, max_len=1024
-        )
+        self.model_path = model_path
+        self.labels_path = labels_path
         
-        # Load weights
+        # Load weights. Pruned variants (lark.prune) are saved as
+        # {"config": ..., "state_dict": ...} and rebuild their own structure.
+        state_dict = None
+        config = MODEL_CONFIG
+        load_error = None
         try:
             state_dict = torch.load(model_path, map_location='cpu')
-            self.model.load_state_dict(state_dict, strict=True)
-            print(f"✅ Model weights loaded successfully: {model_path}")
+            if isinstance(state_dict, dict) and "state_dict" in state_dict:
+                config = {**MODEL_CONFIG, **state_dict.get("config", {})}
+                state_dict = state_dict["state_dict"]
         except Exception as e:
-            print(f"⚠️ Weight loading failed: {e}")
+            load_error = e
+        
+        # Load model
+        self.model = LarkModel(**config)
+        if load_error is None:
+            try:
+                self.model.load_state_dict(state_dict, strict=True)
+                print(f"✅ Model weights loaded successfully: {model_path}")
+            except Exception as e:
+                load_error = e
+        if load_error is not None:
+            if not allow_random_init:
+                raise load_error
+            print(f"⚠️ Weight loading failed: {load_error}")
             print("Using randomly initialized model")
         
+        if dtype is not None:
+            if isinstance(dtype, str):
+                dtype = getattr(torch, dtype)
+            self.model.to(dtype)
+        self.model.regroup_decoder = regroup_decoder
         self.model.eval()
         
         # Load label mapping
@@ -98,7 +228,140 @@ class LarkDetector:
         
         print(f"✅ Number of labels: {len(self.id2label)}")
         print(f"✅ Model parameters: {sum(p.numel() for p in self.model.parameters()):,}")
+        
+        self.byte_budget = byte_budget
+        self.n_excerpts = n_excerpts
+        
+        if prefilter is True:
+            prefilter = Prefilter(self.label2id)
+        self.prefilter: Optional[Prefilter] = prefilter or None
+        if buffer_pool is True:
+            buffer_pool = InputBufferPool()
+        self.buffer_pool: Optional[InputBufferPool] = buffer_pool or None
+        if self.buffer_pool is not None and self.buffer_pool.pad_rows:
+            self.model.segment_multiple = self.buffer_pool.segment_multiple
+        if batch_planner is True:
+            batch_planner = BatchPlanner()
+        self.batch_planner: Optional[BatchPlanner] = (
+            batch_planner.bind(self.model) if batch_planner else None)
+        if isinstance(cascade, str):
+            cascade = NgramClassifier.load(cascade)
+        if cascade is not None and cascade.labels != all_labels:
+            raise ValueError("Cascade n-gram model was built for a different label set")
+        self.cascade: Optional[NgramClassifier] = cascade
+        self.cascade_threshold = cascade_threshold
+        if isinstance(early_exit, str):
+            early_exit = ExitHeads.load(early_exit)
+        if early_exit is not None:
+            early_exit.check(self.model)
+        self.early_exit: Optional[ExitHeads] = early_exit
+        self.exit_threshold = exit_threshold
+        if isinstance(result_cache, str):
+            result_cache = ResultCache(result_cache)
+        self.result_cache: Optional[ResultCache] = result_cache
+        if single_path is True:
+            single_path = SingleTextPath()
+        self.single_path: Optional[SingleTextPath] = (
+            single_path.bind(self.model) if single_path else None)
+        if prefix_cache is True:
+            prefix_cache = PrefixCache()
+        # An empty cache is falsy (it has __len__)
+        self.prefix_cache: Optional[PrefixCache] = (
+            prefix_cache if isinstance(prefix_cache, PrefixCache) else None)
+        self._weights_fingerprint: Optional[str] = None
+        # name -> (attached object, digest of its parameters)
+        self._component_digests: Dict[str, Tuple[object, str]] = {}
+        self.metrics: Optional[DetectorMetrics] = DetectorMetrics() if metrics else None
+        self.profiler: Optional[StageProfiler] = None
+        if profile or profile_callback is not None:
+            self.enable_profiling(profile_callback)
+    
+    def fingerprint(self) -> str:
+        """
+        Identify everything that determines this detector's results.
+        
+        Hashes the model weights (in their compute precision) and the options
+        that change predictions: byte budget, prefilter, cascade and early exits.
+        Used to namespace ``result_cache`` entries.
+        
+        Returns:
+            Hex SHA-256 digest
+        """
+        if self._weights_fingerprint is None:
+            h = hashlib.sha256()
+            for name, tensor in self.model.state_dict().items():
+                h.update(f"{name}:{tensor.dtype}:{tuple(tensor.shape)}".encode())
+                h.update(tensor.detach().contiguous().reshape(-1).view(torch.uint8).numpy().tobytes())
+            self._weights_fingerprint = h.hexdigest()
+        
+        h = hashlib.sha256(self._weights_fingerprint.encode())
+        h.update(repr((self.byte_budget, self.n_excerpts)).encode())
+        if self.prefilter is not None:
+            h.update(repr(("prefilter", self.prefilter.resolve_undefined, self.prefilter.resolve_scripts,
+                           self.prefilter.undefined_label, self.prefilter.script_confidence)).encode())
+        if self.cascade is not None:
+            h.update(repr(("cascade", self.cascade_threshold, self.cascade.orders,
+                           self.cascade.max_bytes)).encode())
+            h.update(self._component_digest("cascade", self.cascade, lambda: (
+                self.cascade.weights.numpy(), self.cascade.bias.numpy())).encode())
+        if self.early_exit is not None:
+            h.update(repr(("early_exit", self.exit_threshold)).encode())
+            h.update(self._component_digest("early_exit", self.early_exit, lambda: [
+                tensor.detach().contiguous().numpy() for tensor in self.early_exit.state_dict().values()
+            ]).encode())
+        return h.hexdigest()
+    
+    def _component_digest(self, name: str, component: object,
+                          arrays: Callable[[], Sequence[np.ndarray]]) -> str:
+        """Digest of an attached component's parameters, hashed once per attached object."""
+        cached = self._component_digests.get(name)
+        if cached is not None and cached[0] is component:
+            return cached[1]
+        h = hashlib.sha256()
+        for array in arrays():
+            h.update(np.ascontiguousarray(array).tobytes())
+        digest = h.hexdigest()
+        self._component_digests[name] = (component, digest)
+        return digest
+    
+    def enable_profiling(self, callback: Optional[Callable[[Dict], None]] = None) -> StageProfiler:
+        """
+        Start recording per-stage timings for every inference call.
+        
+        Calls are timed on the path they take in production: single texts on
+        the single-text path (``encoder`` there includes the boundary logits)
+        and, with a prefix cache, each group of texts sharing a cached prefix
+        as its own record with ``prefix_len`` set and only the suffix counted
+        in the byte totals.
+        
+        Args:
+            callback: Optional function called with each per-call record
+            
+        Returns:
+            The attached ``StageProfiler``
+        """
+        self.profiler = StageProfiler(callback=callback)
+        self.model.profiler = self.profiler
+        return self.profiler
+    
+    def disable_profiling(self):
+        """Stop recording timings and detach the profiler."""
+        self.profiler = None
+        self.model.profiler = None
     
+    def stats(self) -> Dict:
+        """
+        Get aggregated per-stage timing statistics.
+        
+        Returns:
+            Dict from ``StageProfiler.stats()``, or an empty dict if profiling
+            is disabled
+        """
+        if self.profiler is None:
+            return {}
+        return self.profiler.stats()
+    
+    @track("detect")
     def detect(self, text: str, max_len: int = 1024) -> Tuple[str, float]:
         """
         Detect language for a single text.
@@ -114,24 +377,234 @@ class LarkDetector:
         confidence = probabilities[0].max().item()
         return predictions[0], confidence
     
-    def detect_batch(self, texts: List[str], max_len: int = 1024) -> List[Tuple[str, float]]:
+    @track("detect_batch")
+    def detect_batch(self, texts: List[str], max_len: int = 1024, return_embeddings: bool = False,
+                     pooling: str = "cls"):
         """
         Batch language detection for multiple texts.
         
         Args:
             texts: List of input text strings
             max_len: Maximum sequence length
+            return_embeddings: Also return text vectors from the same forward
+                pass (see ``embed_batch``). Every text then runs through the full
+                model: the prefilter, cascade, early exits and result cache are
+                bypassed.
+            pooling: Vectors returned with ``return_embeddings``: "cls",
+                "encoder" or "both" (see ``embed_batch``)
             
         Returns:
-            List of tuples (detected_language, confidence_score) for each text
+            List of tuples (detected_language, confidence_score) for each text;
+            with ``return_embeddings``, a tuple of that list and the float32
+            embedding array
         """
+        if return_embeddings:
+            predictions, probabilities, embeddings = self._embedding_predict_batch(texts, max_len, pooling)
+            confidences = probabilities.max(dim=-1).values.tolist()
+            return list(zip(predictions, confidences)), embeddings
         predictions, probabilities = self._predict_batch(texts, max_len)
-        results = []
-        for pred, prob in zip(predictions, probabilities):
-            confidence = prob.max().item()
-            results.append((pred, confidence))
-        return results
+        confidences = probabilities.max(dim=-1).values.tolist()
+        return list(zip(predictions, confidences))
+    
+    @track("embed_batch")
+    def embed_batch(self, texts: List[str], max_len: int = 1024, pooling: str = "cls") -> np.ndarray:
+        """
+        Text vectors for clustering and deduplication.
+        
+        Args:
+            texts: List of input text strings
+            max_len: Maximum sequence length
+            pooling: "cls" for the decoder's CLS vector (the input of the
+                classification head), "encoder" for the mean of the
+                ``ByteEncoder`` states over the text's bytes, or "both" for
+                the two concatenated (CLS first)
+            
+        Returns:
+            C-contiguous float32 array [B, d_model] ([B, 2 * d_model] for "both")
+        """
+        return self._embedding_predict_batch(texts, max_len, pooling)[2]
+    
+    @track("detect_batch_with_depth")
+    def detect_batch_with_depth(self, texts: List[str], max_len: int = 1024) -> List[Tuple[str, float, int]]:
+        """
+        Batch language detection reporting how deep each text went.
+        
+        Texts go straight to the model (no prefilter, cascade or batch planner).
+        
+        Args:
+            texts: List of input text strings
+            max_len: Maximum sequence length
+            
+        Returns:
+            List of tuples (detected_language, confidence_score, exit_depth), where
+            exit_depth is the number of transformer layers the text ran through
+            (encoder plus decoder layers when it did not exit early)
+        """
+        if not texts:
+            return []
+        token_ids, pad_mask = batch_tokenize(texts, **self._tokenize_options(max_len))
+        if self.metrics is not None:
+            self.metrics.record_batch(pad_mask)
+        logits, depth = self._forward(token_ids, pad_mask)
+        predictions, probabilities = self._postprocess(logits)
+        if depth is None:
+            depth = torch.full((len(texts),), len(self.model.encoder.encoder.layers)
+                               + len(self.model.decoder.transformer_layers))
+        confidences = probabilities.max(dim=-1).values.tolist()
+        return list(zip(predictions, confidences, depth.tolist()))
+    
+    @track("detect_batch_arrays")
+    def detect_batch_arrays(self, texts: List[str], confidence_threshold: float = 0.5,
+                            max_len: int = 1024) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Batch language detection returning dense NumPy arrays.
+        
+        Args:
+            texts: List of input text strings
+            confidence_threshold: Confidence below which a row is marked unknown
+            max_len: Maximum sequence length
+            
+        Returns:
+            Tuple of (label_ids, confidences, unknown_mask) with shapes [B], [B], [B].
+            Label ids index ``id2label``; rows with no prediction (e.g. undefined
+            texts resolved by the prefilter) have id -1 and confidence 0.
+        """
+        label_ids, probs, unknown = self.detect_topk_batch(texts, k=1,
+                                                           confidence_threshold=confidence_threshold,
+                                                           max_len=max_len)
+        return label_ids[:, 0], probs[:, 0], unknown
+    
+    @track("detect_topk_batch")
+    def detect_topk_batch(self, texts: List[str], k: int = 5, confidence_threshold: float = 0.5,
+                          max_len: int = 1024) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Batched top-k predictions as dense NumPy arrays.
+        
+        Args:
+            texts: List of input text strings
+            k: Number of top predictions per text
+            confidence_threshold: Top-1 probability below which a row is marked unknown
+            max_len: Maximum sequence length
+            
+        Returns:
+            Tuple of (label_ids, probabilities, unknown_mask):
+            int64 [B, k] label ids (-1 for the empty candidates of rows the
+            prefilter resolved), float32 [B, k] probabilities in descending
+            order, and bool [B]. Model rows always rank k real labels, even
+            where a tail probability underflowed to 0 in reduced precision.
+        """
+        _, probabilities = self._predict_batch(texts, max_len)
+        top_probs, top_ids = torch.topk(probabilities.float(), k=min(k, probabilities.shape[-1]), dim=-1)
+        label_ids = top_ids.numpy()
+        probs = top_probs.numpy()
+        if self.prefilter is not None:
+            # Classified again rather than threaded through, so result-cache hits are
+            # covered too; not counted, as the batch was already counted (or cached)
+            resolved = self.prefilter.classify(texts, count=False) != TO_MODEL
+            label_ids[resolved[:, None] & (probs <= 0)] = -1
+        unknown = probs[:, 0] < confidence_threshold
+        return label_ids, probs, unknown
+    
+    @track("detect_bytes")
+    def detect_bytes(self, payload: BytesLike, max_len: int = 1024) -> Tuple[str, float]:
+        """
+        Detect language for a single UTF-8 payload without decoding it.
+        
+        Args:
+            payload: ``bytes``, ``bytearray`` or ``memoryview`` holding UTF-8 text
+            max_len: Maximum sequence length
+            
+        Returns:
+            Tuple of (detected_language, confidence_score)
+        """
+        return self.detect_bytes_batch([payload], max_len=max_len)[0]
+    
+    @track("detect_bytes_batch")
+    def detect_bytes_batch(self, payloads: List[BytesLike], max_len: int = 1024) -> List[Tuple[str, float]]:
+        """
+        Batch language detection for UTF-8 payloads without decoding them.
+        
+        The payloads are joined into one buffer and tokenized with
+        ``tokenize_buffer``; the prefilter is not applied on this path.
+        
+        Args:
+            payloads: List of ``bytes``, ``bytearray`` or ``memoryview`` objects
+            max_len: Maximum sequence length
+            
+        Returns:
+            List of tuples (detected_language, confidence_score) for each payload
+        """
+        data, offsets = self._join(payloads)
+        predictions, probabilities = self._predict_buffer(data, offsets, max_len)
+        confidences = probabilities.max(dim=-1).values.tolist()
+        return list(zip(predictions, confidences))
+    
+    @track("detect_tokens")
+    def detect_tokens(self, token_ids, pad_mask) -> List[Tuple[str, float]]:
+        """
+        Batch language detection for a pre-tokenized batch.
+        
+        Lets callers run their own tokenization pipeline. The layout must match
+        ``batch_tokenize``: ``START_BYTE`` + UTF-8 bytes + ``END_BYTE``, padded
+        with ``PAD_BYTE``.
+        
+        Args:
+            token_ids: [B, L] integer tensor or array of byte ids (0-258)
+            pad_mask: [B, L] tensor or array, 1 = valid, 0 = padding
+            
+        Returns:
+            List of tuples (detected_language, confidence_score) for each row
+        """
+        token_ids = torch.as_tensor(token_ids, dtype=torch.long)
+        pad_mask = torch.as_tensor(pad_mask, dtype=torch.float32)
+        if token_ids.dim() != 2 or token_ids.shape != pad_mask.shape:
+            raise ValueError(f"Expected matching [B, L] token_ids and pad_mask, got "
+                             f"{tuple(token_ids.shape)} and {tuple(pad_mask.shape)}")
+        max_positions = self.model.encoder.pos_emb.shape[1]
+        if token_ids.shape[1] > max_positions:
+            raise ValueError(f"Sequence length {token_ids.shape[1]} exceeds model max_len {max_positions}")
+        if token_ids.numel() and (token_ids.min() < 0 or token_ids.max() >= VOCAB_SIZE):
+            raise ValueError(f"Token ids must be in [0, {VOCAB_SIZE})")
+        predictions, probabilities = self._predict_tokenized(lambda: (token_ids, pad_mask))
+        confidences = probabilities.max(dim=-1).values.tolist()
+        return list(zip(predictions, confidences))
+    
+    @track("detect_arrow")
+    def detect_arrow(self, array, max_len: int = 1024, batch_size: int = 256):
+        """
+        Language detection for an Arrow string column without per-row ``str`` objects.
+        
+        Token matrices are built directly from the Arrow offsets and data
+        buffers. The prefilter is not applied on this path.
+        
+        Args:
+            array: ``pyarrow`` string / large_string array or chunked array
+            max_len: Maximum sequence length
+            batch_size: Rows per forward pass
+            
+        Returns:
+            ``pyarrow.StructArray`` with ``language`` and ``confidence`` fields
+        """
+        from .arrow import detect_arrow
+        return detect_arrow(self, array, max_len=max_len, batch_size=batch_size)
     
+    @track("detect_series")
+    def detect_series(self, series, max_len: int = 1024, batch_size: int = 256):
+        """
+        Language detection for a pandas Series of strings.
+        
+        Args:
+            series: ``pandas.Series`` of strings (Arrow-backed series avoid a copy)
+            max_len: Maximum sequence length
+            batch_size: Rows per forward pass
+            
+        Returns:
+            ``pandas.DataFrame`` with ``language`` and ``confidence`` columns
+        """
+        from .arrow import detect_series
+        return detect_series(self, series, max_len=max_len, batch_size=batch_size)
+    
+    @track("detect_with_topk")
     def detect_with_topk(self, text: str, k: int = 5, max_len: int = 1024) -> Tuple[str, float, List[Dict]]:
         """
         Get top-k language predictions with probabilities.
@@ -158,6 +631,7 @@ class LarkDetector:
         
         return predictions[0], probabilities[0].max().item(), top_k
     
+    @track("detect_with_confidence")
     def detect_with_confidence(self, text: str, confidence_threshold: float = 0.5, 
                              max_len: int = 1024) -> Tuple[str, float, List[Dict]]:
         """
@@ -199,13 +673,388 @@ class LarkDetector:
         Returns:
             Tuple of (predictions, probabilities)
         """
-        # Tokenize
-        token_ids, pad_mask = batch_tokenize(texts, max_len=max_len)
+        if self.result_cache is not None and texts:
+            return self._cached_predict_batch(texts, max_len)
+        return self._pipeline_predict_batch(texts, max_len)
+    
+    def _pipeline_predict_batch(self, texts: List[str], max_len: int = 1024) -> Tuple[List[str], torch.Tensor]:
+        """Run the prefilter, if any, then the cascade and the model."""
+        if self.prefilter is not None:
+            return self._prefiltered_predict_batch(texts, max_len)
+        return self._model_predict_batch(texts, max_len)
+    
+    def _cached_predict_batch(self, texts: List[str], max_len: int = 1024) -> Tuple[List[str], torch.Tensor]:
+        """Serve texts from the result cache and compute (once per distinct text) the rest."""
+        keys = make_keys(self.fingerprint(), self._tokenize_options(max_len)["max_len"], texts)
+        found = self.result_cache.get_many(keys)
+        missing: Dict[bytes, int] = {}
+        for i, key in enumerate(keys):
+            if key not in found:
+                missing.setdefault(key, i)
+        if self.metrics is not None:
+            misses = sum(key not in found for key in keys)
+            self.metrics.record_cache("results", len(texts) - misses, misses)
+        
+        if missing:
+            rows = list(missing.values())
+            predictions, probabilities = self._pipeline_predict_batch([texts[i] for i in rows], max_len)
+            probabilities = probabilities.float().numpy()
+            computed = [(keys[i], prediction, probabilities[j].tobytes())
+                        for j, (i, prediction) in enumerate(zip(rows, predictions))]
+            self.result_cache.put_many(computed)
+            found.update((key, (label, blob)) for key, label, blob in computed)
+        
+        entries = [found[key] for key in keys]
+        probabilities = np.frombuffer(b"".join(blob for _, blob in entries), dtype=np.float32)
+        return ([label for label, _ in entries],
+                torch.from_numpy(probabilities.reshape(len(texts), -1).copy()))
+    
+    def _prefiltered_predict_batch(self, texts: List[str], max_len: int = 1024) -> Tuple[List[str], torch.Tensor]:
+        """Resolve trivial texts with the prefilter and run the model on the rest."""
+        decisions = self.prefilter.classify(texts)
+        model_rows = np.flatnonzero(decisions == TO_MODEL)
+        undefined_rows = np.flatnonzero(decisions == UNDEFINED)
+        script_rows = np.flatnonzero(decisions >= 0)
+        if self.metrics is not None:
+            self.metrics.increment("prefilter_undefined", len(undefined_rows))
+            self.metrics.increment("prefilter_script", len(script_rows))
+            self.metrics.increment("prefilter_model", len(model_rows))
+        if len(model_rows) == len(texts):
+            return self._model_predict_batch(texts, max_len)
+        
+        predictions: List[str] = [self.prefilter.undefined_label] * len(texts)
+        probabilities = torch.zeros(len(texts), len(self.id2label))
+        if len(model_rows):
+            model_preds, model_probs = self._model_predict_batch(
+                [texts[i] for i in model_rows.tolist()], max_len)
+            probabilities = probabilities.to(model_probs.dtype)
+            probabilities[torch.from_numpy(model_rows)] = model_probs
+            for i, pred in zip(model_rows.tolist(), model_preds):
+                predictions[i] = pred
+        
+        script_labels = decisions[script_rows]
+        probabilities[torch.from_numpy(script_rows), torch.from_numpy(script_labels)] = \
+            self.prefilter.script_confidence
+        for i, label_id in zip(script_rows.tolist(), script_labels.tolist()):
+            predictions[i] = self.id2label[label_id]
+        return predictions, probabilities
+    
+    def _model_predict_batch(self, texts: List[str], max_len: int = 1024) -> Tuple[List[str], torch.Tensor]:
+        """Run the cascade's n-gram stage, if any, then the transformer on all ``texts``."""
+        if self.cascade is not None and texts:
+            return self._cascaded_predict_batch(texts, max_len)
+        return self._transformer_predict_batch(texts, max_len)
+    
+    def _cascaded_predict_batch(self, texts: List[str], max_len: int = 1024) -> Tuple[List[str], torch.Tensor]:
+        """Keep confident n-gram predictions and escalate the rest to the transformer."""
+        probabilities = self.cascade.predict_proba(texts)
+        confidence, preds = probabilities.max(dim=-1)
+        escalated = np.flatnonzero((confidence < self.cascade_threshold).numpy())
+        if self.metrics is not None:
+            self.metrics.increment("cascade_ngram", len(texts) - len(escalated))
+            self.metrics.increment("cascade_escalated", len(escalated))
         
-        # Inference
+        id2label = self.id2label
+        predictions = [id2label[p] for p in preds.tolist()]
+        if len(escalated):
+            model_preds, model_probs = self._transformer_predict_batch(
+                [texts[i] for i in escalated.tolist()], max_len)
+            probabilities = probabilities.to(model_probs.dtype)
+            probabilities[torch.from_numpy(escalated)] = model_probs
+            for i, pred in zip(escalated.tolist(), model_preds):
+                predictions[i] = pred
+        return predictions, probabilities
+    
+    def _transformer_predict_batch(self, texts: List[str], max_len: int = 1024) -> Tuple[List[str], torch.Tensor]:
+        """Run tokenization and the model on all ``texts``."""
+        if self.batch_planner is not None and texts:
+            return self._planned_predict_batch(texts, max_len)
+        return self._tokenize_and_predict(texts, max_len)
+    
+    def _planned_predict_batch(self, texts: List[str], max_len: int = 1024) -> Tuple[List[str], torch.Tensor]:
+        """Run the model on budget-sized sub-batches and restore the input order."""
+        cap = self._tokenize_options(max_len)["max_len"]
+        byte_lengths = [len(text.encode("utf-8")) for text in texts]
+        plan = self.batch_planner.plan(byte_lengths, cap)
+        if self.metrics is not None:
+            self.metrics.increment("planned_sub_batches", len(plan))
+        
+        predictions: List[str] = [""] * len(texts)
+        probabilities = None
+        for rows, seq_len in plan:
+            sub_predictions, sub_probabilities = self._tokenize_and_predict(
+                [texts[i] for i in rows], int(seq_len))
+            if probabilities is None:
+                probabilities = sub_probabilities.new_empty(len(texts), sub_probabilities.shape[-1])
+            probabilities[torch.from_numpy(rows)] = sub_probabilities
+            for i, prediction in zip(rows.tolist(), sub_predictions):
+                predictions[i] = prediction
+        return predictions, probabilities
+    
+    def _embedding_predict_batch(self, texts: List[str], max_len: int, pooling: str
+                                 ) -> Tuple[List[str], torch.Tensor, np.ndarray]:
+        """Predictions, probabilities and embeddings of ``texts`` from full-model passes."""
+        if pooling not in EMBEDDING_POOLINGS:
+            raise ValueError(f"pooling must be one of {EMBEDDING_POOLINGS}, got {pooling!r}")
+        dim = self.model.config["d_model"] * (2 if pooling == "both" else 1)
+        if not texts:
+            return [], torch.empty(0, len(self.id2label)), np.empty((0, dim), dtype=np.float32)
+        if self.batch_planner is None:
+            return self._tokenize_and_embed(texts, max_len, pooling)
+        
+        cap = self._tokenize_options(max_len)["max_len"]
+        plan = self.batch_planner.plan([len(text.encode("utf-8")) for text in texts], cap)
+        if self.metrics is not None:
+            self.metrics.increment("planned_sub_batches", len(plan))
+        predictions: List[str] = [""] * len(texts)
+        probabilities = None
+        embeddings = np.empty((len(texts), dim), dtype=np.float32)
+        for rows, seq_len in plan:
+            sub_predictions, sub_probabilities, embeddings[rows] = self._tokenize_and_embed(
+                [texts[i] for i in rows], int(seq_len), pooling)
+            if probabilities is None:
+                probabilities = sub_probabilities.new_empty(len(texts), sub_probabilities.shape[-1])
+            probabilities[torch.from_numpy(rows)] = sub_probabilities
+            for i, prediction in zip(rows.tolist(), sub_predictions):
+                predictions[i] = prediction
+        return predictions, probabilities, embeddings
+    
+    def _tokenize_and_embed(self, texts: List[str], max_len: int, pooling: str
+                            ) -> Tuple[List[str], torch.Tensor, np.ndarray]:
+        """One forward pass returning labels and the requested vectors."""
+        token_ids, pad_mask = batch_tokenize(texts, **self._tokenize_options(max_len))
+        if self.metrics is not None:
+            self.metrics.record_batch(pad_mask)
         with torch.no_grad():
-            logits = self.model(token_ids, pad_mask)
+            logits, cls_embedding, encoder_pooled = self.model(token_ids, pad_mask, return_embeddings=True)
+        predictions, probabilities = self._postprocess(logits)
+        parts = {"cls": [cls_embedding], "encoder": [encoder_pooled],
+                 "both": [cls_embedding, encoder_pooled]}[pooling]
+        embeddings = torch.cat([part.float() for part in parts], dim=-1)
+        return predictions, probabilities, np.ascontiguousarray(embeddings.numpy())
+    
+    def _tokenize_and_predict(self, texts: List[str], max_len: int) -> Tuple[List[str], torch.Tensor]:
+        """Tokenize ``texts`` into one batch and run the model on it."""
+        if self.prefix_cache is not None and self.early_exit is None:
+            return self._prefix_predict_batch(texts, max_len)
+        return self._tokenize_and_run(texts, max_len)
+    
+    def _tokenize_and_run(self, texts: List[str], max_len: int) -> Tuple[List[str], torch.Tensor]:
+        """Run ``texts`` through the single-text path, the buffer pool or one padded batch."""
+        if len(texts) == 1 and self.single_path is not None and self.early_exit is None:
+            return self._predict_single(texts[0], max_len)
+        if self.buffer_pool is not None:
+            data, offsets = self._join([text.encode("utf-8") for text in texts])
+            return self._predict_buffer(data, offsets, max_len)
+        return self._predict_tokenized(
+            lambda: batch_tokenize(texts, **self._tokenize_options(max_len)))
+    
+    def _prefix_predict_batch(self, texts: List[str], max_len: int) -> Tuple[List[str], torch.Tensor]:
+        """Encode only the suffix of texts with a cached prefix; the others take the usual path."""
+        cache = self.prefix_cache
+        options = self._tokenize_options(max_len)
+        token_lists = [tokenize_one(text, **options) for text in texts]
+        groups: Dict[Tuple[int, ...], Tuple[PrefixState, List[int]]] = {}
+        misses: List[int] = []
+        for i, tokens in enumerate(token_lists):
+            frequent = cache.observe(tokens)
+            state = cache.lookup(tokens)
+            # Only cache a longer prefix when it saves at least min_prefix more tokens
+            if frequent and (state is None or frequent - state.length >= cache.min_prefix):
+                state = self._admit_prefix(tokens[:frequent])
+            if state is None:
+                misses.append(i)
+            else:
+                groups.setdefault(state.tokens, (state, []))[1].append(i)
+        
+        predictions: List[str] = [""] * len(texts)
+        probabilities = None
+        parts = [(misses, self._tokenize_and_run([texts[i] for i in misses], max_len))] if misses else []
+        parts += [(rows, self._predict_suffixes(state, [token_lists[i] for i in rows]))
+                  for state, rows in groups.values()]
+        for rows, (sub_predictions, sub_probabilities) in parts:
+            # The single-text path returns float32 even under a reduced-precision model
+            if probabilities is None:
+                probabilities = torch.empty(len(texts), sub_probabilities.shape[-1])
+            probabilities[torch.tensor(rows)] = sub_probabilities.float()
+            for i, prediction in zip(rows, sub_predictions):
+                predictions[i] = prediction
+        
+        hits = len(texts) - len(misses)
+        saved = sum(state.length * len(rows) for state, rows in groups.values())
+        cache.record(hits, len(texts), saved, sum(map(len, token_lists)) - saved)
+        if self.metrics is not None:
+            self.metrics.record_cache("prefixes", hits, len(misses))
+            self.metrics.increment("prefix_bytes_saved", saved)
+        return predictions, probabilities
+    
+    def _admit_prefix(self, tokens: List[int]) -> PrefixState:
+        """Encode a frequent prefix once and store its state."""
+        token_ids = torch.tensor([tokens], dtype=torch.long)
+        with torch.no_grad():
+            hidden, keys, values = encode_with_prefix(self.model.encoder, token_ids,
+                                                      torch.ones_like(token_ids))
+        state = PrefixState(tuple(tokens), [k[0] for k in keys], [v[0] for v in values], hidden[0])
+        self.prefix_cache.insert(state)
+        return state
+    
+    def _predict_suffixes(self, state: PrefixState, token_lists: List[List[int]]
+                          ) -> Tuple[List[str], torch.Tensor]:
+        """Encode the suffixes after a shared cached prefix and run the rest of the model."""
+        P = state.length
+        suffixes = [tokens[P:] for tokens in token_lists]
+        token_ids = torch.full((len(suffixes), max(map(len, suffixes))), PAD_BYTE, dtype=torch.long)
+        suffix_mask = torch.zeros(token_ids.shape)
+        for row, suffix in enumerate(suffixes):
+            token_ids[row, :len(suffix)] = torch.tensor(suffix, dtype=torch.long)
+            suffix_mask[row, :len(suffix)] = 1
+        if self.metrics is not None:
+            self.metrics.record_batch(suffix_mask)
+        
+        B = len(suffixes)
+        prof = self.profiler
+        if prof is None:
+            with torch.no_grad():
+                hidden, _, _ = encode_with_prefix(self.model.encoder, token_ids, suffix_mask, state)
+                hidden = torch.cat([state.hidden.expand(B, -1, -1), hidden], dim=1)
+                pad_mask = torch.cat([torch.ones(B, P), suffix_mask], dim=1)
+                logits = self.model.decode_hidden(hidden, pad_mask)
+            return self._postprocess(logits)
+        
+        # Only the suffix positions are encoded, so only they count as real/padded bytes
+        prof.begin(prefix_len=P)
+        try:
+            prof.annotate(batch_size=B, seq_len=P + token_ids.shape[1],
+                          real_bytes=int(suffix_mask.sum().item()), padded_bytes=token_ids.numel())
+            with torch.no_grad():
+                with prof.stage("encoder"):
+                    hidden, _, _ = encode_with_prefix(self.model.encoder, token_ids, suffix_mask, state)
+                    hidden = torch.cat([state.hidden.expand(B, -1, -1), hidden], dim=1)
+                pad_mask = torch.cat([torch.ones(B, P), suffix_mask], dim=1)
+                logits = self.model.decode_hidden(hidden, pad_mask)
+            with prof.stage("postprocess"):
+                return self._postprocess(logits)
+        finally:
+            prof.end()
+    
+    def _predict_single(self, text: str, max_len: int) -> Tuple[List[str], torch.Tensor]:
+        """Run one text through the unpadded single-text path."""
+        prof = self.profiler
+        if prof is not None:
+            prof.begin(single_path=True)
+        try:
+            if prof is None:
+                token_ids = tokenize_one(text, **self._tokenize_options(max_len))
+            else:
+                with prof.stage("tokenize"):
+                    token_ids = tokenize_one(text, **self._tokenize_options(max_len))
+            if self.metrics is not None:
+                # The encoder runs on the whole length bucket
+                pad_mask = torch.zeros(1, self.single_path.bucket_for(len(token_ids)))
+                pad_mask[0, :len(token_ids)] = 1
+                self.metrics.increment("single_path")
+                self.metrics.record_batch(pad_mask)
+            logits = self.single_path.logits(token_ids, profiler=prof).unsqueeze(0)
+            if prof is None:
+                return self._postprocess(logits)
+            with prof.stage("postprocess"):
+                return self._postprocess(logits)
+        finally:
+            if prof is not None:
+                prof.end()
+    
+    @staticmethod
+    def _join(payloads: List[BytesLike]) -> Tuple[np.ndarray, np.ndarray]:
+        """Join UTF-8 payloads into one uint8 buffer plus int64 offsets."""
+        lengths = [memoryview(p).nbytes for p in payloads]
+        data = np.frombuffer(b"".join(payloads), dtype=np.uint8)
+        offsets = np.zeros(len(payloads) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return data, offsets
+    
+    def _predict_buffer(self, data: np.ndarray, offsets: np.ndarray, max_len: int,
+                        rows: Optional[np.ndarray] = None) -> Tuple[List[str], torch.Tensor]:
+        """Tokenize rows of a joined byte buffer, into pooled buffers if enabled, and predict."""
+        options = self._tokenize_options(max_len)
+        pool = self.buffer_pool
+        if pool is None:
+            return self._predict_tokenized(
+                lambda: tokenize_buffer(data, offsets, rows=rows, **options))
         
+        batch_size = len(offsets) - 1 if rows is None else len(rows)
+        buffers, hit = pool.acquire(batch_size, options["max_len"])
+        if self.metrics is not None:
+            self.metrics.record_cache("input_buffers", int(hit), int(not hit))
+        try:
+            if not pool.pad_rows:
+                return self._predict_tokenized(
+                    lambda: tokenize_buffer(data, offsets, rows=rows, out=buffers, **options))
+            
+            def tokenize():
+                tokenize_buffer(data, offsets, rows=rows, out=buffers, **options)
+                return pool.fill_unused(buffers, batch_size)
+            
+            predictions, probabilities = self._predict_tokenized(tokenize)
+            return predictions[:batch_size], probabilities[:batch_size]
+        finally:
+            pool.release(buffers)
+    
+    def _tokenize_options(self, max_len: int) -> Dict:
+        """Tokenizer arguments for ``max_len`` under the configured byte budget."""
+        if self.byte_budget is None:
+            return {"max_len": max_len}
+        return {"max_len": min(max_len, self.byte_budget), "truncation": "excerpts",
+                "n_excerpts": self.n_excerpts}
+    
+    def _predict_tokenized(self, tokenize: Callable[[], Tuple[torch.Tensor, torch.Tensor]]
+                           ) -> Tuple[List[str], torch.Tensor]:
+        """Run ``tokenize`` and the model, timing both stages when profiling."""
+        prof = self.profiler
+        if prof is None:
+            token_ids, pad_mask = tokenize()
+            return self._predict_tokens(token_ids, pad_mask)
+        
+        prof.begin()
+        try:
+            with prof.stage("tokenize"):
+                token_ids, pad_mask = tokenize()
+            return self._predict_tokens(token_ids, pad_mask)
+        finally:
+            prof.end()
+    
+    def _predict_tokens(self, token_ids: torch.Tensor, pad_mask: torch.Tensor) -> Tuple[List[str], torch.Tensor]:
+        """Run the model on an already tokenized batch."""
+        if self.metrics is not None:
+            self.metrics.record_batch(pad_mask)
+        
+        prof = self.profiler
+        if prof is None:
+            # Inference
+            logits, _ = self._forward(token_ids, pad_mask)
+            return self._postprocess(logits)
+        
+        prof.annotate(batch_size=token_ids.shape[0], seq_len=token_ids.shape[1],
+                      real_bytes=int(pad_mask.sum().item()),
+                      padded_bytes=token_ids.numel())
+        logits, _ = self._forward(token_ids, pad_mask)
+        with prof.stage("postprocess"):
+            return self._postprocess(logits)
+    
+    def _forward(self, token_ids: torch.Tensor, pad_mask: torch.Tensor
+                 ) -> Tuple[torch.Tensor, Optional[torch.Tensor]]:
+        """Model logits, through the early exits when configured, and per-row exit depths."""
+        if self.early_exit is None:
+            with torch.no_grad():
+                return self.model(token_ids, pad_mask), None
+        logits, depth = early_exit_forward(self.model, self.early_exit, token_ids, pad_mask,
+                                           self.exit_threshold)
+        if self.metrics is not None:
+            for value, count in zip(*torch.unique(depth, return_counts=True)):
+                self.metrics.increment(f"exit_depth_{int(value)}", int(count))
+        return logits, depth
+    
+    def _postprocess(self, logits: torch.Tensor) -> Tuple[List[str], torch.Tensor]:
+        """Convert model logits to label predictions and probabilities."""
         # Process output
         if logits.dim() == 3:  
             cls_logits = logits[:, 0, :]     # [B, label_size]
@@ -217,25 +1066,115 @@ class LarkDetector:
         
         # Get predictions
         preds = torch.argmax(cls_logits, dim=-1)
-        predictions = [self.id2label[int(p.item())] for p in preds]
+        id2label = self.id2label
+        predictions = [id2label[p] for p in preds.tolist()]
         
         return predictions, probabilities
 
 
-# Convenience function for quick usage
-def detect_language(text: str, model_path: Optional[str] = None) -> Tuple[str, float]:
+class DetectorRegistry:
+    """
+    Thread-safe cache of shared ``LarkDetector`` instances.
+    
+    Detectors are keyed by model path and constructor options, so repeated
+    convenience calls reuse already loaded weights instead of rebuilding
+    the model every time.
+    """
+    
+    def __init__(self):
+        self._detectors: Dict[tuple, LarkDetector] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(model_path: Optional[str], options: Dict) -> tuple:
+        if model_path is not None:
+            model_path = os.path.abspath(model_path)
+        return (model_path, tuple(sorted(options.items())))
+    
+    def get(self, model_path: Optional[str] = None, **options) -> "LarkDetector":
+        """
+        Return the shared detector for ``model_path`` and ``options``, creating it once.
+        
+        Args:
+            model_path: Optional path to model weights
+            **options: Additional ``LarkDetector`` keyword arguments
+            
+        Returns:
+            Shared ``LarkDetector`` instance
+        """
+        key = self._key(model_path, options)
+        detector = self._detectors.get(key)
+        if detector is None:
+            with self._lock:
+                detector = self._detectors.get(key)
+                if detector is None:
+                    detector = LarkDetector(model_path=model_path, **options)
+                    self._detectors[key] = detector
+        return detector
+    
+    def preload(self, model_path: Optional[str] = None, **options) -> "LarkDetector":
+        """Load a detector ahead of time, e.g. when a server boots."""
+        return self.get(model_path, **options)
+    
+    def clear(self):
+        """Drop all cached detectors so the next call reloads them."""
+        with self._lock:
+            self._detectors.clear()
+    
+    def __len__(self) -> int:
+        return len(self._detectors)
+
+
+default_registry = DetectorRegistry()
+
+
+def get_detector(model_path: Optional[str] = None, **options) -> LarkDetector:
+    """
+    Get the process-wide shared detector for the given model and options.
+    
+    Args:
+        model_path: Optional path to model weights
+        **options: Additional ``LarkDetector`` keyword arguments
+        
+    Returns:
+        Shared ``LarkDetector`` instance
+    """
+    return default_registry.get(model_path, **options)
+
+
+# Convenience functions for quick usage
+def detect_language(text: str, model_path: Optional[str] = None, **options) -> Tuple[str, float]:
     """
     Convenience function for quick language detection.
     
+    Uses the shared detector from ``default_registry``, so only the first
+    call pays for loading the model.
+    
     Args:
         text: Input text string
         model_path: Optional path to model weights
+        **options: Additional ``LarkDetector`` keyword arguments
         
     Returns:
         Tuple of (detected_language, confidence_score)
     """
-    detector = LarkDetector(model_path=model_path)
-    return detector.detect(text)
+    return get_detector(model_path, **options).detect(text)
+
+
+def detect_languages(texts: List[str], model_path: Optional[str] = None,
+                     **options) -> List[Tuple[str, float]]:
+    """
+    Convenience function for batch language detection.
+    
+    Args:
+        texts: List of input text strings
+        model_path: Optional path to model weights
+        **options: Additional ``LarkDetector`` keyword arguments
+        
+    Returns:
+        List of tuples (detected_language, confidence_score) for each text
+    """
+    return get_detector(model_path, **options).detect_batch(texts)
 
 
 # Example usage
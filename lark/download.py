@@ -0,0 +1,232 @@
+"""
+Model file download and cache management
+"""
+
+import hashlib
+import os
+import time
+from typing import Optional
+
+import requests
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+
+DEFAULT_BASE_URL = "https://hf-mirror.com/jiangchengchengNLP/Lark/resolve/main"
+MODEL_FILENAME = "lark_epoch1.pth"
+LABELS_FILENAME = "all_dataset_labels.json"
+
+
+class DownloadError(IOError):
+    """Raised when a file cannot be downloaded or fails verification."""
+
+
+def get_base_url() -> str:
+    """Return the download base URL, overridable with ``LARK_BASE_URL``."""
+    return os.environ.get("LARK_BASE_URL", DEFAULT_BASE_URL).rstrip("/")
+
+
+def get_cache_dir(cache_dir: Optional[str] = None) -> str:
+    """
+    Resolve (and create) the shared cache directory.
+
+    Resolution order: the ``cache_dir`` argument, the ``LARK_CACHE_DIR``
+    environment variable, then ``$XDG_CACHE_HOME/lark`` (``~/.cache/lark``).
+    """
+    if cache_dir is None:
+        cache_dir = os.environ.get("LARK_CACHE_DIR")
+    if cache_dir is None:
+        xdg = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+        cache_dir = os.path.join(xdg, "lark")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def sha256_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """Compute the SHA-256 hex digest of a file without loading it into memory."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileLock:
+    """
+    Inter-process lock backed by a lock file.
+
+    Uses ``fcntl.flock`` where available (released automatically if the
+    holder dies) and falls back to exclusive file creation elsewhere.
+    """
+
+    def __init__(self, path: str, timeout: float = 600.0, poll_interval: float = 0.1):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd = None
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            if fcntl is not None:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    self._fd = fd
+                    return
+                except OSError:
+                    os.close(fd)
+            else:
+                try:
+                    self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o644)
+                    return
+                except FileExistsError:
+                    pass
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out waiting for lock: {self.path}")
+            time.sleep(self.poll_interval)
+
+    def release(self):
+        if self._fd is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+        else:
+            os.close(self._fd)
+            os.remove(self.path)
+        self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def _normalize_etag(value: Optional[str]) -> Optional[str]:
+    """Return the ETag as a SHA-256 digest if it looks like one."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    value = value.strip('"').lower()
+    if len(value) == 64 and all(c in "0123456789abcdef" for c in value):
+        return value
+    return None
+
+
+def _sha256_from_headers(response: requests.Response) -> Optional[str]:
+    """
+    Extract the expected SHA-256 from HuggingFace-style headers.
+
+    LFS files expose their SHA-256 as ``X-Linked-Etag`` on the redirect
+    response, so the redirect history is checked as well.
+    """
+    for resp in list(response.history) + [response]:
+        for name in ("X-Linked-Etag", "ETag"):
+            digest = _normalize_etag(resp.headers.get(name))
+            if digest:
+                return digest
+    return None
+
+
+def download_file(url: str, local_path: str, sha256: Optional[str] = None,
+                  timeout: float = 10, chunk_size: int = 1 << 20,
+                  retries: int = 3, session: Optional[requests.Session] = None) -> str:
+    """
+    Stream ``url`` to ``local_path`` with resume and hash verification.
+
+    Data is written to ``local_path + ".part"`` in chunks; interrupted
+    transfers are resumed with an HTTP ``Range`` request. The finished file
+    is verified against ``sha256`` (or the SHA-256 advertised by the server,
+    if any) before being atomically moved into place. A lock file makes
+    concurrent callers wait for a single download.
+
+    Args:
+        url: File URL
+        local_path: Destination path
+        sha256: Expected SHA-256 hex digest, or None to trust the server's
+        timeout: Connect/read timeout in seconds
+        chunk_size: Streaming chunk size in bytes
+        retries: Number of resume attempts after a failed transfer
+        session: Optional ``requests.Session`` to reuse connections
+
+    Returns:
+        ``local_path``
+
+    Raises:
+        DownloadError: If the download fails or the hash does not match
+    """
+    directory = os.path.dirname(os.path.abspath(local_path))
+    os.makedirs(directory, exist_ok=True)
+    part_path = local_path + ".part"
+    http = session or requests
+
+    with FileLock(local_path + ".lock"):
+        # Another worker may have finished the download while we waited
+        if os.path.exists(local_path):
+            if sha256 is None or sha256_file(local_path) == sha256.lower():
+                return local_path
+            os.remove(local_path)
+
+        expected = sha256.lower() if sha256 else None
+        last_error = None
+        for attempt in range(retries + 1):
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            try:
+                with http.get(url, stream=True, timeout=timeout, headers=headers) as response:
+                    if offset and response.status_code == 416:
+                        # Partial file already holds the whole payload
+                        last_error = None
+                        break
+                    response.raise_for_status()
+                    if offset and response.status_code != 206:
+                        # Server ignored the Range header, start over
+                        offset = 0
+                    if expected is None:
+                        expected = _sha256_from_headers(response)
+
+                    content_length = response.headers.get("Content-Length")
+                    total = offset + int(content_length) if content_length else None
+
+                    with open(part_path, "ab" if offset else "wb") as f:
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            if chunk:
+                                f.write(chunk)
+
+                if total is not None and os.path.getsize(part_path) < total:
+                    raise DownloadError(
+                        f"Incomplete transfer: {os.path.getsize(part_path)}/{total} bytes"
+                    )
+                last_error = None
+                break
+            except (requests.RequestException, DownloadError) as e:
+                last_error = e
+                if attempt < retries:
+                    time.sleep(min(2 ** attempt, 10) * 0.5)
+
+        if last_error is not None:
+            raise DownloadError(f"Download failed for {url}: {last_error}") from last_error
+
+        if expected is not None:
+            actual = sha256_file(part_path)
+            if actual != expected:
+                os.remove(part_path)
+                raise DownloadError(
+                    f"Checksum mismatch for {url}: expected {expected}, got {actual}"
+                )
+
+        os.replace(part_path, local_path)
+    return local_path
+
+
+__all__ = [
+    "DownloadError", "FileLock", "download_file", "get_cache_dir", "sha256_file",
+]
@@ -0,0 +1,321 @@
+"""
+Layer-wise early-exit heads for LarkModel
+
+An ``ExitHeads`` module adds a small classifier (LayerNorm + Linear) after
+encoder and decoder layers of a trained ``LarkModel``:
+
+- after encoder layer ``k`` the head reads the mean of the valid positions'
+  hidden states; exiting here skips the remaining encoder layers, the
+  boundary predictor and the whole decoder
+- after decoder layer ``k`` (all but the last) the head reads the CLS
+  position, like the final ``lm_head``
+
+The model itself is frozen. Heads are trained by self-distillation: every
+head learns to match the final ``lm_head`` distribution on local text, so
+no labels are needed. Features are collected in one pass over the sample
+and the heads are then fitted on them, which is fast.
+
+At inference ``early_exit_forward`` runs the model layer by layer; after
+each exit, rows whose top probability reaches the threshold are finished
+and removed from the batch, so later layers only see the hard rows. The
+exit depth of each text is the number of transformer layers it went through
+(``n_encoder + n_decoder`` for the final head).
+
+Heads are saved separately from the model weights::
+
+    {"config": {...ExitHeads kwargs...}, "state_dict": {...}}
+"""
+
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+import torch
+import torch.nn.functional as F
+from torch import nn, Tensor
+
+from .evaluate import _percentile, classification_metrics
+from .model import LarkModel, downsample_batch, pool_encoder_states
+from .tokenizer import batch_tokenize
+
+
+class ExitHeads(nn.Module):
+    """
+    Intermediate exit classifiers for a ``LarkModel``.
+
+    Args:
+        d_model: Hidden size of the model
+        label_size: Number of labels
+        n_encoder: Number of encoder layers of the model
+        n_decoder: Number of decoder layers of the model
+        encoder_layers: Encoder layer indices with an exit (default: all)
+        decoder_layers: Decoder layer indices with an exit (default: all but
+            the last, whose exit is the model's own ``lm_head``)
+    """
+
+    def __init__(self, d_model: int, label_size: int, n_encoder: int, n_decoder: int,
+                 encoder_layers: Optional[Sequence[int]] = None,
+                 decoder_layers: Optional[Sequence[int]] = None):
+        super().__init__()
+        if encoder_layers is None:
+            encoder_layers = range(n_encoder)
+        if decoder_layers is None:
+            decoder_layers = range(n_decoder - 1)
+        self.config = {
+            "d_model": d_model, "label_size": label_size,
+            "n_encoder": n_encoder, "n_decoder": n_decoder,
+            "encoder_layers": sorted(int(i) for i in encoder_layers),
+            "decoder_layers": sorted(int(i) for i in decoder_layers),
+        }
+        self.encoder_heads = nn.ModuleDict({
+            str(i): self._head(d_model, label_size) for i in self.config["encoder_layers"]})
+        self.decoder_heads = nn.ModuleDict({
+            str(i): self._head(d_model, label_size) for i in self.config["decoder_layers"]})
+
+    @staticmethod
+    def _head(d_model: int, label_size: int) -> nn.Module:
+        return nn.Sequential(nn.LayerNorm(d_model), nn.Linear(d_model, label_size))
+
+    @classmethod
+    def for_model(cls, model: LarkModel, **kwargs) -> "ExitHeads":
+        """Heads matching the dimensions of ``model``."""
+        return cls(model.config["d_model"], model.config["label_size"],
+                   len(model.encoder.encoder.layers), len(model.decoder.transformer_layers),
+                   **kwargs)
+
+    @property
+    def max_depth(self) -> int:
+        return self.config["n_encoder"] + self.config["n_decoder"]
+
+    def check(self, model: LarkModel):
+        """Raise ``ValueError`` if the heads were built for another architecture."""
+        expected = ExitHeads.for_model(model).config
+        for key in ("d_model", "label_size", "n_encoder", "n_decoder"):
+            if self.config[key] != expected[key]:
+                raise ValueError(f"Exit heads were built for {key}={self.config[key]}, "
+                                 f"the model has {expected[key]}")
+
+    def save(self, path: str):
+        torch.save({"config": self.config, "state_dict": self.state_dict()}, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ExitHeads":
+        checkpoint = torch.load(path, map_location="cpu")
+        heads = cls(**checkpoint["config"])
+        heads.load_state_dict(checkpoint["state_dict"])
+        return heads.eval()
+
+
+def _encoder_input(model: LarkModel, x_bytes: Tensor) -> Tensor:
+    L = x_bytes.shape[1]
+    return model.encoder.byte_emb(x_bytes) + model.encoder.pos_emb[:, :L, :]
+
+
+def _decoder_input(model: LarkModel, h: Tensor, pad_mask: Tensor) -> Tuple[Tensor, Tensor]:
+    """Boundary prediction, downsampling and the decoder's embeddings."""
+    hard_boundary = model.predictor(h, pad_mask)
+    segments, segment_mask = downsample_batch(h, hard_boundary, model.encoder,
+                                              model.segment_multiple)
+    decoder = model.decoder
+    B, S, H = segments.shape
+    x = segments + decoder.pos_emb[:, :S, :]
+    x = decoder.cls_segment_embedding.expand(B, 1, H) + x
+    return x, ~segment_mask.bool()
+
+
+def early_exit_forward(model: LarkModel, heads: ExitHeads, x_bytes: Tensor, pad_mask: Tensor,
+                       threshold: float = 0.9) -> Tuple[Tensor, Tensor]:
+    """
+    Run ``model`` with early exits.
+
+    Args:
+        model: Trained model
+        heads: Exit heads for ``model``
+        x_bytes: (B, L) byte ids
+        pad_mask: (B, L) 1 = valid, 0 = PAD
+        threshold: Top probability at which a row exits
+
+    Returns:
+        Tuple of (logits, depth): float32 [B, label_size] logits of the exit
+        each row took and int64 [B] number of transformer layers it ran
+    """
+    B = x_bytes.shape[0]
+    logits = torch.empty(B, heads.config["label_size"])
+    depth = torch.full((B,), heads.max_depth, dtype=torch.long)
+    rows = torch.arange(B)
+
+    def settle(exit_logits: Tensor, exit_depth: int) -> Tensor:
+        """Store finished rows; returns the mask of rows that continue."""
+        exit_logits = exit_logits.float()
+        done = torch.softmax(exit_logits, dim=-1).max(dim=-1).values >= threshold
+        logits[rows[done]] = exit_logits[done]
+        depth[rows[done]] = exit_depth
+        return ~done
+
+    with torch.no_grad():
+        n_encoder = heads.config["n_encoder"]
+        causal_mask = model.encoder.causal_mask
+        h = _encoder_input(model, x_bytes)
+        for i, layer in enumerate(model.encoder.encoder.layers):
+            L = h.shape[1]
+            h = layer(h, src_mask=causal_mask[:L, :L], src_key_padding_mask=pad_mask == 0)
+            head = heads.encoder_heads[str(i)] if str(i) in heads.encoder_heads else None
+            if head is not None:
+                keep = settle(head(pool_encoder_states(h, pad_mask)), i + 1)
+                h, pad_mask, rows = h[keep], pad_mask[keep], rows[keep]
+                if not len(rows):
+                    return logits, depth
+
+        x, key_padding_mask = _decoder_input(model, h, pad_mask)
+        decoder_layers = model.decoder.transformer_layers
+        for i, layer in enumerate(decoder_layers):
+            x = layer(x, src_key_padding_mask=key_padding_mask)
+            head = heads.decoder_heads[str(i)] if str(i) in heads.decoder_heads else None
+            if head is not None and i < len(decoder_layers) - 1:
+                keep = settle(head(x[:, 0, :].float()), n_encoder + i + 1)
+                x, key_padding_mask, rows = x[keep], key_padding_mask[keep], rows[keep]
+                if not len(rows):
+                    return logits, depth
+        logits[rows] = model.decoder.lm_head(x[:, 0, :]).float()
+    return logits, depth
+
+
+def collect_exit_features(model: LarkModel, heads: ExitHeads, x_bytes: Tensor,
+                          pad_mask: Tensor) -> Tuple[Dict[str, Tensor], Tensor]:
+    """
+    Full forward pass recording each exit's input features.
+
+    Returns:
+        Tuple of (features, teacher_logits): float32 [B, D] features keyed
+        ``"encoder.<i>"`` / ``"decoder.<i>"`` and float32 [B, label_size]
+        logits of the final ``lm_head``
+    """
+    features = {}
+    with torch.no_grad():
+        causal_mask = model.encoder.causal_mask
+        h = _encoder_input(model, x_bytes)
+        for i, layer in enumerate(model.encoder.encoder.layers):
+            L = h.shape[1]
+            h = layer(h, src_mask=causal_mask[:L, :L], src_key_padding_mask=pad_mask == 0)
+            if str(i) in heads.encoder_heads:
+                features[f"encoder.{i}"] = pool_encoder_states(h, pad_mask)
+        x, key_padding_mask = _decoder_input(model, h, pad_mask)
+        for i, layer in enumerate(model.decoder.transformer_layers):
+            x = layer(x, src_key_padding_mask=key_padding_mask)
+            if str(i) in heads.decoder_heads:
+                features[f"decoder.{i}"] = x[:, 0, :].float()
+        teacher = model.decoder.lm_head(x[:, 0, :]).float()
+    return features, teacher
+
+
+def train_exit_heads(model: LarkModel, texts: Sequence[str], heads: Optional[ExitHeads] = None,
+                     max_len: int = 1024, batch_size: int = 64, epochs: int = 50,
+                     lr: float = 1e-2, temperature: float = 1.0, seed: int = 0) -> ExitHeads:
+    """
+    Train exit heads by self-distillation from the final ``lm_head``.
+
+    Args:
+        model: Trained model (left unchanged)
+        texts: Unlabeled local texts
+        heads: Heads to train (default: ``ExitHeads.for_model(model)``)
+        max_len: Maximum sequence length
+        batch_size: Texts per feature-collection forward pass
+        epochs: Full-batch optimizer steps over the collected features
+        lr: Adam learning rate
+        temperature: Distillation temperature
+        seed: Initialization seed
+
+    Returns:
+        The trained heads, in eval mode
+    """
+    torch.manual_seed(seed)
+    if heads is None:
+        heads = ExitHeads.for_model(model)
+    heads.check(model)
+    was_training = model.training
+    model.eval()
+
+    batches = []
+    for i in range(0, len(texts), batch_size):
+        token_ids, pad_mask = batch_tokenize(list(texts[i:i + batch_size]), max_len=max_len)
+        batches.append(collect_exit_features(model, heads, token_ids, pad_mask))
+    model.train(was_training)
+    features = {key: torch.cat([f[key] for f, _ in batches]) for key in batches[0][0]}
+    teacher = torch.softmax(torch.cat([t for _, t in batches]) / temperature, dim=-1)
+
+    heads.train()
+    optimizer = torch.optim.Adam(heads.parameters(), lr=lr)
+    for _ in range(epochs):
+        loss = 0.0
+        for key, feature in features.items():
+            part, index = key.split(".")
+            head = (heads.encoder_heads if part == "encoder" else heads.decoder_heads)[index]
+            log_probs = F.log_softmax(head(feature) / temperature, dim=-1)
+            loss = loss + F.kl_div(log_probs, teacher, reduction="batchmean") * temperature ** 2
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+    return heads.eval()
+
+
+def exit_report(detector, examples: Sequence[Tuple[str, str]],
+                thresholds: Sequence[float] = (0.5, 0.7, 0.8, 0.9, 0.95, 0.99),
+                max_len: int = 1024, batch_size: int = 64) -> Dict:
+    """
+    Accuracy, exit depth and latency per threshold against the full model.
+
+    ``examples`` are run once without early exits and once per threshold
+    through ``detector.detect_batch_with_depth`` (``detector.early_exit``
+    must be set).
+
+    Returns:
+        Dict with the ``full`` model result and one ``early_exit`` row per
+        threshold (``accuracy``, ``macro_f1``, ``agreement`` with the full
+        model, ``mean_depth``, ``texts_per_s`` and per-batch ``latency_ms``
+        percentiles)
+    """
+    heads = detector.early_exit
+    saved_threshold = detector.exit_threshold
+    labels = [detector.id2label[i] for i in range(len(detector.id2label))]
+    gold = torch.tensor([detector.label2id.get(label, -1) for _, label in examples], dtype=torch.long)
+    known = gold >= 0
+    texts = [text for text, _ in examples]
+
+    def run(threshold):
+        detector.early_exit = heads if threshold is not None else None
+        detector.exit_threshold = threshold
+        predicted, depths, batch_seconds = [], [], []
+        for i in range(0, len(texts), batch_size):
+            start = time.perf_counter()
+            results = detector.detect_batch_with_depth(texts[i:i + batch_size], max_len=max_len)
+            batch_seconds.append(time.perf_counter() - start)
+            predicted.extend(detector.label2id[label] for label, _, _ in results)
+            depths.extend(depth for _, _, depth in results)
+        predicted = torch.tensor(predicted, dtype=torch.long)
+        n_labels = len(labels)
+        confusion = torch.bincount(gold[known] * n_labels + predicted[known],
+                                   minlength=n_labels * n_labels).reshape(n_labels, n_labels)
+        metrics = classification_metrics(confusion.numpy(), labels)
+        seconds = sum(batch_seconds)
+        return predicted, {
+            "accuracy": metrics["accuracy"],
+            "macro_f1": metrics["macro"]["f1"],
+            "mean_depth": sum(depths) / max(len(depths), 1),
+            "texts_per_s": len(texts) / seconds if seconds else 0.0,
+            "latency_ms": {f"p{q}": _percentile(batch_seconds, q) * 1000 for q in (50, 95, 99)},
+        }
+
+    try:
+        full_predicted, full = run(None)
+        report = {"texts": len(texts), "max_depth": heads.max_depth, "full": full, "early_exit": []}
+        for threshold in thresholds:
+            predicted, row = run(threshold)
+            agreement = float((predicted == full_predicted).float().mean()) if len(texts) else 0.0
+            report["early_exit"].append({"threshold": threshold, **row, "agreement": agreement})
+    finally:
+        detector.early_exit = heads
+        detector.exit_threshold = saved_threshold
+    return report
+
+
+__all__ = ["ExitHeads", "collect_exit_features", "early_exit_forward", "exit_report",
+           "train_exit_heads"]
@@ -0,0 +1,179 @@
+"""
+Batched evaluation on a labeled dataset and classification report output
+
+Predictions are streamed through ``detect_batch_arrays`` and accumulated
+into a confusion matrix with one ``np.bincount`` per batch; per-language
+precision, recall and F1 are then computed from the matrix in a few array
+operations. ``format_report`` writes the layout of the shipped
+``classification_report.txt`` (which ``analyze_accuracy.py`` parses).
+"""
+
+import itertools
+import time
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+
+def evaluate(detector, examples: Iterable[Tuple[str, str]], batch_size: int = 256,
+             max_len: int = 1024) -> Dict:
+    """
+    Evaluate ``detector`` on streamed (text, label) pairs.
+
+    Args:
+        detector: ``LarkDetector`` to evaluate
+        examples: Iterable of (text, label) pairs, consumed lazily
+        batch_size: Texts per inference call
+        max_len: Maximum sequence length
+
+    Returns:
+        Dict with ``labels`` (class names in id order), ``confusion`` (int64
+        [C, C + 1] gold x predicted counts, the last column counting texts
+        without a prediction), ``per_label`` / ``micro`` / ``macro`` /
+        ``weighted`` metrics over labels with support, ``accuracy``,
+        ``skipped`` (examples whose gold label the model does not know) and
+        ``throughput`` (including per-batch latency percentiles)
+    """
+    labels = [detector.id2label[i] for i in range(len(detector.id2label))]
+    n_labels = len(labels)
+    label2id = detector.label2id
+    confusion = np.zeros(n_labels * (n_labels + 1), dtype=np.int64)
+    skipped = 0
+    n_texts = 0
+    n_bytes = 0
+    batch_seconds = []
+
+    start = time.perf_counter()
+    iterator = iter(examples)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            break
+        gold = np.fromiter((label2id.get(label, -1) for _, label in batch),
+                           dtype=np.int64, count=len(batch))
+        known = gold >= 0
+        skipped += int((~known).sum())
+        texts = [text for (text, _), k in zip(batch, known) if k]
+        if not texts:
+            continue
+        t0 = time.perf_counter()
+        predicted, _, _ = detector.detect_batch_arrays(texts, max_len=max_len)
+        batch_seconds.append(time.perf_counter() - t0)
+        predicted = np.where(predicted < 0, n_labels, predicted)
+        confusion += np.bincount(gold[known] * (n_labels + 1) + predicted,
+                                 minlength=confusion.size)
+        n_texts += len(texts)
+        n_bytes += sum(len(t.encode("utf-8")) for t in texts)
+    total_seconds = time.perf_counter() - start
+
+    confusion = confusion.reshape(n_labels, n_labels + 1)
+    inference_seconds = sum(batch_seconds)
+    result = {
+        "labels": labels,
+        "confusion": confusion,
+        "skipped": skipped,
+        **classification_metrics(confusion, labels),
+        "throughput": {
+            "texts": n_texts,
+            "bytes": n_bytes,
+            "inference_seconds": inference_seconds,
+            "total_seconds": total_seconds,
+            "texts_per_s": n_texts / inference_seconds if inference_seconds else 0.0,
+            "bytes_per_s": n_bytes / inference_seconds if inference_seconds else 0.0,
+            "batch_latency_ms": {
+                "p50": _percentile(batch_seconds, 50) * 1000,
+                "p95": _percentile(batch_seconds, 95) * 1000,
+                "p99": _percentile(batch_seconds, 99) * 1000,
+            },
+        },
+    }
+    return result
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (``q`` in [0, 100])."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, int(np.ceil(q / 100.0 * len(ordered))) - 1))]
+
+
+def classification_metrics(confusion: np.ndarray, labels: List[str]) -> Dict:
+    """
+    Precision, recall and F1 from a gold x predicted confusion matrix.
+
+    Only labels with gold support are reported and averaged, matching the
+    shipped report. Extra predicted columns (e.g. "no prediction") count as
+    misses but never as predictions of a reported label.
+    """
+    n_labels = len(labels)
+    tp = np.diag(confusion[:, :n_labels]).astype(np.float64)
+    support = confusion.sum(axis=1).astype(np.float64)
+    predicted = confusion[:, :n_labels].sum(axis=0).astype(np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.nan_to_num(tp / predicted)
+        recall = np.nan_to_num(tp / support)
+        f1 = np.nan_to_num(2 * precision * recall / (precision + recall))
+
+    reported = support > 0
+    total = support[reported].sum()
+    micro_p = tp[reported].sum() / predicted[reported].sum() if predicted[reported].sum() else 0.0
+    micro_r = tp[reported].sum() / total if total else 0.0
+    micro_f1 = 2 * micro_p * micro_r / (micro_p + micro_r) if micro_p + micro_r else 0.0
+
+    def average(weights):
+        if not weights.sum():
+            return {"precision": 0.0, "recall": 0.0, "f1": 0.0, "support": 0}
+        return {
+            "precision": float(np.average(precision[reported], weights=weights)),
+            "recall": float(np.average(recall[reported], weights=weights)),
+            "f1": float(np.average(f1[reported], weights=weights)),
+            "support": int(total),
+        }
+
+    return {
+        "per_label": {
+            labels[i]: {"precision": float(precision[i]), "recall": float(recall[i]),
+                        "f1": float(f1[i]), "support": int(support[i])}
+            for i in np.flatnonzero(reported)
+        },
+        "accuracy": float(tp.sum() / confusion.sum()) if confusion.sum() else 0.0,
+        "micro": {"precision": float(micro_p), "recall": float(micro_r),
+                  "f1": float(micro_f1), "support": int(total)},
+        "macro": average(np.ones(int(reported.sum()))),
+        "weighted": average(support[reported]),
+    }
+
+
+def format_report(result: Dict, digits: int = 2) -> str:
+    """Render an ``evaluate`` result in the ``classification_report.txt`` layout."""
+    headers = ["precision", "recall", "f1-score", "support"]
+    names = list(result["per_label"]) + ["weighted avg"]
+    width = max(len(name) for name in names)
+    head_fmt = "{:>{width}s} " + " {:>9}" * len(headers)
+    row_fmt = "{:>{width}s} " + " {:>9.{digits}f}" * 3 + " {:>9}\n"
+
+    lines = ["Detailed Classification Report", "=" * 40]
+    report = head_fmt.format("", *headers, width=width) + "\n\n"
+    for name, m in result["per_label"].items():
+        report += row_fmt.format(name, m["precision"], m["recall"], m["f1"], m["support"],
+                                 width=width, digits=digits)
+    report += "\n"
+    for name, key in (("micro avg", "micro"), ("macro avg", "macro"), ("weighted avg", "weighted")):
+        m = result[key]
+        report += row_fmt.format(name, m["precision"], m["recall"], m["f1"], m["support"],
+                                 width=width, digits=digits)
+    lines.append(report)
+    lines.append(f"Note: This report includes only {len(result['per_label'])} "
+                 f"languages with validation samples.")
+    lines.append(f"Total supported languages: {len(result['labels'])}")
+    return "\n".join(lines) + "\n"
+
+
+def result_to_json(result: Dict) -> Dict:
+    """JSON-serializable copy of an ``evaluate`` result."""
+    return {**result, "confusion": result["confusion"].tolist()}
+
+
+__all__ = ["classification_metrics", "evaluate", "format_report", "result_to_json"]
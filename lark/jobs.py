@@ -0,0 +1,375 @@
+"""
+File-based, resumable corpus labeling jobs
+
+A job directory on storage shared by every node coordinates any number of
+worker processes without a server:
+
+    job.json            input shards (file, start byte, end byte), in output order
+    locks/<shard>.lock  claim of a shard, created with O_CREAT | O_EXCL
+    progress/<shard>    checkpoint: input offset, output size and records done
+    output/<shard>      labeled records of the shard (JSON lines)
+    done/<shard>        marker written once a shard is complete
+
+Shards are byte ranges of the input files aligned to line boundaries, so
+planning only seeks and never scans the corpus. A worker claims a free
+shard by creating its lock file and refreshes the lock's mtime after every
+batch; a lock not refreshed for ``lease`` seconds belongs to a dead worker
+and is taken over by the next worker that finds it. Output is fsynced
+before each checkpoint, and a resumed shard truncates its output to the
+checkpointed size and continues from the checkpointed input offset, so a
+killed shard is resumed rather than restarted and no record is written
+twice. ``merge`` concatenates the shard outputs in input order.
+
+Every input line is one document (``.jsonl`` inputs: the ``text`` field,
+with ``id`` carried over when present), so line N of the merged output
+labels line N of the concatenated inputs.
+"""
+
+import json
+import os
+import socket
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+
+JOB_FILE = "job.json"
+
+
+def _write_atomic(path: str, data: bytes):
+    """Write ``data`` to ``path`` through a fsynced temporary file and rename."""
+    tmp = f"{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _read_json(path: str) -> Optional[Dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def read_manifest(path: str) -> List[str]:
+    """Input files listed one per line (relative paths are relative to the manifest)."""
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, "r", encoding="utf-8") as f:
+        entries = [line.strip() for line in f]
+    return [os.path.join(base, e) for e in entries if e and not e.startswith("#")]
+
+
+def split_file(path: str, shard_bytes: int) -> List[Tuple[int, int]]:
+    """
+    Split a file into byte ranges of about ``shard_bytes`` ending on line boundaries.
+
+    Returns:
+        List of (start, end) offsets covering the whole file
+    """
+    shard_bytes = max(1, shard_bytes)
+    size = os.path.getsize(path)
+    ranges = []
+    start = 0
+    with open(path, "rb") as f:
+        while start < size:
+            f.seek(min(start + shard_bytes, size) - 1)
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def iter_documents(path: str, start: int, end: int) -> Iterator[Tuple[int, str, Optional[object]]]:
+    """
+    Read the lines of ``path`` that start in ``[start, end)``.
+
+    Yields:
+        (offset after the line, text, id or None)
+    """
+    is_jsonl = os.path.splitext(path)[1].lower() in (".jsonl", ".json")
+    with open(path, "rb") as f:
+        f.seek(start)
+        position = start
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            text = line.rstrip(b"\r\n").decode("utf-8", errors="replace")
+            doc_id = None
+            if is_jsonl:
+                if not text.strip():
+                    yield position, "", None
+                    continue
+                try:
+                    record = json.loads(text)
+                    text, doc_id = record["text"], record.get("id")
+                except (ValueError, KeyError, TypeError) as e:
+                    raise ValueError(f"{path}@{position - len(line)}: invalid record: {e}") from e
+            yield position, text, doc_id
+
+
+class LeaseLost(RuntimeError):
+    """The shard lock was taken over by another worker."""
+
+
+class LabelingJob:
+    """
+    A labeling job directory shared by workers on one or more machines.
+
+    Args:
+        job_dir: Directory created by ``LabelingJob.create``
+        lease: Seconds after which a lock that was not refreshed is
+            considered abandoned and may be taken over
+    """
+
+    def __init__(self, job_dir: str, lease: float = 600.0):
+        self.job_dir = job_dir
+        self.lease = lease
+        spec = _read_json(os.path.join(job_dir, JOB_FILE))
+        if spec is None:
+            raise FileNotFoundError(f"No labeling job in {job_dir}")
+        self.shards: List[Dict] = spec["shards"]
+        self.inputs: List[str] = spec["inputs"]
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    @classmethod
+    def create(cls, job_dir: str, inputs: List[str], shard_bytes: int = 64 << 20,
+               lease: float = 600.0) -> "LabelingJob":
+        """
+        Plan a job over ``inputs`` (a no-op if ``job_dir`` already holds one).
+
+        Args:
+            job_dir: Job directory on storage shared by all workers
+            inputs: Input files in output order
+            shard_bytes: Target input bytes per shard
+            lease: See ``LabelingJob``
+        """
+        if not os.path.exists(os.path.join(job_dir, JOB_FILE)):
+            for sub in ("locks", "progress", "output", "done"):
+                os.makedirs(os.path.join(job_dir, sub), exist_ok=True)
+            inputs = [os.path.abspath(p) for p in inputs]
+            ranges = [(path, start, end) for path in inputs for start, end in split_file(path, shard_bytes)]
+            shards = [{"id": f"{i:06d}", "input": path, "start": start, "end": end}
+                      for i, (path, start, end) in enumerate(ranges)]
+            spec = {"version": 1, "inputs": inputs, "shard_bytes": shard_bytes, "shards": shards}
+            _write_atomic(os.path.join(job_dir, JOB_FILE), json.dumps(spec, indent=1).encode("utf-8"))
+        return cls(job_dir, lease=lease)
+
+    def _path(self, kind: str, shard_id: str) -> str:
+        suffix = {"locks": ".lock", "progress": ".json", "output": ".jsonl", "done": ""}[kind]
+        return os.path.join(self.job_dir, kind, shard_id + suffix)
+
+    def is_done(self, shard_id: str) -> bool:
+        return os.path.exists(self._path("done", shard_id))
+
+    # ---- claiming ----
+
+    def _create_lock(self, path: str) -> bool:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"owner": self.worker_id, "claimed": time.time()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        return True
+
+    def _take_over(self, path: str) -> bool:
+        """Replace an abandoned lock; only one of several racing workers succeeds."""
+        try:
+            seen = os.stat(path)
+        except FileNotFoundError:
+            return self._create_lock(path)
+        if time.time() - seen.st_mtime < self.lease:
+            return False
+        moved = f"{path}.stale.{uuid.uuid4().hex[:8]}"
+        try:
+            os.rename(path, moved)
+        except FileNotFoundError:
+            return False
+        now = os.stat(moved)
+        if (now.st_ino, now.st_mtime_ns) != (seen.st_ino, seen.st_mtime_ns):
+            # Another worker replaced the lock, or its owner renewed it, after the
+            # staleness check: put the live lock back
+            try:
+                os.link(moved, path)
+            except FileExistsError:
+                pass
+            os.unlink(moved)
+            return False
+        os.unlink(moved)
+        return self._create_lock(path)
+
+    def claim(self) -> Optional[Dict]:
+        """Claim the first shard that is neither done nor held by a live worker."""
+        for shard in self.shards:
+            if self.is_done(shard["id"]):
+                continue
+            path = self._path("locks", shard["id"])
+            if self._create_lock(path) or self._take_over(path):
+                if self.is_done(shard["id"]):
+                    self.release(shard["id"])
+                    continue
+                return shard
+        return None
+
+    def owns(self, shard_id: str) -> bool:
+        return (_read_json(self._path("locks", shard_id)) or {}).get("owner") == self.worker_id
+
+    def heartbeat(self, shard_id: str):
+        """Refresh the lease of a claimed shard; raises ``LeaseLost`` if it was taken over."""
+        if not self.owns(shard_id):
+            raise LeaseLost(f"Shard {shard_id} is no longer held by {self.worker_id}")
+        os.utime(self._path("locks", shard_id))
+
+    def release(self, shard_id: str):
+        if self.owns(shard_id):
+            try:
+                os.unlink(self._path("locks", shard_id))
+            except FileNotFoundError:
+                pass
+
+    # ---- processing ----
+
+    def checkpoint(self, shard_id: str) -> Dict:
+        """Progress of a shard: ``input_offset``, ``output_bytes`` and ``records``."""
+        return _read_json(self._path("progress", shard_id)) or {}
+
+    def process_shard(self, shard: Dict, detector, batch_size: int = 256, max_len: int = 1024) -> int:
+        """
+        Label a claimed shard from its last checkpoint to its end.
+
+        Args:
+            shard: Shard returned by ``claim``
+            detector: Object with ``detect_batch(texts, max_len)`` (``LarkDetector``,
+                ``DetectorPool``)
+            batch_size: Documents per ``detect_batch`` call and per checkpoint
+            max_len: Maximum sequence length
+
+        Returns:
+            Number of documents labeled in this call
+        """
+        shard_id = shard["id"]
+        progress = self.checkpoint(shard_id)
+        offset = progress.get("input_offset", shard["start"])
+        records = progress.get("records", 0)
+        output_path = self._path("output", shard_id)
+        labeled = 0
+        with open(output_path, "ab") as out:
+            # Drop anything written after the last checkpoint by a killed worker
+            out.truncate(progress.get("output_bytes", 0))
+            batch = []
+
+            def flush():
+                nonlocal offset, records, labeled
+                results = detector.detect_batch([text for _, text, _ in batch], max_len=max_len)
+                lines = []
+                for (_, _, doc_id), (language, confidence) in zip(batch, results):
+                    record = {"language": language, "confidence": round(float(confidence), 6)}
+                    if doc_id is not None:
+                        record = {"id": doc_id, **record}
+                    lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+                self.heartbeat(shard_id)
+                out.write("".join(lines).encode("utf-8"))
+                out.flush()
+                os.fsync(out.fileno())
+                offset, records, labeled = batch[-1][0], records + len(batch), labeled + len(batch)
+                _write_atomic(self._path("progress", shard_id), json.dumps(
+                    {"input_offset": offset, "output_bytes": out.tell(), "records": records,
+                     "worker": self.worker_id}).encode("utf-8"))
+                batch.clear()
+
+            for document in iter_documents(shard["input"], offset, shard["end"]):
+                batch.append(document)
+                if len(batch) >= batch_size:
+                    flush()
+            if batch:
+                flush()
+        self.heartbeat(shard_id)
+        _write_atomic(self._path("done", shard_id), json.dumps(
+            {"records": records, "worker": self.worker_id, "finished": time.time()}).encode("utf-8"))
+        self.release(shard_id)
+        return labeled
+
+    def run_worker(self, detector, batch_size: int = 256, max_len: int = 1024,
+                   max_shards: Optional[int] = None) -> Dict:
+        """
+        Claim and label shards until none are left.
+
+        Returns:
+            Shards completed, documents labeled and shards lost to another worker
+        """
+        summary = {"worker": self.worker_id, "shards": 0, "documents": 0, "lost": 0}
+        while max_shards is None or summary["shards"] < max_shards:
+            shard = self.claim()
+            if shard is None:
+                break
+            try:
+                summary["documents"] += self.process_shard(shard, detector, batch_size, max_len)
+                summary["shards"] += 1
+            except LeaseLost:
+                summary["lost"] += 1
+        return summary
+
+    # ---- reporting and merging ----
+
+    def status(self) -> Dict:
+        """Shard counts by state and documents labeled so far."""
+        now = time.time()
+        counts = {"done": 0, "running": 0, "stale": 0, "pending": 0}
+        records = 0
+        for shard in self.shards:
+            shard_id = shard["id"]
+            records += self.checkpoint(shard_id).get("records", 0)
+            if self.is_done(shard_id):
+                counts["done"] += 1
+                continue
+            try:
+                age = now - os.stat(self._path("locks", shard_id)).st_mtime
+                counts["running" if age < self.lease else "stale"] += 1
+            except FileNotFoundError:
+                counts["pending"] += 1
+        return {"shards": len(self.shards), **counts, "records": records,
+                "complete": counts["done"] == len(self.shards)}
+
+    def merge(self, output: str) -> int:
+        """
+        Concatenate the shard outputs in input order into ``output``.
+
+        Returns:
+            Number of records written
+
+        Raises:
+            RuntimeError: If some shards are not done
+        """
+        missing = [s["id"] for s in self.shards if not self.is_done(s["id"])]
+        if missing:
+            raise RuntimeError(f"{len(missing)} shard(s) are not done, e.g. {missing[0]}")
+        tmp = f"{output}.{os.getpid()}.tmp"
+        records = 0
+        with open(tmp, "wb") as out:
+            for shard in self.shards:
+                progress = self.checkpoint(shard["id"])
+                records += progress.get("records", 0)
+                if not progress.get("output_bytes"):
+                    continue
+                with open(self._path("output", shard["id"]), "rb") as f:
+                    remaining = progress["output_bytes"]
+                    while remaining:
+                        chunk = f.read(min(remaining, 1 << 20))
+                        if not chunk:
+                            raise RuntimeError(f"Output of shard {shard['id']} is truncated")
+                        out.write(chunk)
+                        remaining -= len(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, output)
+        return records
+
+
+__all__ = ["LabelingJob", "LeaseLost", "iter_documents", "read_manifest", "split_file"]
@@ -0,0 +1,223 @@
+"""
+Cumulative detector metrics with dict and Prometheus text export
+"""
+
+import bisect
+import functools
+import threading
+import time
+from typing import Dict, Optional, Sequence
+
+import torch
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+SEQ_LEN_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+
+
+class Histogram:
+    """Fixed-bucket histogram (upper bounds inclusive, like Prometheus ``le``)."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def observe_many(self, values: torch.Tensor):
+        """Observe a 1-D tensor of values with one bucketize call."""
+        if values.numel() == 0:
+            return
+        values = values.to(torch.float64)
+        boundaries = torch.tensor(self.buckets, dtype=torch.float64)
+        idx = torch.bucketize(values, boundaries, right=False)
+        for i, c in enumerate(torch.bincount(idx, minlength=len(self.counts)).tolist()):
+            self.counts[i] += c
+        self.sum += float(values.sum().item())
+        self.count += values.numel()
+
+    def snapshot(self) -> Dict:
+        cumulative = []
+        running = 0
+        for c in self.counts:
+            running += c
+            cumulative.append(running)
+        return {
+            "buckets": {**{str(b): n for b, n in zip(self.buckets, cumulative)},
+                        "+Inf": cumulative[-1]},
+            "sum": self.sum,
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else 0.0,
+        }
+
+
+class DetectorMetrics:
+    """
+    Thread-safe cumulative metrics for a ``LarkDetector``.
+
+    Tracks request and text counts and latency histograms per entry point,
+    batch-size and sequence-length (real bytes per text) histograms, the
+    padding-waste ratio of model inputs, and hit/miss counters for named
+    caches.
+    """
+
+    def __init__(self, latency_buckets: Sequence[float] = LATENCY_BUCKETS,
+                 batch_size_buckets: Sequence[float] = BATCH_SIZE_BUCKETS,
+                 seq_len_buckets: Sequence[float] = SEQ_LEN_BUCKETS):
+        self._latency_buckets = latency_buckets
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.texts: Dict[str, int] = {}
+        self.latency: Dict[str, Histogram] = {}
+        self.batch_size = Histogram(batch_size_buckets)
+        self.seq_len = Histogram(seq_len_buckets)
+        self.real_bytes = 0
+        self.padded_bytes = 0
+        self.cache_hits: Dict[str, int] = {}
+        self.cache_misses: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+
+    def record_request(self, entry: str, n_texts: int, seconds: float):
+        """Record one call to a public entry point."""
+        with self._lock:
+            self.requests[entry] = self.requests.get(entry, 0) + 1
+            self.texts[entry] = self.texts.get(entry, 0) + n_texts
+            if entry not in self.latency:
+                self.latency[entry] = Histogram(self._latency_buckets)
+            self.latency[entry].observe(seconds)
+
+    def record_batch(self, pad_mask: torch.Tensor):
+        """Record the shape of one model input batch from its pad mask (1 = valid)."""
+        lengths = pad_mask.sum(dim=1)
+        real = int(lengths.sum().item())
+        with self._lock:
+            self.batch_size.observe(pad_mask.shape[0])
+            self.seq_len.observe_many(lengths)
+            self.real_bytes += real
+            self.padded_bytes += pad_mask.numel()
+
+    def record_cache(self, name: str, hits: int, misses: int):
+        """Record lookups against a named cache."""
+        with self._lock:
+            self.cache_hits[name] = self.cache_hits.get(name, 0) + hits
+            self.cache_misses[name] = self.cache_misses.get(name, 0) + misses
+
+    def increment(self, name: str, value: int = 1):
+        """Increment a free-form named counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @property
+    def padding_waste(self) -> float:
+        """Fraction of model input positions that were padding."""
+        if not self.padded_bytes:
+            return 0.0
+        return 1.0 - self.real_bytes / self.padded_bytes
+
+    def snapshot(self) -> Dict:
+        """Return all metrics as a plain dict."""
+        with self._lock:
+            caches = {}
+            for name in sorted(set(self.cache_hits) | set(self.cache_misses)):
+                hits = self.cache_hits.get(name, 0)
+                misses = self.cache_misses.get(name, 0)
+                caches[name] = {
+                    "hits": hits, "misses": misses,
+                    "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                }
+            return {
+                "requests": dict(self.requests),
+                "texts": dict(self.texts),
+                "latency_seconds": {k: h.snapshot() for k, h in self.latency.items()},
+                "batch_size": self.batch_size.snapshot(),
+                "seq_len_bytes": self.seq_len.snapshot(),
+                "real_bytes": self.real_bytes,
+                "padded_bytes": self.padded_bytes,
+                "padding_waste_ratio": self.padding_waste,
+                "caches": caches,
+                "counters": dict(self.counters),
+            }
+
+    def to_prometheus(self, prefix: str = "lark") -> str:
+        """Render metrics in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines = []
+
+        def header(name, kind, help_text):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        def histogram(name, hist, labels=""):
+            sep = "," if labels else ""
+            for le, n in hist["buckets"].items():
+                lines.append(f'{prefix}_{name}_bucket{{{labels}{sep}le="{le}"}} {n}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{prefix}_{name}_sum{suffix} {hist['sum']}")
+            lines.append(f"{prefix}_{name}_count{suffix} {hist['count']}")
+
+        header("requests_total", "counter", "Detection calls per entry point.")
+        for entry, n in sorted(snap["requests"].items()):
+            lines.append(f'{prefix}_requests_total{{entry="{entry}"}} {n}')
+        header("texts_total", "counter", "Texts processed per entry point.")
+        for entry, n in sorted(snap["texts"].items()):
+            lines.append(f'{prefix}_texts_total{{entry="{entry}"}} {n}')
+        header("request_latency_seconds", "histogram", "Latency per entry point.")
+        for entry, hist in sorted(snap["latency_seconds"].items()):
+            histogram("request_latency_seconds", hist, f'entry="{entry}"')
+        header("batch_size", "histogram", "Rows per model forward pass.")
+        histogram("batch_size", snap["batch_size"])
+        header("seq_len_bytes", "histogram", "Real (unpadded) input bytes per text.")
+        histogram("seq_len_bytes", snap["seq_len_bytes"])
+        header("input_bytes_total", "counter", "Model input positions by kind.")
+        lines.append(f'{prefix}_input_bytes_total{{kind="real"}} {snap["real_bytes"]}')
+        lines.append(f'{prefix}_input_bytes_total{{kind="padded"}} {snap["padded_bytes"]}')
+        header("padding_waste_ratio", "gauge", "Fraction of model input positions that were padding.")
+        lines.append(f"{prefix}_padding_waste_ratio {snap['padding_waste_ratio']}")
+        if snap["caches"]:
+            header("cache_lookups_total", "counter", "Cache lookups by cache and result.")
+            for name, c in snap["caches"].items():
+                lines.append(f'{prefix}_cache_lookups_total{{cache="{name}",result="hit"}} {c["hits"]}')
+                lines.append(f'{prefix}_cache_lookups_total{{cache="{name}",result="miss"}} {c["misses"]}')
+        for name, value in sorted(snap["counters"].items()):
+            header(f"{name}_total", "counter", f"Counter {name}.")
+            lines.append(f"{prefix}_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+
+_entry_depth = threading.local()
+
+
+def track(entry: str):
+    """
+    Decorator recording latency and text count for a detector entry point.
+
+    Only the outermost tracked call is recorded, so entry points that call
+    each other (e.g. ``detect_with_confidence`` -> ``detect_with_topk``) are
+    counted once. The first positional argument is the text or list of texts.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, texts, *args, **kwargs):
+            metrics: Optional[DetectorMetrics] = getattr(self, "metrics", None)
+            depth = getattr(_entry_depth, "value", 0)
+            if metrics is None or depth:
+                return method(self, texts, *args, **kwargs)
+            _entry_depth.value = depth + 1
+            start = time.perf_counter()
+            try:
+                return method(self, texts, *args, **kwargs)
+            finally:
+                _entry_depth.value = depth
+                n = 1 if isinstance(texts, (str, bytes, bytearray, memoryview)) else len(texts)
+                metrics.record_request(entry, n, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+__all__ = ["DetectorMetrics", "Histogram", "track"]
@@ -18,6 +18,21 @@ VOCAB_SIZE = 259  # 0~255 + START + END + PAD
 MAX_LEN = 128  # 最大字节数(示例)
 
 
+def _layer_widths(n_layers, ff) -> list:
+    """ff 为整数时每层相同，为列表时逐层指定 FFN 宽度 (层数 = 列表长度)"""
+    if isinstance(ff, (list, tuple)):
+        return [int(w) for w in ff]
+    return [int(ff)] * n_layers
+
+
+def _resize_ffn(layer: nn.TransformerEncoderLayer, width: int):
+    """把一个 TransformerEncoderLayer 的 FFN 换成指定宽度 (权重重新初始化)"""
+    d_model = layer.linear1.in_features
+    dtype = layer.linear1.weight.dtype
+    layer.linear1 = nn.Linear(d_model, width, dtype=dtype)
+    layer.linear2 = nn.Linear(width, d_model, dtype=dtype)
+
+
 
 
 
@@ -28,6 +43,7 @@ MAX_LEN = 128  # 最大字节数(示例)
 class ByteEncoder(nn.Module):
     """
     将字节序列编码为上下文表示 (B, L, D)
+    ff 可以是整数，也可以是逐层宽度列表 (剪枝后的变体)
     """
 
     def __init__(self, d_model=128, n_layers=2, n_heads=4, ff=512,
@@ -38,11 +54,20 @@ class ByteEncoder(nn.Module):
         )
         self.pos_emb = nn.Parameter(torch.zeros(1, max_len, d_model, dtype=dtype))
 
+        widths = _layer_widths(n_layers, ff)
         encoder_layer = nn.TransformerEncoderLayer(
-            d_model=d_model, nhead=n_heads, dim_feedforward=ff,
+            d_model=d_model, nhead=n_heads, dim_feedforward=widths[0],
             batch_first=True, dtype=dtype
         )
-        self.encoder = nn.TransformerEncoder(encoder_layer, num_layers=n_layers)
+        self.encoder = nn.TransformerEncoder(encoder_layer, num_layers=len(widths))
+        for layer, width in zip(self.encoder.layers, widths):
+            if width != widths[0]:
+                _resize_ffn(layer, width)
+        # 因果 mask 只依赖长度，预先生成一次，每次按 L 切片 (不写入 state_dict)
+        self.register_buffer(
+            "causal_mask", torch.triu(torch.ones(max_len, max_len), diagonal=1).bool(),
+            persistent=False
+        )
 
     def forward(self, x_bytes: Tensor, pad_mask: Tensor = None) -> Tensor:
         """
@@ -56,9 +81,7 @@ class ByteEncoder(nn.Module):
         h = self.byte_emb(x_bytes) + self.pos_emb[:, :L, :]
 
         src_key_padding_mask = (pad_mask == 0) if pad_mask is not None else None
-        causal_mask = torch.triu(
-            torch.ones(L, L, device=x_bytes.device), diagonal=1
-        ).bool()
+        causal_mask = self.causal_mask[:L, :L]
 
         return self.encoder(h, mask=causal_mask, src_key_padding_mask=src_key_padding_mask)
 
@@ -149,9 +172,11 @@ class BatchBoundaryPredictor(nn.Module):
 
 # ---------------------- Downsample ----------------------
 def downsample_batch(hidden: Tensor, hard_boundary: Tensor,
-                     encoder: ByteEncoder):
+                     encoder: ByteEncoder, segment_multiple: int = 1):
     """
     按边界选择 hidden，形成 segment embeddings
+    segment_multiple: segment 维度向上取整到该倍数 (不超过 T)，
+                      减少解码器输入形状的种类，多出的位置 mask 为 0
     """
     B, T, H = hidden.shape
     device = hidden.device
@@ -164,6 +189,8 @@ def downsample_batch(hidden: Tensor, hard_boundary: Tensor,
 
     seg_counts = hard_boundary.sum(dim=1)
     max_len = int(seg_counts.max().item())
+    if segment_multiple > 1:
+        max_len = min(-(-max_len // segment_multiple) * segment_multiple, T)
 
     padded_segments = pad_emb.expand(B, max_len, H).clone()
     masks = torch.zeros(B, max_len, device=device)
@@ -183,6 +210,7 @@ def downsample_batch(hidden: Tensor, hard_boundary: Tensor,
 class Decoder(nn.Module):
     """
     基于 Transformer 的 segment 级解码器
+    ff 可以是整数，也可以是逐层宽度列表 (剪枝后的变体)
     """
 
     def __init__(self, d_model, n_heads, n_layers, ff, label_size,
@@ -190,16 +218,17 @@ class Decoder(nn.Module):
         super().__init__()
         self.transformer_layers = nn.ModuleList([
             nn.TransformerEncoderLayer(
-                d_model=d_model, nhead=n_heads, dim_feedforward=ff,
+                d_model=d_model, nhead=n_heads, dim_feedforward=width,
                 dropout=dropout, batch_first=True, dtype=dtype
             )
-            for _ in range(n_layers)
+            for width in _layer_widths(n_layers, ff)
         ])
         self.lm_head = nn.Linear(d_model, label_size, dtype=dtype)
         self.pos_emb = nn.Parameter(torch.zeros(1, max_len, d_model, dtype=dtype))
         self.cls_segment_embedding = nn.Parameter(torch.zeros(1, 1, d_model, dtype=dtype))
 
-    def forward(self, segment_embeddings: Tensor, segment_mask: Tensor) -> Tensor:
+    def forward(self, segment_embeddings: Tensor, segment_mask: Tensor, return_cls: bool = False):
+        """return_cls=True 时返回 (logits, cls_embedding)，供向量输出复用同一次前向"""
         B, L, H = segment_embeddings.shape
         x = segment_embeddings + self.pos_emb[:, :L, :]
         x = self.cls_segment_embedding.expand(B, 1, H) + x
@@ -208,34 +237,162 @@ class Decoder(nn.Module):
             x = layer(x, src_key_padding_mask=~segment_mask.bool())
 
         cls_embedding = x[:, 0, :]  # [B, H]
-        return self.lm_head(cls_embedding)
+        logits = self.lm_head(cls_embedding)
+        if return_cls:
+            return logits, cls_embedding
+        return logits
 
 
 # ---------------------- 总模型 ----------------------
 class LarkModel(nn.Module):
     """
     LarkModel: 字节编码 + 边界预测 + segment 解码
+
+    encoder_ff / decoder_ff: 可选的逐层 FFN 宽度列表，覆盖 n_layers 和 ff
+    (用于加载 lark.prune 生成的剪枝变体)
     """
 
     def __init__(self, d_model=128, n_layers=2, n_heads=4, ff=512,
-                 label_size=2, dropout=0.1, max_len=MAX_LEN, dtype=torch.float16):
+                 label_size=2, dropout=0.1, max_len=MAX_LEN, dtype=torch.float16,
+                 encoder_ff=None, decoder_ff=None):
         super().__init__()
+        # 构造参数 (不含 dtype)，写入剪枝 checkpoint 以便重建结构
+        self.config = {
+            "d_model": d_model, "n_layers": n_layers, "n_heads": n_heads, "ff": ff,
+            "label_size": label_size, "dropout": dropout, "max_len": max_len,
+            "encoder_ff": list(encoder_ff) if encoder_ff is not None else None,
+            "decoder_ff": list(decoder_ff) if decoder_ff is not None else None,
+        }
         self.encoder = ByteEncoder(
             d_model=d_model, n_layers=n_layers, n_heads=n_heads,
-            ff=ff, max_len=max_len, dtype=dtype
+            ff=encoder_ff if encoder_ff is not None else ff,
+            max_len=max_len, dtype=dtype
         )
         self.predictor = BatchBoundaryPredictor(d_model=d_model, dtype=dtype)
         self.decoder = Decoder(
             d_model=d_model, n_heads=n_heads, n_layers=n_layers,
-            ff=ff, max_len=max_len, label_size=label_size,
+            ff=decoder_ff if decoder_ff is not None else ff,
+            max_len=max_len, label_size=label_size,
             dropout=dropout, dtype=dtype
         )
-
-    def forward(self, x_bytes: Tensor, pad_mask: Tensor = None) -> Tensor:
-        h = self.encoder(x_bytes, pad_mask)
+        # 可选的分阶段计时器 (lark.profiling.StageProfiler)，None 时不产生开销
+        self.profiler = None
+        # 两阶段调度：边界预测后按 segment 数重新分组再送入解码器
+        self.regroup_decoder = False
+        self.regroup_tolerance = 0.25
+        self.regroup_min_size = 4
+        # 解码器 segment 维度的取整倍数 (服务模式下用于稳定输入形状)
+        self.segment_multiple = 1
+
+    def forward(self, x_bytes: Tensor, pad_mask: Tensor = None, return_embeddings: bool = False):
+        """
+        return_embeddings=False: 返回 logits [B, label_size]
+        return_embeddings=True: 返回 (logits, cls_embedding [B, H], encoder_pooled [B, H])，
+        encoder_pooled 为 ByteEncoder 输出在有效字节上的平均 (float32)
+        """
+        if self.profiler is not None:
+            with self.profiler.stage("encoder"):
+                h = self.encoder(x_bytes, pad_mask)
+        else:
+            h = self.encoder(x_bytes, pad_mask)
+        out = self.decode_hidden(h, pad_mask, return_cls=return_embeddings)
+        if return_embeddings:
+            return (*out, pool_encoder_states(h, pad_mask))
+        return out
+
+    def decode_hidden(self, h: Tensor, pad_mask: Tensor = None, return_cls: bool = False):
+        """从编码器输出 h 继续：边界预测 + downsample + 解码 (h 由别处算出时使用，如 lark.prefix_cache)"""
+        if self.profiler is not None:
+            return self._profiled_decode(h, pad_mask, return_cls)
         hard_boundary = self.predictor(h, pad_mask)
-        segment_embeddings, segment_mask = downsample_batch(h, hard_boundary, self.encoder)
-        return self.decoder(segment_embeddings, segment_mask)
+        if self.regroup_decoder:
+            return self._regrouped_decode(h, hard_boundary, return_cls=return_cls)
+        segment_embeddings, segment_mask = downsample_batch(h, hard_boundary, self.encoder,
+                                                            self.segment_multiple)
+        return self.decoder(segment_embeddings, segment_mask, return_cls=return_cls)
+
+    def _profiled_decode(self, h: Tensor, pad_mask: Tensor = None, return_cls: bool = False):
+        """与 decode_hidden 相同，但记录每个阶段的耗时和形状"""
+        prof = self.profiler
+        with prof.stage("boundary"):
+            hard_boundary = self.predictor(h, pad_mask)
+        if self.regroup_decoder:
+            return self._regrouped_decode(h, hard_boundary, prof, return_cls=return_cls)
+        with prof.stage("downsample"):
+            segment_embeddings, segment_mask = downsample_batch(h, hard_boundary, self.encoder,
+                                                                self.segment_multiple)
+        prof.annotate(segment_len=segment_mask.shape[1],
+                      real_segments=int(segment_mask.sum().item()))
+        with prof.stage("decoder"):
+            return self.decoder(segment_embeddings, segment_mask, return_cls=return_cls)
+
+    def _regrouped_decode(self, h: Tensor, hard_boundary: Tensor, prof=None, return_cls: bool = False):
+        """
+        按 segment 数对行重新分组，分别 downsample + 解码，再恢复原始顺序。
+
+        避免少数碎片化严重的行把整个 batch 的解码器输入都 pad 到最长。
+        """
+        groups = regroup_by_segments(hard_boundary.sum(dim=1),
+                                     self.regroup_tolerance, self.regroup_min_size)
+        logits = None
+        cls = h.new_empty(h.shape[0], h.shape[-1]) if return_cls else None
+        padded_segments = 0
+        for idx in groups:
+            if prof is not None:
+                with prof.stage("downsample"):
+                    seg_emb, seg_mask = downsample_batch(h[idx], hard_boundary[idx],
+                                                      self.encoder, self.segment_multiple)
+                with prof.stage("decoder"):
+                    group_out = self.decoder(seg_emb, seg_mask, return_cls=return_cls)
+                padded_segments += seg_mask.numel()
+            else:
+                seg_emb, seg_mask = downsample_batch(h[idx], hard_boundary[idx],
+                                                      self.encoder, self.segment_multiple)
+                group_out = self.decoder(seg_emb, seg_mask, return_cls=return_cls)
+            if return_cls:
+                group_logits, cls[idx] = group_out
+            else:
+                group_logits = group_out
+            if logits is None:
+                logits = group_logits.new_empty(h.shape[0], group_logits.shape[-1])
+            logits[idx] = group_logits
+        if prof is not None:
+            prof.annotate(segment_len=int(hard_boundary.sum(dim=1).max().item()),
+                          padded_segments=padded_segments,
+                          real_segments=int(hard_boundary.sum().item()),
+                          decoder_groups=len(groups))
+        if return_cls:
+            return logits, cls
+        return logits
+
+
+def pool_encoder_states(h: Tensor, pad_mask: Tensor = None) -> Tensor:
+    """ByteEncoder 输出在有效字节上的平均池化 (float32)，pad_mask 为 None 时对全部位置平均"""
+    if pad_mask is None:
+        return h.float().mean(dim=1)
+    mask = pad_mask.unsqueeze(-1).float()
+    return (h.float() * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1.0)
+
+
+def regroup_by_segments(seg_counts: Tensor, tolerance: float = 0.25,
+                        min_size: int = 4) -> list:
+    """
+    将行按 segment 数分组，返回每组的行索引 (LongTensor) 列表。
+
+    行按 segment 数升序排列后贪心切分：当某行的 segment 数超过当前组最小值的
+    (1 + tolerance) 倍 (+1) 且当前组已有至少 min_size 行时开启新组，
+    以免生成过多过小的解码器 batch。
+    """
+    order = torch.argsort(seg_counts)
+    counts = seg_counts[order].tolist()
+    groups = []
+    start = 0
+    for i in range(1, len(counts)):
+        if counts[i] > counts[start] * (1 + tolerance) + 1 and i - start >= min_size:
+            groups.append(order[start:i])
+            start = i
+    groups.append(order[start:])
+    return groups
 
 
 # ---------------------- 工具函数 ----------------------
@@ -251,14 +408,13 @@ def model_size_in_mb(model: nn.Module, dtype=torch.float32) -> float:
     if dtype not in dtype_to_bytes:
         raise ValueError(f"Unsupported dtype {dtype}")
     element_bytes = dtype_to_bytes[dtype]
-    param_size = sum(p.numel() * element_bytes for p in model.parameters())
-    buffer_size = sum(b.numel() * element_bytes for b in model.buffers())
-    return (param_size + buffer_size) / (1024 ** 2)
+    # state_dict = 参数 + 持久化 buffer (不含 causal_mask 这类运行时缓存)
+    return sum(t.numel() * element_bytes for t in model.state_dict().values()) / (1024 ** 2)
 
 
 __all__ = [
     "ByteEncoder", "BatchBoundaryPredictor", "Decoder",
-    "LarkModel", "model_size_in_mb"
+    "LarkModel", "model_size_in_mb", "pool_encoder_states", "regroup_by_segments"
 ]
 
 
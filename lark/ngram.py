@@ -0,0 +1,303 @@
+"""
+Hashed byte n-gram classifier used as the first stage of a detection cascade
+
+Every text is framed by a separator byte and its byte 1-, 2- and 3-grams
+are hashed into ``n_buckets`` rows of a [n_buckets, labels] weight table.
+A text's logits are the mean of its n-gram rows plus a bias, computed for a
+whole batch with one ``embedding_bag`` call (array operations only, no
+[n_grams, labels] intermediate). Models are trained with the same function,
+either on gold labels or distilled from ``LarkModel`` probabilities, and
+saved as a small ``.npz`` file::
+
+    weights  float16 [n_buckets, n_labels]
+    bias     float32 [n_labels]
+    orders   int64 n-gram orders
+    labels   label names in id order (``all_dataset_labels.json`` order)
+
+``LarkDetector(cascade=...)`` answers texts the n-gram model is confident
+about and escalates the rest to the transformer.
+"""
+
+import time
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from torch import nn
+
+from .evaluate import classification_metrics
+
+
+NGRAM_ORDERS = (1, 2, 3)
+SEPARATOR = 0
+_FNV_PRIME = np.uint32(16777619)
+_ORDER_SEED = np.uint32(0x9E3779B1)
+
+
+def hash_ngrams(texts: Sequence[str], n_buckets: int, orders: Sequence[int] = NGRAM_ORDERS,
+                max_bytes: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hash the byte n-grams of a batch of texts.
+
+    Each text is truncated to ``max_bytes`` UTF-8 bytes and framed by one
+    separator byte on each side, so start and end n-grams are features and
+    no n-gram spans two texts.
+
+    Args:
+        texts: Input texts
+        n_buckets: Size of the hashed feature space
+        orders: N-gram orders
+        max_bytes: Bytes per text considered
+
+    Returns:
+        Tuple of (buckets, offsets): int64 bucket ids grouped by text and
+        int64 [B] start of each text's group, the ``embedding_bag`` layout
+    """
+    encoded = [text.encode("utf-8")[:max_bytes] for text in texts]
+    sep = bytes([SEPARATOR])
+    data = np.frombuffer(sep + (sep + sep).join(encoded) + sep, dtype=np.uint8)
+    lengths = np.fromiter((len(e) + 2 for e in encoded), dtype=np.int64, count=len(encoded))
+    text_id = np.repeat(np.arange(len(encoded)), lengths)
+
+    ids, buckets = [], []
+    for n in orders:
+        count = len(data) - n + 1
+        if count <= 0:
+            continue
+        with np.errstate(over="ignore"):
+            h = np.full(count, _ORDER_SEED * np.uint32(n), dtype=np.uint32)
+            for k in range(n):
+                h = (h ^ data[k:k + count]) * _FNV_PRIME
+        valid = text_id[:count] == text_id[n - 1:]
+        ids.append(text_id[:count][valid])
+        buckets.append((h[valid] % np.uint32(n_buckets)).astype(np.int64))
+
+    text_ids = np.concatenate(ids)
+    order = np.argsort(text_ids, kind="stable")
+    counts = np.bincount(text_ids, minlength=len(encoded))
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+    return np.concatenate(buckets)[order], offsets
+
+
+class NgramClassifier:
+    """
+    Linear classifier over hashed byte n-grams.
+
+    Args:
+        weights: [n_buckets, n_labels] weight table
+        bias: [n_labels] bias
+        labels: Label names in id order
+        orders: N-gram orders
+        max_bytes: Bytes per text considered
+    """
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, labels: List[str],
+                 orders: Sequence[int] = NGRAM_ORDERS, max_bytes: int = 1024):
+        self.weights = torch.from_numpy(np.ascontiguousarray(weights, dtype=np.float32))
+        self.bias = torch.from_numpy(np.ascontiguousarray(bias, dtype=np.float32))
+        self.labels = list(labels)
+        self.orders = tuple(int(n) for n in orders)
+        self.max_bytes = max_bytes
+
+    @property
+    def n_buckets(self) -> int:
+        return self.weights.shape[0]
+
+    @classmethod
+    def load(cls, path: str) -> "NgramClassifier":
+        """Load a model written by ``save``."""
+        with np.load(path, allow_pickle=False) as f:
+            return cls(f["weights"], f["bias"], f["labels"].tolist(), f["orders"].tolist(),
+                       int(f["max_bytes"]))
+
+    def save(self, path: str):
+        """Write the model as ``.npz`` with float16 weights."""
+        with open(path, "wb") as f:
+            np.savez_compressed(f, weights=self.weights.numpy().astype(np.float16),
+                                bias=self.bias.numpy(), labels=np.asarray(self.labels),
+                                orders=np.asarray(self.orders, dtype=np.int64),
+                                max_bytes=np.int64(self.max_bytes))
+
+    def logits(self, texts: Sequence[str]) -> torch.Tensor:
+        """Float32 [B, n_labels] logits."""
+        if not texts:
+            return torch.zeros(0, len(self.labels))
+        buckets, offsets = hash_ngrams(texts, self.n_buckets, self.orders, self.max_bytes)
+        return F.embedding_bag(torch.from_numpy(buckets), self.weights,
+                               torch.from_numpy(offsets), mode="mean") + self.bias
+
+    def predict_proba(self, texts: Sequence[str]) -> torch.Tensor:
+        """Float32 [B, n_labels] probabilities."""
+        return torch.softmax(self.logits(texts), dim=-1)
+
+
+def train_ngram(texts: Sequence[str], targets: torch.Tensor, labels: List[str],
+                n_buckets: int = 1 << 16, orders: Sequence[int] = NGRAM_ORDERS,
+                max_bytes: int = 1024, epochs: int = 5, batch_size: int = 256,
+                lr: float = 0.05, seed: int = 0) -> NgramClassifier:
+    """
+    Train an ``NgramClassifier``.
+
+    Args:
+        texts: Training texts
+        targets: int64 [N] label ids, or float [N, n_labels] soft targets
+            (teacher probabilities) for distillation
+        labels: Label names in id order
+        n_buckets: Size of the hashed feature space
+        orders: N-gram orders
+        max_bytes: Bytes per text considered
+        epochs: Passes over the data
+        batch_size: Texts per optimizer step
+        lr: Adam learning rate
+        seed: Shuffling and initialization seed
+
+    Returns:
+        The trained classifier
+    """
+    generator = torch.Generator().manual_seed(seed)
+    table = nn.EmbeddingBag(n_buckets, len(labels), mode="mean", sparse=True)
+    nn.init.zeros_(table.weight)
+    bias = nn.Parameter(torch.zeros(len(labels)))
+    optimizers = [torch.optim.SparseAdam(table.parameters(), lr=lr), torch.optim.Adam([bias], lr=lr)]
+    soft = targets.dtype.is_floating_point
+
+    for _ in range(epochs):
+        permutation = torch.randperm(len(texts), generator=generator).tolist()
+        for i in range(0, len(texts), batch_size):
+            rows = permutation[i:i + batch_size]
+            buckets, offsets = hash_ngrams([texts[r] for r in rows], n_buckets, orders, max_bytes)
+            logits = table(torch.from_numpy(buckets), torch.from_numpy(offsets)) + bias
+            target = targets[rows]
+            if soft:
+                loss = -(target.float() * F.log_softmax(logits, dim=-1)).sum(dim=-1).mean()
+            else:
+                loss = F.cross_entropy(logits, target)
+            for optimizer in optimizers:
+                optimizer.zero_grad()
+            loss.backward()
+            for optimizer in optimizers:
+                optimizer.step()
+
+    return NgramClassifier(table.weight.detach().numpy(), bias.detach().numpy(), labels,
+                           orders, max_bytes)
+
+
+def teacher_probabilities(detector, texts: Sequence[str], max_len: int = 1024,
+                          batch_size: int = 256) -> torch.Tensor:
+    """Float32 [N, n_labels] ``LarkModel`` probabilities used as distillation targets."""
+    chunks = []
+    for i in range(0, len(texts), batch_size):
+        _, probabilities = detector._transformer_predict_batch(list(texts[i:i + batch_size]), max_len)
+        chunks.append(probabilities.float())
+    return torch.cat(chunks) if chunks else torch.zeros(0, len(detector.id2label))
+
+
+def cascade_report(detector, classifier: NgramClassifier, examples: Sequence[Tuple[str, str]],
+                   thresholds: Sequence[float] = (0.5, 0.7, 0.8, 0.9, 0.95, 0.99),
+                   max_len: int = 1024, batch_size: int = 256) -> Dict:
+    """
+    Escalation rate and accuracy of the cascade against the transformer alone.
+
+    The transformer and the n-gram model each run once over ``examples``;
+    the cascade at every threshold takes the n-gram prediction where its
+    confidence reaches the threshold and the transformer's elsewhere.
+    Cascade throughput is estimated from the two measured stage costs.
+
+    Args:
+        detector: ``LarkDetector`` (the transformer alone)
+        classifier: N-gram first stage
+        examples: (text, label) pairs; labels unknown to the model only count
+            towards agreement
+        thresholds: Confidence thresholds to report
+        max_len: Maximum sequence length of the transformer
+        batch_size: Texts per call
+
+    Returns:
+        Dict with ``transformer`` and ``ngram`` stage results and one
+        ``cascade`` row per threshold (``escalation_rate``, ``accuracy``,
+        ``macro_f1``, ``agreement`` with the transformer, estimated
+        ``texts_per_s``)
+    """
+    texts = [text for text, _ in examples]
+    gold = np.fromiter((detector.label2id.get(label, -1) for _, label in examples),
+                       dtype=np.int64, count=len(examples))
+    labels = [detector.id2label[i] for i in range(len(detector.id2label))]
+
+    def timed(predict):
+        start = time.perf_counter()
+        chunks = [predict(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+        seconds = time.perf_counter() - start
+        probabilities = torch.cat(chunks) if chunks else torch.zeros(0, len(labels))
+        confidence, predicted = probabilities.float().max(dim=-1)
+        return predicted.numpy(), confidence.numpy(), seconds
+
+    model_pred, _, model_seconds = timed(
+        lambda chunk: detector._transformer_predict_batch(chunk, max_len)[1])
+    ngram_pred, ngram_conf, ngram_seconds = timed(classifier.predict_proba)
+
+    known = gold >= 0
+    n_labels = len(labels)
+
+    def scored(predicted, **extra):
+        confusion = np.bincount(gold[known] * n_labels + predicted[known],
+                                minlength=n_labels * n_labels).reshape(n_labels, n_labels)
+        metrics = classification_metrics(confusion, labels)
+        return {"accuracy": metrics["accuracy"], "macro_f1": metrics["macro"]["f1"], **extra}
+
+    def rate(seconds):
+        return len(texts) / seconds if seconds else 0.0
+
+    report = {
+        "texts": len(texts),
+        "transformer": scored(model_pred, texts_per_s=rate(model_seconds)),
+        "ngram": scored(ngram_pred, texts_per_s=rate(ngram_seconds),
+                        agreement=float(np.mean(ngram_pred == model_pred)) if len(texts) else 0.0),
+        "cascade": [],
+    }
+    for threshold in thresholds:
+        escalated = ngram_conf < threshold
+        predicted = np.where(escalated, model_pred, ngram_pred)
+        escalation_rate = float(escalated.mean()) if len(texts) else 0.0
+        report["cascade"].append(scored(
+            predicted, threshold=threshold, escalation_rate=escalation_rate,
+            agreement=float(np.mean(predicted == model_pred)) if len(texts) else 0.0,
+            texts_per_s=rate(ngram_seconds + escalation_rate * model_seconds),
+        ))
+    return report
+
+
+def build_ngram(detector, examples: Sequence[Tuple[str, str]], distill: bool = True,
+                n_buckets: int = 1 << 16, orders: Sequence[int] = NGRAM_ORDERS,
+                max_len: int = 1024, epochs: int = 5, batch_size: int = 256,
+                lr: float = 0.05, seed: int = 0) -> NgramClassifier:
+    """
+    Train an n-gram first stage for ``detector``.
+
+    Args:
+        detector: ``LarkDetector`` whose labels (and, when distilling,
+            predictions) are used
+        examples: (text, label) pairs; with ``distill=True`` the labels are
+            ignored and the transformer's probabilities are the targets
+        distill: Distill from the transformer instead of the gold labels
+        n_buckets, orders, epochs, batch_size, lr, seed: See ``train_ngram``
+        max_len: Bytes per text for both the teacher and the n-gram model
+
+    Returns:
+        The trained classifier
+    """
+    labels = [detector.id2label[i] for i in range(len(detector.id2label))]
+    if distill:
+        texts = [text for text, _ in examples]
+        targets = teacher_probabilities(detector, texts, max_len=max_len, batch_size=batch_size)
+    else:
+        known = [(text, detector.label2id[label]) for text, label in examples
+                 if label in detector.label2id]
+        texts = [text for text, _ in known]
+        targets = torch.tensor([y for _, y in known], dtype=torch.int64)
+    return train_ngram(texts, targets, labels, n_buckets=n_buckets, orders=orders,
+                       max_bytes=max_len, epochs=epochs, batch_size=batch_size, lr=lr, seed=seed)
+
+
+__all__ = ["NgramClassifier", "build_ngram", "cascade_report", "hash_ngrams",
+           "teacher_probabilities", "train_ngram"]
@@ -0,0 +1,119 @@
+"""
+Memory- and token-budget batch planning for large detect_batch calls
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Attention weights plus softmax temporaries, in multiples of one
+# [B, heads, L, L] tensor; calibrated against peak RSS on CPU and kept
+# slightly conservative.
+ATTENTION_FACTOR = 1.25
+# Per-token [B, L, d_model] tensors alive inside one layer: q/k/v,
+# attention output, residual and two norms.
+HIDDEN_TENSORS = 7
+
+
+class BatchPlanner:
+    """
+    Splits a list of texts into sub-batches whose estimated activation
+    memory and token count fit a budget.
+
+    Texts are sorted by UTF-8 length and each sub-batch is padded only to
+    its own longest text (rounded up to ``length_multiple``), not to
+    ``max_len``. The encoder sees [B, L] bytes and [B, heads, L, L]
+    attention scores per layer; the decoder sees at most as many segments
+    as bytes, so the encoder layer bounds the peak::
+
+        bytes(B, L) = B * L * dtype_bytes * (ATTENTION_FACTOR * heads * L
+                                             + HIDDEN_TENSORS * d_model + ff)
+
+    Sub-batches grow greedily from the longest text. A new sub-batch is
+    started when the next text would break a budget, or when it is shorter
+    than ``length_ratio`` of the current padded length and the current
+    sub-batch already holds ``min_batch_size`` texts (so one long text does
+    not force padding on many short ones).
+
+    Args:
+        memory_budget_mb: Activation memory ceiling per forward pass
+        token_budget: Optional ceiling on B * L per forward pass
+        min_batch_size: Smallest sub-batch split off for length reasons only
+        length_multiple: Padded lengths are rounded up to this multiple
+        length_ratio: Length drop that justifies a new sub-batch
+    """
+
+    def __init__(self, memory_budget_mb: Optional[float] = 512, token_budget: Optional[int] = None,
+                 min_batch_size: int = 8, length_multiple: int = 16, length_ratio: float = 0.5):
+        self.memory_budget_mb = memory_budget_mb
+        self.token_budget = token_budget
+        self.min_batch_size = min_batch_size
+        self.length_multiple = length_multiple
+        self.length_ratio = length_ratio
+        # Architecture of the released checkpoint until bind() is called
+        self.d_model = 256
+        self.n_heads = 8
+        self.ff = 512
+        self.dtype_bytes = 2
+
+    def bind(self, model) -> "BatchPlanner":
+        """Read the dimensions and compute precision of a ``LarkModel``."""
+        config = model.config
+        widths = []
+        for value in (config["ff"], config.get("encoder_ff"), config.get("decoder_ff")):
+            if value is not None:
+                widths.extend(value if isinstance(value, (list, tuple)) else [value])
+        self.d_model = config["d_model"]
+        self.n_heads = config["n_heads"]
+        self.ff = max(widths)
+        self.dtype_bytes = next(model.parameters()).element_size()
+        return self
+
+    def estimate_bytes(self, batch_size: int, seq_len: int) -> int:
+        """Estimated peak activation bytes of one forward pass of shape [batch_size, seq_len]."""
+        per_token = ATTENTION_FACTOR * self.n_heads * seq_len + HIDDEN_TENSORS * self.d_model + self.ff
+        return int(batch_size * seq_len * self.dtype_bytes * per_token)
+
+    def padded_length(self, n_bytes: np.ndarray, max_len: int) -> np.ndarray:
+        """Sequence length (START + bytes + END, rounded up) each text needs."""
+        multiple = max(self.length_multiple, 1)
+        needed = -(-(np.asarray(n_bytes, dtype=np.int64) + 2) // multiple) * multiple
+        return np.minimum(needed, max_len)
+
+    def plan(self, byte_lengths: Sequence[int], max_len: int) -> List[Tuple[np.ndarray, int]]:
+        """
+        Plan sub-batches.
+
+        Args:
+            byte_lengths: UTF-8 length of each text
+            max_len: Maximum sequence length of the call
+
+        Returns:
+            List of (row indices into the input, padded sequence length)
+        """
+        padded = self.padded_length(byte_lengths, max_len)
+        order = np.argsort(-padded, kind="stable")
+        memory_budget = (self.memory_budget_mb * 1024 ** 2
+                         if self.memory_budget_mb is not None else None)
+
+        groups = []
+        start = 0
+        for i in range(1, len(order)):
+            seq_len = int(padded[order[start]])
+            size = i - start + 1
+            over_budget = (
+                (memory_budget is not None and self.estimate_bytes(size, seq_len) > memory_budget)
+                or (self.token_budget is not None and size * seq_len > self.token_budget)
+            )
+            shorter = (padded[order[i]] <= seq_len * self.length_ratio
+                       and i - start >= self.min_batch_size)
+            if over_budget or shorter:
+                groups.append((order[start:i], seq_len))
+                start = i
+        if len(order):
+            groups.append((order[start:], int(padded[order[start]])))
+        return groups
+
+
+__all__ = ["BatchPlanner"]
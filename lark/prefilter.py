@@ -0,0 +1,194 @@
+"""
+Cheap pre-model classification of trivial and single-script inputs
+"""
+
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Scripts that, among the supported labels, are used by exactly one language
+SINGLE_LABEL_SCRIPTS: Dict[str, str] = {
+    "Armenian": "hy",
+    "Ethiopic": "am",
+    "Georgian": "ka",
+    "Greek": "el",
+    "Gujarati": "gu",
+    "Gurmukhi": "pa",
+    "Hangul": "ko",
+    "Kana": "ja",
+    "Kannada": "kn",
+    "Khmer": "km",
+    "Malayalam": "ml",
+    "Myanmar": "my",
+    "Oriya": "or",
+    "Sinhala": "si",
+    "Tamil": "ta",
+    "Telugu": "te",
+    "Thai": "th",
+    "Tibetan": "dz",
+}
+
+# (first, last, script) code point ranges. "Common" covers characters that
+# carry no language information: whitespace, digits, punctuation, symbols
+# and emoji. Anything not listed falls into "Other" and goes to the model.
+SCRIPT_RANGES: List[Tuple[int, int, str]] = [
+    (0x0000, 0x002F, "Common"), (0x0030, 0x0039, "Common"), (0x003A, 0x0040, "Common"),
+    (0x005B, 0x0060, "Common"), (0x007B, 0x00BF, "Common"),
+    (0x00D7, 0x00D7, "Common"), (0x00F7, 0x00F7, "Common"),
+    (0x02B9, 0x02FF, "Common"),
+    (0x0370, 0x03FF, "Greek"), (0x1F00, 0x1FFF, "Greek"),
+    (0x0530, 0x058F, "Armenian"), (0xFB13, 0xFB17, "Armenian"),
+    (0x0A00, 0x0A7F, "Gurmukhi"),
+    (0x0A80, 0x0AFF, "Gujarati"),
+    (0x0B00, 0x0B7F, "Oriya"),
+    (0x0B80, 0x0BFF, "Tamil"),
+    (0x0C00, 0x0C7F, "Telugu"),
+    (0x0C80, 0x0CFF, "Kannada"),
+    (0x0D00, 0x0D7F, "Malayalam"),
+    (0x0D80, 0x0DFF, "Sinhala"),
+    (0x0E00, 0x0E7F, "Thai"),
+    (0x0F00, 0x0FFF, "Tibetan"),
+    (0x1000, 0x109F, "Myanmar"), (0xA9E0, 0xA9FF, "Myanmar"), (0xAA60, 0xAA7F, "Myanmar"),
+    (0x10A0, 0x10FF, "Georgian"), (0x1C90, 0x1CBF, "Georgian"), (0x2D00, 0x2D2F, "Georgian"),
+    (0x1100, 0x11FF, "Hangul"), (0x3130, 0x318F, "Hangul"), (0xA960, 0xA97F, "Hangul"),
+    (0xAC00, 0xD7AF, "Hangul"), (0xD7B0, 0xD7FF, "Hangul"),
+    (0x1200, 0x139F, "Ethiopic"), (0x2D80, 0x2DDF, "Ethiopic"), (0xAB00, 0xAB2F, "Ethiopic"),
+    (0x1780, 0x17FF, "Khmer"), (0x19E0, 0x19FF, "Khmer"),
+    (0x2000, 0x2BFF, "Common"),
+    (0x3000, 0x303F, "Common"),
+    (0x3040, 0x30FF, "Kana"), (0x31F0, 0x31FF, "Kana"),
+    (0xFE30, 0xFE4F, "Common"),
+    (0xFF00, 0xFF20, "Common"), (0xFF3B, 0xFF40, "Common"), (0xFF5B, 0xFF65, "Common"),
+    (0xFF66, 0xFF9F, "Kana"),
+    (0xFFE0, 0xFFFF, "Common"),
+    (0x1F000, 0x1FAFF, "Common"),
+]
+
+UNDEFINED = -2  # empty / only common characters
+TO_MODEL = -1   # needs the model
+
+
+def _build_table(ranges: Sequence[Tuple[int, int, str]], scripts: List[str]):
+    """Build sorted boundaries and per-interval script ids for searchsorted."""
+    script_id = {name: i for i, name in enumerate(scripts)}
+    other = script_id["Other"]
+    points = sorted(ranges)
+    starts, ids = [0], [other]
+    for first, last, name in points:
+        if starts[-1] == first:
+            ids[-1] = script_id[name]
+        else:
+            starts.append(first)
+            ids.append(script_id[name])
+        starts.append(last + 1)
+        ids.append(other)
+    return np.asarray(starts, dtype=np.int64), np.asarray(ids, dtype=np.int64)
+
+
+class Prefilter:
+    """
+    Vectorized Unicode-script pre-classification for ``LarkDetector``.
+
+    Texts that are empty or contain only common characters (whitespace,
+    digits, punctuation, symbols) are resolved as ``undefined_label``;
+    texts whose letters all belong to one script used by a single supported
+    label (e.g. Georgian -> ``ka``) are resolved to that label. Everything
+    else is left for the model.
+
+    Args:
+        label2id: Label to id mapping of the detector
+        resolve_undefined: Resolve empty / common-only texts without the model
+        resolve_scripts: Resolve single-label-script texts without the model
+        undefined_label: Label returned for undefined texts
+        script_confidence: Confidence reported for script-resolved texts
+        script_labels: Optional override of ``SINGLE_LABEL_SCRIPTS``
+    """
+
+    def __init__(self, label2id: Dict[str, int], resolve_undefined: bool = True,
+                 resolve_scripts: bool = True, undefined_label: str = "unknown",
+                 script_confidence: float = 1.0,
+                 script_labels: Optional[Dict[str, str]] = None):
+        self.resolve_undefined = resolve_undefined
+        self.resolve_scripts = resolve_scripts
+        self.undefined_label = undefined_label
+        self.script_confidence = script_confidence
+
+        script_labels = SINGLE_LABEL_SCRIPTS if script_labels is None else script_labels
+        scripts = ["Other", "Common"] + sorted({name for _, _, name in SCRIPT_RANGES} - {"Common"})
+        self._common = scripts.index("Common")
+        self._starts, self._ids = _build_table(SCRIPT_RANGES, scripts)
+        # script id -> label id, or TO_MODEL if the script is ambiguous
+        self._script_label = np.full(len(scripts), TO_MODEL, dtype=np.int64)
+        for name, label in script_labels.items():
+            if name in scripts and label in label2id:
+                self._script_label[scripts.index(name)] = label2id[label]
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear the counters."""
+        with self._lock:
+            self.counts = {"texts": 0, "undefined": 0, "script": 0, "model": 0}
+
+    def classify(self, texts: List[str], count: bool = True) -> np.ndarray:
+        """
+        Pre-classify a batch of texts.
+
+        Args:
+            texts: Texts to classify
+            count: Add the batch to ``stats()``; False for a side-effect-free
+                re-classification of texts already counted
+
+        Returns:
+            int64 array of shape [B]: a label id for script-resolved texts,
+            ``UNDEFINED`` for empty / common-only texts and ``TO_MODEL``
+            for texts that need the model
+        """
+        n = len(texts)
+        result = np.full(n, TO_MODEL, dtype=np.int64)
+        if n == 0:
+            return result
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=n)
+        nonempty = lengths > 0
+        if nonempty.any():
+            encoded = "".join(texts).encode("utf-32-le", "surrogatepass")
+            codepoints = np.frombuffer(encoded, dtype=np.uint32)
+            ids = self._ids[np.searchsorted(self._starts, codepoints, side="right") - 1]
+            common = ids == self._common
+            offsets = (np.cumsum(lengths) - lengths)[nonempty]
+            row_max = np.maximum.reduceat(np.where(common, -1, ids), offsets)
+            row_min = np.minimum.reduceat(np.where(common, np.iinfo(np.int64).max, ids), offsets)
+
+            rows = np.flatnonzero(nonempty)
+            only_common = row_max < 0
+            if self.resolve_undefined:
+                result[rows[only_common]] = UNDEFINED
+            if self.resolve_scripts:
+                single = ~only_common & (row_min == row_max)
+                result[rows[single]] = self._script_label[row_max[single]]
+        if self.resolve_undefined:
+            result[~nonempty] = UNDEFINED
+        if not count:
+            return result
+
+        undefined = int((result == UNDEFINED).sum())
+        to_model = int((result == TO_MODEL).sum())
+        with self._lock:
+            self.counts["texts"] += n
+            self.counts["undefined"] += undefined
+            self.counts["model"] += to_model
+            self.counts["script"] += n - undefined - to_model
+        return result
+
+    def stats(self) -> Dict:
+        """Counters and the share of texts resolved without the model."""
+        with self._lock:
+            counts = dict(self.counts)
+        counts["skipped_ratio"] = (1 - counts["model"] / counts["texts"]) if counts["texts"] else 0.0
+        return counts
+
+
+__all__ = ["Prefilter", "SINGLE_LABEL_SCRIPTS", "TO_MODEL", "UNDEFINED"]
@@ -0,0 +1,261 @@
+"""
+Shared-prefix cache of ``ByteEncoder`` states
+
+``ByteEncoder`` is causal: the hidden states of the first P positions
+depend only on the first P tokens. Inputs that share a long fixed prefix
+(notification templates, ``"RT @"``, email quote headers) therefore share
+those states exactly, and only the suffix needs to be encoded.
+
+``PrefixCache`` counts the leading tokens of every input in a bounded
+counting trie. Once a prefix of at least ``min_prefix`` tokens has been seen
+``min_count`` times, its per-layer attention keys and values and its final
+hidden states are computed once and stored in a second trie, which is
+bounded by ``max_bytes`` with least-recently-used eviction. An input whose
+longest cached prefix has P tokens is then encoded from position P on,
+attending to the cached keys and values (``encode``); the boundary
+predictor and decoder see the full sequence as before.
+
+``stats()`` reports lookups, hit rate and the number of token positions
+(bytes) that were not encoded thanks to the cache.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import torch
+import torch.nn.functional as F
+from torch import Tensor
+
+from .model import ByteEncoder
+
+
+class PrefixState:
+    """Cached encoder state of one prefix: per-layer keys/values [P, D] and final hidden states [P, D]."""
+
+    __slots__ = ("tokens", "keys", "values", "hidden", "nbytes")
+
+    def __init__(self, tokens: Tuple[int, ...], keys: List[Tensor], values: List[Tensor], hidden: Tensor):
+        self.tokens = tokens
+        self.keys = keys
+        self.values = values
+        self.hidden = hidden
+        self.nbytes = sum(t.numel() * t.element_size() for t in (*keys, *values, hidden))
+
+    @property
+    def length(self) -> int:
+        return len(self.tokens)
+
+
+def _attention(layer: torch.nn.TransformerEncoderLayer, src: Tensor, attn_mask: Tensor,
+               past: Optional[Tuple[Tensor, Tensor]]) -> Tuple[Tensor, Tensor, Tensor]:
+    """Self-attention of ``src`` over ``past`` keys/values and itself; returns (output, keys, values)."""
+    mha = layer.self_attn
+    B, S, D = src.shape
+    heads = mha.num_heads
+    q, keys, values = F.linear(src, mha.in_proj_weight, mha.in_proj_bias).chunk(3, dim=-1)
+    k, v = keys, values
+    if past is not None:
+        k = torch.cat([past[0].expand(B, -1, -1), k], dim=1)
+        v = torch.cat([past[1].expand(B, -1, -1), v], dim=1)
+    q, k, v = (t.reshape(B, t.shape[1], heads, D // heads).transpose(1, 2) for t in (q, k, v))
+    out = F.scaled_dot_product_attention(q, k, v, attn_mask=attn_mask)
+    return mha.out_proj(out.transpose(1, 2).reshape(B, S, D)), keys, values
+
+
+def _layer_forward(layer: torch.nn.TransformerEncoderLayer, x: Tensor, attn_mask: Tensor,
+                   past: Optional[Tuple[Tensor, Tensor]] = None) -> Tuple[Tensor, Tensor, Tensor]:
+    """
+    One ``TransformerEncoderLayer`` (eval mode) whose queries also attend to
+    ``past`` keys/values.
+
+    Returns:
+        (output [B, S, D], keys [B, S, D], values [B, S, D]) of the new positions
+    """
+    def feed_forward(src: Tensor) -> Tensor:
+        return layer.linear2(layer.activation(layer.linear1(src)))
+
+    if layer.norm_first:
+        out, keys, values = _attention(layer, layer.norm1(x), attn_mask, past)
+        x = x + out
+        x = x + feed_forward(layer.norm2(x))
+    else:
+        out, keys, values = _attention(layer, x, attn_mask, past)
+        x = layer.norm1(x + out)
+        x = layer.norm2(x + feed_forward(x))
+    return x, keys, values
+
+
+def encode(encoder: ByteEncoder, token_ids: Tensor, pad_mask: Tensor,
+           prefix: Optional[PrefixState] = None) -> Tuple[Tensor, List[Tensor], List[Tensor]]:
+    """
+    Encode ``token_ids`` as the continuation of ``prefix``.
+
+    Args:
+        encoder: The model's ``ByteEncoder``
+        token_ids: [B, S] suffix token ids (positions P .. P+S-1)
+        pad_mask: [B, S] 1 = valid, 0 = padding
+        prefix: Cached state of the first P tokens shared by every row, or
+            None to encode from position 0
+
+    Returns:
+        (hidden [B, S, D], per-layer keys, per-layer values), the latter
+        [B, S, D] each
+    """
+    B, S = token_ids.shape
+    P = 0 if prefix is None else prefix.length
+    x = encoder.byte_emb(token_ids) + encoder.pos_emb[:, P:P + S, :]
+    # Query i (position P+i) sees every prefix position and valid suffix positions up to P+i
+    causal = ~encoder.causal_mask[P:P + S, :P + S]
+    valid = torch.cat([torch.ones(B, P, dtype=torch.bool), pad_mask.bool()], dim=1)
+    attn_mask = (causal.unsqueeze(0) & valid.unsqueeze(1)).unsqueeze(1)
+    keys, values = [], []
+    for i, layer in enumerate(encoder.encoder.layers):
+        past = None if prefix is None else (prefix.keys[i], prefix.values[i])
+        x, k, v = _layer_forward(layer, x, attn_mask, past)
+        keys.append(k)
+        values.append(v)
+    return x, keys, values
+
+
+class _Node:
+    __slots__ = ("children", "count", "state")
+
+    def __init__(self):
+        self.children: Dict[int, "_Node"] = {}
+        self.count = 0
+        self.state: Optional[PrefixState] = None
+
+
+class PrefixCache:
+    """
+    Bounded trie of cached encoder prefix states with LRU eviction.
+
+    Args:
+        max_bytes: Memory limit of the cached states
+        min_prefix: Shortest prefix (in tokens, START included) worth caching
+        max_prefix: Longest prefix considered
+        min_count: Times a prefix must be seen before it is cached
+        max_candidates: Counting-trie nodes kept before the counts are reset
+    """
+
+    def __init__(self, max_bytes: int = 64 << 20, min_prefix: int = 8, max_prefix: int = 256,
+                 min_count: int = 2, max_candidates: int = 200_000):
+        self.max_bytes = max_bytes
+        self.min_prefix = max(1, min_prefix)
+        self.max_prefix = max_prefix
+        self.min_count = min_count
+        self.max_candidates = max_candidates
+        self._states = _Node()
+        self._counts = _Node()
+        self._candidates = 0
+        self._lru: "OrderedDict[Tuple[int, ...], PrefixState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.cached_bytes = 0
+        self.lookups = 0
+        self.hits = 0
+        self.bytes_saved = 0
+        self.bytes_encoded = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def lookup(self, tokens: Sequence[int]) -> Optional[PrefixState]:
+        """Longest cached prefix of ``tokens`` that leaves at least one token to encode."""
+        with self._lock:
+            node, best = self._states, None
+            for token in tokens[:len(tokens) - 1]:
+                node = node.children.get(token)
+                if node is None:
+                    break
+                if node.state is not None:
+                    best = node.state
+            if best is not None:
+                self._lru.move_to_end(best.tokens)
+            return best
+
+    def observe(self, tokens: Sequence[int]) -> int:
+        """
+        Count the leading tokens of an input.
+
+        Returns:
+            Length of the longest prefix of ``tokens`` that has been seen at
+            least ``min_count`` times (0 if none is long enough to cache)
+        """
+        limit = min(len(tokens) - 1, self.max_prefix)
+        with self._lock:
+            if self._candidates > self.max_candidates:
+                self._counts, self._candidates = _Node(), 0
+            node, frequent = self._counts, 0
+            for depth, token in enumerate(tokens[:limit], 1):
+                child = node.children.get(token)
+                if child is None:
+                    child = node.children[token] = _Node()
+                    self._candidates += 1
+                child.count += 1
+                if child.count >= self.min_count:
+                    frequent = depth
+                node = child
+        return frequent if frequent >= self.min_prefix else 0
+
+    def insert(self, state: PrefixState):
+        """Store ``state`` and evict least recently used prefixes beyond ``max_bytes``."""
+        if state.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            node = self._states
+            for token in state.tokens:
+                node = node.children.setdefault(token, _Node())
+            if node.state is not None:
+                return
+            node.state = state
+            self._lru[state.tokens] = state
+            self.cached_bytes += state.nbytes
+            while self.cached_bytes > self.max_bytes:
+                _, old = self._lru.popitem(last=False)
+                self._remove(old.tokens)
+                self.cached_bytes -= old.nbytes
+                self.evictions += 1
+
+    def _remove(self, tokens: Tuple[int, ...]):
+        path = [self._states]
+        for token in tokens:
+            path.append(path[-1].children[token])
+        path[-1].state = None
+        # Drop nodes that no longer lead to a cached state
+        for depth in range(len(tokens), 0, -1):
+            node = path[depth]
+            if node.state is not None or node.children:
+                break
+            del path[depth - 1].children[tokens[depth - 1]]
+
+    def record(self, hits: int, lookups: int, saved: int, encoded: int):
+        with self._lock:
+            self.hits += hits
+            self.lookups += lookups
+            self.bytes_saved += saved
+            self.bytes_encoded += encoded
+
+    def clear(self):
+        """Drop every cached prefix and count (statistics are kept)."""
+        with self._lock:
+            self._states, self._counts, self._candidates = _Node(), _Node(), 0
+            self._lru.clear()
+            self.cached_bytes = 0
+
+    def stats(self) -> Dict:
+        """Hit rate, token positions (bytes) saved and encoded, and cache occupancy."""
+        with self._lock:
+            total = self.bytes_saved + self.bytes_encoded
+            return {
+                "lookups": self.lookups, "hits": self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "bytes_saved": self.bytes_saved, "bytes_encoded": self.bytes_encoded,
+                "saved_fraction": self.bytes_saved / total if total else 0.0,
+                "prefixes": len(self._lru), "cached_bytes": self.cached_bytes,
+                "max_bytes": self.max_bytes, "evictions": self.evictions,
+            }
+
+
+__all__ = ["PrefixCache", "PrefixState", "encode"]
@@ -0,0 +1,131 @@
+"""
+Opt-in per-stage timing for the inference hot path
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+
+class StageProfiler:
+    """
+    Records per-stage wall time and batch shape for each inference call.
+
+    The model and detector only touch the profiler when one is attached, so
+    the disabled path costs a single ``is None`` check per call.
+
+    Each call produces a record::
+
+        {"stages": {"tokenize": s, "encoder": s, ...},
+         "batch_size": B, "seq_len": L, "real_bytes": n, "padded_bytes": B * L,
+         "segment_len": S, "real_segments": m, "total": s}
+
+    which is aggregated into ``stats()`` and passed to ``callback`` if given.
+    Regrouped decoding additionally reports ``padded_segments`` and
+    ``decoder_groups``.
+    """
+
+    def __init__(self, callback: Optional[Callable[[Dict], None]] = None,
+                 history: int = 100):
+        self.callback = callback
+        self._history: deque = deque(maxlen=history)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear all aggregated statistics."""
+        with self._lock:
+            self.calls = 0
+            self.stage_totals: Dict[str, float] = {}
+            self.real_bytes = 0
+            self.padded_bytes = 0
+            self.real_segments = 0
+            self.padded_segments = 0
+            self._history.clear()
+
+    def begin(self, **info):
+        """Start a record for the current thread's inference call."""
+        self._local.record = {"stages": {}, **info}
+        self._local.start = time.perf_counter()
+
+    def annotate(self, **info):
+        """Attach shape information to the current record."""
+        record = getattr(self._local, "record", None)
+        if record is not None:
+            record.update(info)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a named stage of the current call."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = getattr(self._local, "record", None)
+            if record is not None:
+                stages = record["stages"]
+                stages[name] = stages.get(name, 0.0) + time.perf_counter() - start
+
+    def end(self) -> Optional[Dict]:
+        """Finish the current record, aggregate it and invoke the callback."""
+        record = getattr(self._local, "record", None)
+        if record is None:
+            return None
+        record["total"] = time.perf_counter() - self._local.start
+        self._local.record = None
+        with self._lock:
+            self.calls += 1
+            for name, seconds in record["stages"].items():
+                self.stage_totals[name] = self.stage_totals.get(name, 0.0) + seconds
+            self.real_bytes += record.get("real_bytes", 0)
+            self.padded_bytes += record.get("padded_bytes", 0)
+            self.real_segments += record.get("real_segments", 0)
+            self.padded_segments += record.get(
+                "padded_segments", record.get("batch_size", 0) * record.get("segment_len", 0))
+            self._history.append(record)
+        if self.callback is not None:
+            self.callback(record)
+        return record
+
+    def records(self) -> List[Dict]:
+        """Most recent per-call records, oldest first."""
+        with self._lock:
+            return list(self._history)
+
+    def stats(self) -> Dict:
+        """
+        Aggregated statistics over all recorded calls.
+
+        Returns:
+            Dict with call count, per-stage total/mean milliseconds and share
+            of time, and real versus padded byte and segment counts
+        """
+        with self._lock:
+            total = sum(self.stage_totals.values())
+            stages = {
+                name: {
+                    "total_ms": seconds * 1000,
+                    "mean_ms": seconds * 1000 / self.calls if self.calls else 0.0,
+                    "share": seconds / total if total else 0.0,
+                }
+                for name, seconds in self.stage_totals.items()
+            }
+            return {
+                "calls": self.calls,
+                "stages": stages,
+                "real_bytes": self.real_bytes,
+                "padded_bytes": self.padded_bytes,
+                "byte_utilization": (self.real_bytes / self.padded_bytes
+                                     if self.padded_bytes else 0.0),
+                "real_segments": self.real_segments,
+                "padded_segments": self.padded_segments,
+                "segment_utilization": (self.real_segments / self.padded_segments
+                                        if self.padded_segments else 0.0),
+                "last": self._history[-1] if self._history else None,
+            }
+
+
+__all__ = ["StageProfiler"]
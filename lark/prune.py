@@ -0,0 +1,300 @@
+"""
+Structured pruning of LarkModel encoder/decoder layers, FFN channels and heads
+
+Importance is estimated on a local labeled sample:
+
+- FFN channels and attention heads: first-order Taylor score, the summed
+  ``|weight * grad|`` of the parameters belonging to each unit
+- whole layers: increase of the sample loss when the layer is skipped
+
+Layers and FFN channels are physically removed, so they shrink the
+checkpoint and speed up inference. ``nn.MultiheadAttention`` requires
+``d_model == n_heads * head_dim`` in every layer, so pruned heads are
+zeroed (their contribution is exactly removed) but cost the same compute.
+Pruned checkpoints embed their architecture and load with ``LarkDetector``::
+
+    {"config": {...LarkModel kwargs...}, "state_dict": {...}, "pruning": {...}}
+"""
+
+import copy
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import torch
+from torch import nn
+
+from .evaluate import evaluate
+from .model import LarkModel, model_size_in_mb
+from .tokenizer import batch_tokenize
+
+
+PRUNE_TARGETS = ("ffn", "heads", "layers")
+
+
+def _parts(model: LarkModel) -> Dict[str, nn.ModuleList]:
+    """Transformer layer lists of the encoder and the decoder."""
+    return {"encoder": model.encoder.encoder.layers, "decoder": model.decoder.transformer_layers}
+
+
+def _encode_examples(examples: Sequence[Tuple[str, str]], label2id: Dict[str, int],
+                     max_len: int, batch_size: int) -> List[Tuple[torch.Tensor, torch.Tensor, torch.Tensor]]:
+    """Tokenize labeled examples into (token_ids, pad_mask, labels) batches, skipping unknown labels."""
+    known = [(text, label2id[label]) for text, label in examples if label in label2id]
+    batches = []
+    for i in range(0, len(known), batch_size):
+        chunk = known[i:i + batch_size]
+        token_ids, pad_mask = batch_tokenize([t for t, _ in chunk], max_len=max_len)
+        batches.append((token_ids, pad_mask, torch.tensor([y for _, y in chunk])))
+    return batches
+
+
+def _sample_loss(model: LarkModel, batches) -> float:
+    loss_fn = nn.CrossEntropyLoss(reduction="sum")
+    total, n = 0.0, 0
+    with torch.no_grad():
+        for token_ids, pad_mask, labels in batches:
+            total += float(loss_fn(model(token_ids, pad_mask).float(), labels))
+            n += len(labels)
+    return total / max(n, 1)
+
+
+def _without_layer(model: LarkModel, part: str, index: int) -> LarkModel:
+    variant = copy.deepcopy(model)
+    layers = _parts(variant)[part]
+    del layers[index]
+    if part == "encoder":
+        variant.encoder.encoder.num_layers = len(layers)
+    return variant
+
+
+def importance_scores(model: LarkModel, examples: Sequence[Tuple[str, str]],
+                      label2id: Dict[str, int], max_len: int = 256,
+                      batch_size: int = 32) -> Dict:
+    """
+    Rank heads, FFN channels and layers of ``model`` on a labeled sample.
+
+    Args:
+        model: Model to score (left unchanged)
+        examples: (text, label) pairs
+        label2id: Label to class id mapping of the model
+        max_len: Sequence length used for scoring
+        batch_size: Scoring batch size
+
+    Returns:
+        Dict with ``heads`` and ``ffn`` (``{part: [tensor per layer]}``,
+        higher = more important), ``layers`` (``{part: [loss increase]}``)
+        and the ``base_loss`` of the unpruned model
+    """
+    batches = _encode_examples(examples, label2id, max_len, batch_size)
+    if not batches:
+        raise ValueError("No examples with labels known to the model")
+
+    scorer = copy.deepcopy(model).float().eval()
+    scorer.profiler = None
+    scorer.regroup_decoder = False
+    params = dict(scorer.named_parameters())
+    taylor = {name: torch.zeros_like(p) for name, p in params.items()}
+    loss_fn = nn.CrossEntropyLoss()
+    for token_ids, pad_mask, labels in batches:
+        scorer.zero_grad()
+        loss_fn(scorer(token_ids, pad_mask), labels).backward()
+        for name, p in params.items():
+            if p.grad is not None:
+                taylor[name] += (p.grad * p.detach()).abs()
+
+    prefixes = {"encoder": "encoder.encoder.layers", "decoder": "decoder.transformer_layers"}
+    heads, ffn = {}, {}
+    for part, layers in _parts(scorer).items():
+        heads[part], ffn[part] = [], []
+        for i, layer in enumerate(layers):
+            prefix = f"{prefixes[part]}.{i}"
+            attn = layer.self_attn
+            n_heads, head_dim = attn.num_heads, attn.head_dim
+            in_w = taylor[f"{prefix}.self_attn.in_proj_weight"].sum(dim=1)
+            in_b = taylor[f"{prefix}.self_attn.in_proj_bias"]
+            per_row = (in_w + in_b).view(3, n_heads, head_dim).sum(dim=(0, 2))
+            out_w = taylor[f"{prefix}.self_attn.out_proj.weight"].sum(dim=0)
+            heads[part].append(per_row + out_w.view(n_heads, head_dim).sum(dim=1))
+
+            ffn[part].append(taylor[f"{prefix}.linear1.weight"].sum(dim=1)
+                             + taylor[f"{prefix}.linear1.bias"]
+                             + taylor[f"{prefix}.linear2.weight"].sum(dim=0))
+
+    base_loss = _sample_loss(scorer, batches)
+    layer_scores = {
+        part: [_sample_loss(_without_layer(scorer, part, i), batches) - base_loss
+               for i in range(len(layers))]
+        for part, layers in _parts(scorer).items()
+    }
+    return {"heads": heads, "ffn": ffn, "layers": layer_scores, "base_loss": base_loss}
+
+
+def _shrink_ffn(layer: nn.TransformerEncoderLayer, keep: torch.Tensor):
+    keep = torch.sort(keep).values
+    linear1, linear2 = layer.linear1, layer.linear2
+    new1 = nn.Linear(linear1.in_features, len(keep), dtype=linear1.weight.dtype)
+    new2 = nn.Linear(len(keep), linear2.out_features, dtype=linear2.weight.dtype)
+    with torch.no_grad():
+        new1.weight.copy_(linear1.weight[keep])
+        new1.bias.copy_(linear1.bias[keep])
+        new2.weight.copy_(linear2.weight[:, keep])
+        new2.bias.copy_(linear2.bias)
+    layer.linear1, layer.linear2 = new1, new2
+
+
+def _zero_heads(layer: nn.TransformerEncoderLayer, heads: Sequence[int]):
+    attn = layer.self_attn
+    d, head_dim = attn.embed_dim, attn.head_dim
+    with torch.no_grad():
+        for h in heads:
+            cols = slice(h * head_dim, (h + 1) * head_dim)
+            for block in range(3):  # q, k, v
+                rows = slice(block * d + h * head_dim, block * d + (h + 1) * head_dim)
+                attn.in_proj_weight[rows] = 0
+                attn.in_proj_bias[rows] = 0
+            attn.out_proj.weight[:, cols] = 0
+
+
+def prune_model(model: LarkModel, scores: Dict, ffn_ratio: float = 0.0,
+                head_ratio: float = 0.0, layer_ratio: float = 0.0) -> Tuple[LarkModel, Dict]:
+    """
+    Build a pruned copy of ``model`` from ``importance_scores`` output.
+
+    Args:
+        model: Model to prune (left unchanged)
+        scores: Result of ``importance_scores`` for ``model``
+        ffn_ratio: Fraction of FFN channels removed in every kept layer
+        head_ratio: Fraction of attention heads zeroed in every kept layer
+        layer_ratio: Fraction of encoder and of decoder layers removed
+            (at least one layer of each is kept)
+
+    Returns:
+        Tuple of (pruned model, summary dict of what was removed)
+    """
+    pruned = copy.deepcopy(model)
+    summary = {"ffn_ratio": ffn_ratio, "head_ratio": head_ratio, "layer_ratio": layer_ratio,
+               "removed_layers": {}, "zeroed_heads": {}, "ffn": {}}
+    for part, layers in _parts(pruned).items():
+        n_layers = len(layers)
+        n_drop = min(int(layer_ratio * n_layers), n_layers - 1)
+        order = sorted(range(n_layers), key=lambda i: scores["layers"][part][i])
+        dropped = sorted(order[:n_drop])
+        summary["removed_layers"][part] = dropped
+        summary["zeroed_heads"][part] = {}
+        widths = []
+        for i in range(n_layers):
+            if i in dropped:
+                continue
+            layer = layers[i]
+            channel_scores = scores["ffn"][part][i]
+            keep_n = max(1, round(len(channel_scores) * (1 - ffn_ratio)))
+            if keep_n < len(channel_scores):
+                _shrink_ffn(layer, torch.topk(channel_scores, keep_n).indices)
+            widths.append(layer.linear1.out_features)
+
+            head_scores = scores["heads"][part][i]
+            n_zero = min(int(head_ratio * len(head_scores)), len(head_scores) - 1)
+            if n_zero:
+                zeroed = torch.argsort(head_scores)[:n_zero].tolist()
+                _zero_heads(layer, zeroed)
+                summary["zeroed_heads"][part][i] = sorted(zeroed)
+        for i in reversed(dropped):
+            del layers[i]
+        if part == "encoder":
+            pruned.encoder.encoder.num_layers = len(layers)
+        pruned.config[f"{part}_ff"] = widths
+        summary["ffn"][part] = widths
+    return pruned, summary
+
+
+def save_variant(model: LarkModel, path: str, pruning: Optional[Dict] = None):
+    """Save a (pruned) model with its architecture embedded."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    torch.save({"config": dict(model.config), "state_dict": model.state_dict(),
+                "pruning": pruning or {}}, path)
+
+
+def evaluate_sample(detector, examples: Sequence[Tuple[str, str]], max_len: int = 256,
+                    batch_size: int = 32) -> Dict:
+    """Accuracy and throughput of ``detector`` on (text, label) pairs."""
+    result = evaluate(detector, examples, batch_size=batch_size, max_len=max_len)
+    return {
+        "accuracy": result["accuracy"],
+        "macro_f1": result["macro"]["f1"],
+        "throughput_texts_per_s": result["throughput"]["texts_per_s"],
+    }
+
+
+def run_pruning(examples: Sequence[Tuple[str, str]], output_dir: str,
+                levels: Sequence[float] = (0.25, 0.5),
+                targets: Sequence[str] = ("ffn", "layers"),
+                model_path: Optional[str] = None, labels_path: Optional[str] = None,
+                eval_examples: Optional[Sequence[Tuple[str, str]]] = None,
+                max_len: int = 256, batch_size: int = 32) -> List[Dict]:
+    """
+    Score the model once, then write and evaluate one pruned variant per level.
+
+    Args:
+        examples: Labeled sample used to rank heads, channels and layers
+        output_dir: Directory for the variant checkpoints and ``prune_report.json``
+        levels: Pruning levels in [0, 1); each level is applied as the ratio of
+            every structure listed in ``targets``
+        targets: Any of ``"ffn"``, ``"heads"``, ``"layers"``
+        model_path: Base checkpoint (default: the released weights)
+        labels_path: Labels JSON (default: the released labels)
+        eval_examples: Labeled sample for the accuracy report (default: ``examples``)
+        max_len: Sequence length for scoring and evaluation
+        batch_size: Batch size for scoring and evaluation
+
+    Returns:
+        One report row per level (level 0 is the unpruned baseline)
+    """
+    from .detector import LarkDetector
+
+    unknown = [t for t in targets if t not in PRUNE_TARGETS]
+    if unknown:
+        raise ValueError(f"Unknown pruning targets: {unknown}")
+    eval_examples = list(eval_examples if eval_examples is not None else examples)
+
+    base = LarkDetector(model_path=model_path, labels_path=labels_path, metrics=False)
+    print(f"🔍 Scoring {len(examples)} examples...")
+    scores = importance_scores(base.model, examples, base.label2id, max_len, batch_size)
+
+    rows = []
+    for level in [0.0] + [float(l) for l in levels]:
+        ratios = {"ffn_ratio": level if "ffn" in targets else 0.0,
+                  "head_ratio": level if "heads" in targets else 0.0,
+                  "layer_ratio": level if "layers" in targets else 0.0}
+        if level == 0.0:
+            model, summary = base.model, {**ratios, "removed_layers": {}, "zeroed_heads": {}, "ffn": {}}
+            detector = base
+            path = None
+        else:
+            model, summary = prune_model(base.model, scores, **ratios)
+            path = os.path.join(output_dir, f"lark_pruned_{int(round(level * 100))}.pth")
+            save_variant(model, path, summary)
+            detector = LarkDetector(model_path=path, labels_path=base.labels_path,
+                                    allow_random_init=False, metrics=False)
+        result = evaluate_sample(detector, eval_examples, max_len, batch_size)
+        row = {
+            "level": level, "checkpoint": path,
+            "parameters": sum(p.numel() for p in model.parameters()),
+            "size_mb": model_size_in_mb(model, dtype=torch.float16),
+            **result, "pruning": summary,
+        }
+        rows.append(row)
+        print(f"✅ level {level:.2f}: accuracy {row['accuracy']:.2%}  "
+              f"{row['throughput_texts_per_s']:.1f} texts/s  "
+              f"{row['parameters']:,} params  {row['size_mb']:.1f} MB")
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "prune_report.json"), "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=2, ensure_ascii=False)
+    return rows
+
+
+__all__ = [
+    "PRUNE_TARGETS", "evaluate_sample", "importance_scores", "prune_model",
+    "run_pruning", "save_variant",
+]
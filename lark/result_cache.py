@@ -0,0 +1,227 @@
+"""
+Persistent on-disk cache of detection results
+
+Results are stored in a SQLite database (standard library only) in WAL
+mode, so several worker processes can read while one writes. Each row is
+keyed by a 16-byte hash of the detector fingerprint (weights and options
+that change results, see ``LarkDetector.fingerprint``), the effective
+``max_len`` and the text. A new checkpoint or option therefore never
+returns stale results; the old rows are no longer reachable and age out
+through least-recently-used eviction once the database exceeds
+``max_bytes``.
+
+Each row holds the predicted label and the float32 probability vector, so
+the cache serves ``detect``, ``detect_batch``, ``detect_topk_batch`` and
+``detect_batch_arrays`` alike.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# SQLite's default limit of bound parameters per statement is 999 on old builds
+_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key BLOB PRIMARY KEY,
+    label TEXT NOT NULL,
+    probabilities BLOB NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+"""
+
+
+def make_keys(namespace: str, max_len: int, texts: Sequence[str]) -> List[bytes]:
+    """16-byte cache keys of ``texts`` under a detector fingerprint and ``max_len``."""
+    prefix = hashlib.sha256(f"{namespace}:{max_len}:".encode("utf-8"))
+    keys = []
+    for text in texts:
+        h = prefix.copy()
+        h.update(text.encode("utf-8", errors="surrogatepass"))
+        keys.append(h.digest()[:16])
+    return keys
+
+
+class ResultCache:
+    """
+    SQLite-backed result store shared by processes on one machine.
+
+    Args:
+        path: Database file (created if missing)
+        max_bytes: Live data size above which least recently used rows are
+            evicted, down to ``evict_fraction`` of the limit
+        timeout: Seconds to wait for a lock held by another process
+        evict_fraction: Target size after eviction, as a fraction of ``max_bytes``
+        touch_interval: Seconds within which a hit row's ``last_used`` is not
+            refreshed again; refreshes are skipped if another process holds
+            the write lock, so lookups never wait for a writer
+    """
+
+    def __init__(self, path: str, max_bytes: int = 1 << 30, timeout: float = 30.0,
+                 evict_fraction: float = 0.9, touch_interval: float = 60.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.evict_fraction = evict_fraction
+        self.touch_interval = touch_interval
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = None
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Connection of this process (a forked worker opens its own)."""
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, Tuple[str, bytes]]:
+        """
+        Look up keys in bulk and, best effort, mark the found rows as recently used.
+
+        Returns:
+            Dict from each found key to (label, float32 probability bytes)
+        """
+        found = {}
+        stale = []
+        unique = list(dict.fromkeys(keys))
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            for i in range(0, len(unique), _CHUNK):
+                chunk = unique[i:i + _CHUNK]
+                marks = ",".join("?" * len(chunk))
+                for key, label, probabilities, last_used in conn.execute(
+                        f"SELECT key, label, probabilities, last_used FROM results "
+                        f"WHERE key IN ({marks})", chunk):
+                    found[bytes(key)] = (label, bytes(probabilities))
+                    if now - last_used >= self.touch_interval:
+                        stale.append(bytes(key))
+            if stale:
+                self._touch(conn, stale, now)
+        return found
+
+    def _touch(self, conn: sqlite3.Connection, keys: List[bytes], now: float):
+        """Refresh ``last_used`` of ``keys`` unless another connection is writing."""
+        conn.execute("PRAGMA busy_timeout = 0")
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError:
+            # Locked by a writer: LRU order is approximate anyway
+            return
+        finally:
+            conn.execute(f"PRAGMA busy_timeout = {int(self.timeout * 1000)}")
+        try:
+            for i in range(0, len(keys), _CHUNK):
+                chunk = keys[i:i + _CHUNK]
+                conn.execute(f"UPDATE results SET last_used = ? WHERE key IN "
+                             f"({','.join('?' * len(chunk))})", [now, *chunk])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def put_many(self, items: Iterable[Tuple[bytes, str, bytes]]):
+        """Store (key, label, float32 probability bytes) rows, then evict if over the limit."""
+        now = time.time()
+        rows = [(key, label, probabilities, now) for key, label, probabilities in items]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", rows)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            if self._size_bytes(conn) > self.max_bytes:
+                self._evict(conn, int(self.max_bytes * self.evict_fraction))
+
+    def _size_bytes(self, conn: sqlite3.Connection) -> int:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (pages - free) * page_size
+
+    def _evict(self, conn: sqlite3.Connection, target_bytes: int) -> int:
+        """Delete least recently used rows until the live size is at most ``target_bytes``."""
+        removed = 0
+        while True:
+            size = self._size_bytes(conn)
+            count = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            if size <= target_bytes or not count:
+                break
+            # Pages are freed in proportion to the rows removed
+            n = max(1, int(count * (size - target_bytes) / size) + 1)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM results WHERE key IN "
+                             "(SELECT key FROM results ORDER BY last_used LIMIT ?)", (n,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            removed += min(n, count)
+        self.evictions += removed
+        return removed
+
+    def evict(self, target_bytes: Optional[int] = None) -> int:
+        """Evict down to ``target_bytes`` (default: the post-eviction target); returns rows removed."""
+        if target_bytes is None:
+            target_bytes = int(self.max_bytes * self.evict_fraction)
+        with self._lock:
+            return self._evict(self._connect(), target_bytes)
+
+    def size_bytes(self) -> int:
+        """Bytes of live (non-free) database pages."""
+        with self._lock:
+            return self._size_bytes(self._connect())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def clear(self):
+        """Delete every row."""
+        with self._lock:
+            self._connect().execute("DELETE FROM results")
+
+    def stats(self) -> Dict:
+        """Row count, live size and rows evicted by this process."""
+        return {"rows": len(self), "size_bytes": self.size_bytes(),
+                "max_bytes": self.max_bytes, "evictions": self.evictions}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+    def __getstate__(self):
+        # Picklable for spawned worker processes: reconnect on first use
+        state = self.__dict__.copy()
+        state["_lock"] = None
+        state["_conn"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+__all__ = ["ResultCache", "make_keys"]
@@ -0,0 +1,204 @@
+"""
+Low-latency path for one text at a time
+
+``detect(text)`` through the batch machinery pads the text to ``max_len``
+(1024 by default) and runs the whole model on mostly padding. This path
+serves a single text instead:
+
+- The token ids are written into a preallocated per-bucket scratch buffer
+  of the smallest length bucket that holds the text, so a 16-byte text runs
+  the encoder on 18 positions instead of 1024. The encoder is causal, so the
+  unused tail never influences the real positions and needs no padding mask.
+- Each bucket has its own encoder graph (embeddings, causal encoder with a
+  precomputed additive mask, boundary logits), traced with TorchScript and
+  warmed up the first time the bucket is used (``capture`` pre-captures all
+  of them, so no request pays for tracing).
+- Boundary positions are selected with one indexing operation instead of the
+  per-row loop of ``downsample_batch``, and the decoder runs on exactly the
+  selected segments without a mask.
+
+Results match the batch path up to floating point rounding.
+"""
+
+import threading
+import warnings
+from typing import Dict, Optional, Sequence, Tuple
+
+import torch
+from torch import nn, Tensor
+
+from .model import LarkModel
+from .profiling import StageProfiler
+
+# Power-of-two and 1.5x byte lengths plus the START and END tokens, then the full length
+DEFAULT_BUCKETS = tuple(n + 2 for n in (16, 24, 32, 48, 64, 96, 128, 192, 256, 384, 512, 768)) + (1024,)
+WARMUP_CALLS = 3
+
+
+class _EncoderStage(nn.Module):
+    """Embeddings, causal encoder and boundary logits for one fixed length."""
+
+    def __init__(self, model: LarkModel, length: int):
+        super().__init__()
+        self.encoder = model.encoder
+        self.boundary_mlp = model.predictor.mlp
+        dtype = model.encoder.pos_emb.dtype
+        mask = torch.zeros(length, length, dtype=dtype).masked_fill(
+            model.encoder.causal_mask[:length, :length], float("-inf"))
+        self.register_buffer("mask", mask, persistent=False)
+
+    def forward(self, token_ids: Tensor) -> Tuple[Tensor, Tensor]:
+        L = token_ids.shape[1]
+        h = self.encoder.byte_emb(token_ids) + self.encoder.pos_emb[:, :L, :]
+        h = self.encoder.encoder(h, mask=self.mask, is_causal=True)
+        return h, self.boundary_mlp(h).reshape(-1)
+
+
+class _DecoderStage(nn.Module):
+    """Decoder and classification head on the segments of one text (no padding)."""
+
+    def __init__(self, model: LarkModel):
+        super().__init__()
+        self.decoder = model.decoder
+
+    def forward(self, segments: Tensor) -> Tensor:
+        decoder = self.decoder
+        S = segments.shape[1]
+        x = decoder.cls_segment_embedding + (segments + decoder.pos_emb[:, :S, :])
+        for layer in decoder.transformer_layers:
+            x = layer(x)
+        return decoder.lm_head(x[:, 0, :])
+
+
+class SingleTextPath:
+    """
+    Bucketed B=1 inference for ``LarkModel``.
+
+    Args:
+        buckets: Sequence lengths with their own scratch buffer and encoder
+            graph; texts longer than the largest bucket run at their exact
+            length without a captured graph
+        trace: Capture TorchScript graphs (falls back to eager modules if
+            tracing fails)
+    """
+
+    def __init__(self, buckets: Sequence[int] = DEFAULT_BUCKETS, trace: bool = True):
+        self.buckets = sorted(set(int(b) for b in buckets))
+        self.trace = trace
+        self.model: Optional[LarkModel] = None
+        self._encoders: Dict[int, nn.Module] = {}
+        self._decoder: Optional[nn.Module] = None
+        self._lock = threading.Lock()
+        self._scratch = threading.local()
+
+    def bind(self, model: LarkModel) -> "SingleTextPath":
+        """Attach to ``model``; buckets beyond its position table are dropped."""
+        limit = model.encoder.pos_emb.shape[1]
+        self.buckets = [b for b in self.buckets if b <= limit]
+        self.model = model
+        self._encoders = {}
+        self._decoder = None
+        return self
+
+    def bucket_for(self, length: int) -> int:
+        """Smallest bucket holding ``length`` tokens (``length`` itself if none does)."""
+        for bucket in self.buckets:
+            if bucket >= length:
+                return bucket
+        return length
+
+    def _capture(self, module: nn.Module, example: Tensor) -> nn.Module:
+        if not self.trace:
+            return module
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                graph = torch.jit.trace(module.eval(), (example,), check_trace=False)
+                # The graph executor optimizes during the first calls
+                for _ in range(WARMUP_CALLS):
+                    graph(example)
+            return graph
+        except Exception as e:
+            warnings.warn(f"Single-text graph capture failed, running eagerly: {e}", RuntimeWarning)
+            self.trace = False
+            return module
+
+    def _encoder_stage(self, length: int) -> nn.Module:
+        stage = self._encoders.get(length)
+        if stage is None:
+            with self._lock, torch.no_grad():
+                stage = self._encoders.get(length)
+                if stage is None:
+                    module = _EncoderStage(self.model, length)
+                    if length in self.buckets:
+                        module = self._capture(module, self._buffer(length))
+                        self._encoders[length] = module
+                    stage = module
+        return stage
+
+    def _decoder_stage(self) -> nn.Module:
+        if self._decoder is None:
+            with self._lock, torch.no_grad():
+                if self._decoder is None:
+                    d_model = self.model.config["d_model"]
+                    example = torch.zeros(1, 2, d_model, dtype=self.model.decoder.pos_emb.dtype)
+                    self._decoder = self._capture(_DecoderStage(self.model), example)
+        return self._decoder
+
+    def _buffer(self, length: int) -> Tensor:
+        """Per-thread (1, length) token scratch buffer."""
+        buffers = getattr(self._scratch, "buffers", None)
+        if buffers is None:
+            buffers = self._scratch.buffers = {}
+        buffer = buffers.get(length)
+        if buffer is None:
+            buffer = buffers[length] = torch.zeros(1, length, dtype=torch.long)
+        return buffer
+
+    def capture(self):
+        """Capture the decoder and every bucket's encoder graph ahead of the first request."""
+        self._decoder_stage()
+        for bucket in self.buckets:
+            self._encoder_stage(bucket)
+
+    def logits(self, token_ids: Sequence[int], profiler: Optional[StageProfiler] = None) -> Tensor:
+        """
+        Label logits of one tokenized text.
+
+        Args:
+            token_ids: Token ids of the text (START, bytes, END), at most the
+                model's maximum length
+            profiler: Records the ``encoder`` (boundary logits included),
+                ``downsample`` and ``decoder`` stages and the bucket shape into
+                the current call when given
+
+        Returns:
+            float32 logits [label_size]
+        """
+        n = len(token_ids)
+        length = self.bucket_for(n)
+        buffer = self._buffer(length)
+        # The tail keeps stale ids from earlier texts; the causal mask hides it
+        buffer[0, :n] = torch.as_tensor(token_ids, dtype=torch.long)
+        with torch.no_grad():
+            if profiler is None:
+                h, boundary_logits = self._encoder_stage(length)(buffer)
+                boundary = boundary_logits[:n].float() > 0
+                boundary[0] = True
+                segments = h[:, :n][:, boundary]
+                return self._decoder_stage()(segments)[0].float()
+
+            encoder, decoder = self._encoder_stage(length), self._decoder_stage()
+            with profiler.stage("encoder"):
+                h, boundary_logits = encoder(buffer)
+            with profiler.stage("downsample"):
+                boundary = boundary_logits[:n].float() > 0
+                boundary[0] = True
+                segments = h[:, :n][:, boundary]
+            profiler.annotate(batch_size=1, seq_len=length, real_bytes=n, padded_bytes=length,
+                              segment_len=segments.shape[1], real_segments=segments.shape[1])
+            with profiler.stage("decoder"):
+                return decoder(segments)[0].float()
+
+
+__all__ = ["DEFAULT_BUCKETS", "SingleTextPath"]
@@ -0,0 +1,149 @@
+"""
+Accuracy-versus-latency sweep over LarkDetector settings
+
+Every grid point (max_len, dtype, threads, batch size) is evaluated on the
+same labeled set in a fresh spawned subprocess, so thread settings do not
+leak between points. Points are compared on per-text latency (batch latency
+divided by batch size), so points with different batch sizes are comparable.
+Points that no other point beats on both accuracy and per-text latency
+form the Pareto frontier. ``recommend`` picks a configuration for a
+latency budget or an accuracy floor.
+"""
+
+import itertools
+import multiprocessing
+from typing import Dict, List, Optional, Sequence
+
+
+def grid(max_lens: Sequence[int] = (256, 1024), dtypes: Sequence[str] = ("float16",),
+         threads: Sequence[int] = (1,), batch_sizes: Sequence[int] = (32,)) -> List[Dict]:
+    """Cartesian product of the swept settings as a list of point dicts."""
+    return [
+        {"max_len": max_len, "dtype": dtype, "threads": n_threads, "batch_size": batch_size}
+        for max_len, dtype, n_threads, batch_size in itertools.product(
+            max_lens, dtypes, threads, batch_sizes)
+    ]
+
+
+def run_point(point: Dict, data: str, limit: Optional[int] = None,
+              model_path: Optional[str] = None, labels_path: Optional[str] = None,
+              warmup: int = 1) -> Dict:
+    """
+    Evaluate one grid point in the current process.
+
+    Returns:
+        The point extended with ``accuracy``, ``macro_f1``, ``texts_per_s``
+        and per-batch ``latency_ms`` percentiles
+    """
+    from .data import iter_labeled
+    from .detector import LarkDetector
+    from .evaluate import evaluate
+
+    detector = LarkDetector(model_path=model_path, labels_path=labels_path,
+                            dtype=point["dtype"], num_threads=point["threads"], metrics=False)
+    warm = [text for text, _ in itertools.islice(iter_labeled(data), point["batch_size"] * warmup)]
+    for i in range(0, len(warm), point["batch_size"]):
+        detector.detect_batch(warm[i:i + point["batch_size"]], max_len=point["max_len"])
+
+    result = evaluate(detector, iter_labeled(data, limit=limit),
+                      batch_size=point["batch_size"], max_len=point["max_len"])
+    return {
+        **point,
+        "accuracy": result["accuracy"],
+        "macro_f1": result["macro"]["f1"],
+        "texts_per_s": result["throughput"]["texts_per_s"],
+        "latency_ms": result["throughput"]["batch_latency_ms"],
+    }
+
+
+def _run_point_worker(args):
+    point, kwargs = args
+    return run_point(point, **kwargs)
+
+
+def run_sweep(points: List[Dict], data: str, limit: Optional[int] = None,
+              model_path: Optional[str] = None, labels_path: Optional[str] = None,
+              warmup: int = 1, isolate: bool = True) -> List[Dict]:
+    """Evaluate every point, each in its own spawned subprocess unless ``isolate=False``."""
+    kwargs = {"data": data, "limit": limit, "model_path": model_path,
+              "labels_path": labels_path, "warmup": warmup}
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for point in points:
+        if isolate:
+            with ctx.Pool(1) as pool:
+                result = pool.map(_run_point_worker, [(point, kwargs)])[0]
+        else:
+            result = run_point(point, **kwargs)
+        print(f"{point_label(result):45} accuracy {result['accuracy']:.4f}  "
+              f"{result['texts_per_s']:9.1f} texts/s  p99 {result['latency_ms']['p99']:8.2f} ms")
+        results.append(result)
+    return results
+
+
+def point_label(point: Dict) -> str:
+    """Short human-readable identifier of a grid point."""
+    return (f"{point['dtype']}/threads={point['threads']}"
+            f"/batch={point['batch_size']}/max_len={point['max_len']}")
+
+
+def per_text_latency(result: Dict, latency: str = "p99") -> float:
+    """Batch latency percentile divided by the batch size, in milliseconds per text."""
+    return result["latency_ms"][latency] / result["batch_size"]
+
+
+def mark_pareto(results: List[Dict], latency: str = "p99") -> List[Dict]:
+    """
+    Set ``pareto`` on each result: True if no other point has accuracy >= and
+    per-text latency <= with at least one strictly better.
+    """
+    for r in results:
+        acc, lat = r["accuracy"], per_text_latency(r, latency)
+        r["pareto"] = not any(
+            o is not r
+            and o["accuracy"] >= acc and per_text_latency(o, latency) <= lat
+            and (o["accuracy"] > acc or per_text_latency(o, latency) < lat)
+            for o in results
+        )
+    return results
+
+
+def recommend(results: List[Dict], max_latency_ms: Optional[float] = None,
+              min_accuracy: Optional[float] = None, latency: str = "p99") -> Optional[Dict]:
+    """
+    Pick a configuration from the sweep results.
+
+    Args:
+        results: Sweep results
+        max_latency_ms: Budget on the latency of one ``detect_batch`` call
+            (what a caller waits for); the most accurate point within it wins
+        min_accuracy: Accuracy floor; the point with the lowest per-text
+            latency reaching it wins
+        latency: Latency percentile used for the budget and for per-text
+            latency, which also breaks accuracy ties
+
+    Returns:
+        Dict with the chosen ``point`` plus ready-to-use ``detector_options``
+        (``LarkDetector`` kwargs) and ``call_options`` (per-call kwargs), or
+        None if no point satisfies the targets
+    """
+    candidates = [
+        r for r in results
+        if (max_latency_ms is None or r["latency_ms"][latency] <= max_latency_ms)
+        and (min_accuracy is None or r["accuracy"] >= min_accuracy)
+    ]
+    if not candidates:
+        return None
+    if min_accuracy is not None and max_latency_ms is None:
+        best = min(candidates, key=lambda r: (per_text_latency(r, latency), -r["accuracy"]))
+    else:
+        best = max(candidates, key=lambda r: (r["accuracy"], -per_text_latency(r, latency)))
+    return {
+        "point": best,
+        "detector_options": {"dtype": best["dtype"], "num_threads": best["threads"]},
+        "call_options": {"max_len": best["max_len"], "batch_size": best["batch_size"]},
+    }
+
+
+__all__ = ["grid", "mark_pareto", "per_text_latency", "point_label", "recommend", "run_point",
+           "run_sweep"]
@@ -3,6 +3,7 @@ END_BYTE = 257
 PAD_BYTE = 258
 VOCAB_SIZE = 259  # 0~255 + START + END + PAD
 
+import numpy as np
 import torch
 torch.backends.mha.set_fastpath_enabled(False)
 
@@ -12,21 +13,58 @@ def encode2bytes(text: str) -> list[int]:
 def decode2text(byte_list: list[int]) -> str:
     return bytes([b for b in byte_list if b < 256]).decode("utf-8", errors="ignore")
 
+def _is_continuation(byte: int) -> bool:
+    return 0x80 <= byte < 0xC0
+
+# ---------------- 字节预算采样 ----------------
+def sample_excerpts(data: bytes, budget: int, n_excerpts: int = 3) -> bytes:
+    """
+    超过 budget 字节的文本取 n_excerpts 段等间距摘录 (头/中/尾...) 拼接，
+    每段起止都对齐到 UTF-8 字符边界，总长不超过 budget。
+    未超过 budget 的文本原样返回。
+    """
+    n = len(data)
+    budget = max(budget, 0)
+    if n <= budget:
+        return data
+    n_excerpts = max(1, min(n_excerpts, budget))
+    size = budget // n_excerpts
+    pieces = []
+    for j in range(n_excerpts):
+        start = (j * (n - size)) // (n_excerpts - 1) if n_excerpts > 1 else 0
+        # 起点向后对齐到字符开头，终点向前对齐到字符开头
+        for _ in range(3):
+            if start < n and _is_continuation(data[start]):
+                start += 1
+        end = min(start + size, n)
+        for _ in range(3):
+            if end < n and _is_continuation(data[end]):
+                end -= 1
+        pieces.append(data[start:max(start, end)])
+    return b"".join(pieces)
+
 # ---------------- 批次编码 + pad ----------------
-def batch_tokenize(texts: list[str], max_len=128):
+def batch_tokenize(texts: list[str], max_len=128, truncation="head", n_excerpts=3):
     """
     texts: list of str
     # max_len 建议训练时尽量不要进行裁剪操作，这会导致最后一个字节的语义不完整
+    truncation: 超长文本的处理方式
+        "head": 只保留前 max_len 个 token (默认)
+        "excerpts": 用 sample_excerpts 在 max_len - 2 字节预算内取等间距摘录
     返回:
         token_ids: B x L_longest (LongTensor)
         pad_mask: B x L_longest (1 表示 padding, 0 表示有效)
     """
+    if truncation not in ("head", "excerpts"):
+        raise ValueError(f"Unknown truncation mode: {truncation}")
     byte_lists = []
     for text in texts:
         if text == "":
             # 特殊情况，仅在推理时有效，后续可以换成特定字符
+            # 只保留 START，不再修改 max_len (否则同 batch 的其他文本会被截断为 1)
             byte_seq =[START_BYTE]
-            max_len =1
+        elif truncation == "excerpts":
+            byte_seq =[START_BYTE]+list(sample_excerpts(text.encode("utf-8"), max_len - 2, n_excerpts))+[END_BYTE]
         else:
             byte_seq =[START_BYTE]+encode2bytes(text)+[END_BYTE]
         byte_lists.append(torch.LongTensor(byte_seq))
@@ -48,3 +86,123 @@ def batch_tokenize(texts: list[str], max_len=128):
     token_ids = torch.stack(padded, dim=0)       # B x L
     pad_mask = torch.stack(pad_mask, dim=0)      # B x L
     return token_ids, pad_mask
+
+
+# ---------------- 单条文本编码 (不 pad) ----------------
+def tokenize_one(text: str, max_len=128, truncation="head", n_excerpts=3) -> list[int]:
+    """
+    单条文本的 token id 列表，与 batch_tokenize 的有效部分一致，但不做 padding
+    (供 B=1 低延迟路径使用，见 lark.single)
+    """
+    if truncation not in ("head", "excerpts"):
+        raise ValueError(f"Unknown truncation mode: {truncation}")
+    if text == "":
+        return [START_BYTE]
+    if truncation == "excerpts":
+        data = sample_excerpts(text.encode("utf-8"), max_len - 2, n_excerpts)
+    else:
+        data = text.encode("utf-8")
+    return ([START_BYTE] + list(data) + [END_BYTE])[:max_len]
+
+
+# ---------------- 从连续字节缓冲区批量编码 ----------------
+def tokenize_buffer(data: np.ndarray, offsets: np.ndarray, max_len=128, rows: np.ndarray = None,
+                    truncation="head", n_excerpts=3, out=None):
+    """
+    从连续的 UTF-8 字节缓冲区 (如 Arrow 的 data/offsets buffer) 直接构建 token 矩阵，
+    不为每条文本创建 Python 对象，结果与 batch_tokenize 一致。
+
+    data: uint8 数组，所有文本字节首尾相接
+    offsets: 长度 N+1 的整数数组，第 i 条文本为 data[offsets[i]:offsets[i+1]]
+    rows: 可选，只编码这些行 (例如跳过 null)
+    truncation / n_excerpts: 同 batch_tokenize
+    out: 可选，预分配的 (token_ids, pad_mask) 张量，形状至少为 B x max_len，
+         原地填写并返回其前 B 行 (见 InputBufferPool)
+    返回:
+        token_ids: B x max_len (LongTensor)
+        pad_mask: B x max_len (1 表示有效, 0 表示 padding)
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    if rows is None:
+        starts = offsets[:-1]
+        lengths = offsets[1:] - starts
+    else:
+        starts = offsets[rows]
+        lengths = offsets[rows + 1] - starts
+    nonempty = lengths > 0
+    if truncation == "excerpts":
+        data, starts, lengths = _gather_excerpts(data, starts, lengths, max_len - 2, n_excerpts)
+    elif truncation != "head":
+        raise ValueError(f"Unknown truncation mode: {truncation}")
+    B = len(lengths)
+
+    if out is None:
+        token_ids = np.full((B, max_len), PAD_BYTE, dtype=np.int64)
+        pad_mask = np.empty((B, max_len), dtype=np.float32)
+    else:
+        out_ids, out_mask = out[0][:B, :max_len], out[1][:B, :max_len]
+        token_ids, pad_mask = out_ids.numpy(), out_mask.numpy()
+        token_ids.fill(PAD_BYTE)
+    token_ids[:, 0] = START_BYTE
+
+    # 每行最多保留 max_len - 1 个内容字节
+    content = np.minimum(lengths, max_len - 1)
+    row_idx = np.repeat(np.arange(B), content)
+    row_starts = np.cumsum(content) - content
+    cols = np.arange(int(content.sum())) - np.repeat(row_starts, content)
+    token_ids[row_idx, cols + 1] = data[np.repeat(starts, content) + cols]
+
+    # 空文本只保留 START (与 batch_tokenize 一致)，未被截断的文本追加 END
+    has_end = nonempty & (lengths + 2 <= max_len)
+    token_ids[has_end, lengths[has_end] + 1] = END_BYTE
+
+    seq_len = 1 + content + has_end
+    np.less(np.arange(max_len)[None, :], seq_len[:, None], out=pad_mask)
+    if out is not None:
+        return out_ids, out_mask
+    return torch.from_numpy(token_ids), torch.from_numpy(pad_mask)
+
+
+def _gather_excerpts(data: np.ndarray, starts: np.ndarray, lengths: np.ndarray,
+                     budget: int, n_excerpts: int):
+    """sample_excerpts 的向量化版本：返回 (新缓冲区, 每行起点, 每行长度)"""
+    budget = max(budget, 0)
+    long_rows = lengths > budget
+    if not long_rows.any():
+        return data, starts, lengths
+    n_excerpts = max(1, min(n_excerpts, budget))
+    size = budget // n_excerpts
+    B = len(lengths)
+
+    # 每行拆成若干段 (seg_start, seg_len)：短行一段，长行 n_excerpts 段
+    n_segs = np.where(long_rows, n_excerpts, 1)
+    seg_row = np.repeat(np.arange(B), n_segs)
+    seg_j = np.arange(len(seg_row)) - np.repeat(np.cumsum(n_segs) - n_segs, n_segs)
+    row_start = starts[seg_row]
+    row_len = lengths[seg_row]
+    row_end = row_start + row_len
+    is_long = long_rows[seg_row]
+
+    if n_excerpts > 1:
+        rel = (seg_j * (row_len - size)) // (n_excerpts - 1)
+    else:
+        rel = np.zeros_like(seg_j)
+    seg_start = np.where(is_long, row_start + rel, row_start)
+    padded = np.append(data, np.zeros(1, dtype=data.dtype))  # 允许读取 row_end 位置
+    for _ in range(3):
+        cont = is_long & (seg_start < row_end) & ((padded[np.minimum(seg_start, len(data))] & 0xC0) == 0x80)
+        seg_start = seg_start + cont
+    seg_end = np.where(is_long, np.minimum(seg_start + size, row_end), row_end)
+    for _ in range(3):
+        cont = is_long & (seg_end < row_end) & ((padded[np.minimum(seg_end, len(data))] & 0xC0) == 0x80)
+        seg_end = seg_end - cont
+    seg_len = np.maximum(seg_end - seg_start, 0)
+
+    # 把所有段拷贝到新的连续缓冲区
+    total = int(seg_len.sum())
+    seg_out = np.cumsum(seg_len) - seg_len
+    src = np.repeat(seg_start - seg_out, seg_len) + np.arange(total)
+    new_data = data[src]
+    new_lengths = np.bincount(seg_row, weights=seg_len, minlength=B).astype(np.int64)
+    new_starts = np.cumsum(new_lengths) - new_lengths
+    return new_data, new_starts, new_lengths
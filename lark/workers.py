@@ -0,0 +1,309 @@
+"""
+Multi-process detection with CPU-affinity and NUMA-aware worker placement
+
+A layout such as ``"4x8"`` (4 workers x 8 threads) is mapped onto the
+host's NUMA topology: every worker gets a fixed, contiguous set of cores
+taken from a single node where possible, pins itself to them with
+``sched_setaffinity`` and sets its torch intra-op thread count to match
+before torch is imported. The worker then loads its own copy of the model.
+Because the pages are first touched by a thread already pinned to the
+node, Linux allocates them on that node's memory; when libnuma is
+installed the worker additionally sets its preferred node explicitly.
+
+``DetectorPool`` hands out chunks of a batch through a shared queue so
+faster workers take more chunks, and returns results in input order.
+This module does not import torch, so the parent stays light.
+"""
+
+import ctypes
+import ctypes.util
+import glob
+import itertools
+import multiprocessing
+import os
+import queue
+import re
+import warnings
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+NODE_ROOT = "/sys/devices/system/node"
+# Seconds between worker liveness checks while waiting for results
+POLL_INTERVAL = 1.0
+
+
+def parse_cpulist(text: str) -> List[int]:
+    """Parse a kernel cpulist such as ``"0-3,8,10-11"``."""
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def available_cpus() -> List[int]:
+    """CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def numa_topology(root: str = NODE_ROOT) -> Dict[int, List[int]]:
+    """
+    Usable CPUs per NUMA node.
+
+    Reads ``<root>/node*/cpulist`` and keeps only CPUs in this process's
+    affinity mask. Hosts without NUMA information are reported as one node.
+
+    Returns:
+        Dict from node id to its sorted CPU ids (nodes without usable CPUs omitted)
+    """
+    allowed = set(available_cpus())
+    topology = {}
+    for path in glob.glob(os.path.join(root, "node[0-9]*", "cpulist")):
+        node = int(re.search(r"node(\d+)", path).group(1))
+        with open(path) as f:
+            cpus = [c for c in parse_cpulist(f.read()) if c in allowed]
+        if cpus:
+            topology[node] = cpus
+    return dict(sorted(topology.items())) or {0: sorted(allowed)}
+
+
+@dataclass
+class WorkerSlot:
+    """Placement of one worker: its index, NUMA node and pinned CPUs."""
+
+    index: int
+    node: int
+    cpus: List[int]
+
+    @property
+    def threads(self) -> int:
+        return len(self.cpus)
+
+
+def parse_layout(layout: str) -> Tuple[int, int]:
+    """Parse ``"<workers>x<threads>"`` (e.g. ``"4x8"``)."""
+    match = re.fullmatch(r"\s*(\d+)\s*[xX*]\s*(\d+)\s*", layout)
+    if not match or int(match.group(1)) < 1 or int(match.group(2)) < 1:
+        raise ValueError(f"Invalid worker layout {layout!r}, expected e.g. '4x8'")
+    return int(match.group(1)), int(match.group(2))
+
+
+def plan_layout(workers: int, threads: int, topology: Optional[Dict[int, List[int]]] = None,
+                oversubscribe: bool = False) -> List[WorkerSlot]:
+    """
+    Assign CPUs to workers.
+
+    Each worker goes to the node with the most free CPUs and takes
+    ``threads`` contiguous CPUs of it. A worker only spans nodes when no
+    single node has enough free CPUs left.
+
+    Args:
+        workers: Number of worker processes
+        threads: Torch threads (and pinned CPUs) per worker
+        topology: Node to CPUs mapping (default: ``numa_topology()``)
+        oversubscribe: Allow ``workers * threads`` to exceed the usable CPUs,
+            reusing CPUs round-robin; otherwise raise ``ValueError``
+
+    Returns:
+        One ``WorkerSlot`` per worker
+    """
+    topology = numa_topology() if topology is None else topology
+    all_cpus = [c for cpus in topology.values() for c in cpus]
+    node_of = {c: node for node, cpus in topology.items() for c in cpus}
+    if workers * threads > len(all_cpus) and not oversubscribe:
+        raise ValueError(f"Layout {workers}x{threads} needs {workers * threads} CPUs, "
+                         f"only {len(all_cpus)} are available")
+
+    # Free CPUs per node; each worker goes to the node with the most free CPUs
+    free = {node: list(cpus) for node, cpus in topology.items()}
+    slots = []
+    for index in range(workers):
+        node = max(free, key=lambda n: (len(free[n]), -n))
+        if len(free[node]) >= threads:
+            cpus, free[node] = free[node][:threads], free[node][threads:]
+        else:
+            remaining = [c for n in sorted(free, key=lambda n: -len(free[n])) for c in free[n]]
+            if len(remaining) >= threads:
+                cpus = remaining[:threads]
+                free = {n: [c for c in free[n] if c not in cpus] for n in free}
+            else:
+                start = index * threads
+                cpus = [all_cpus[(start + i) % len(all_cpus)] for i in range(threads)]
+            node = node_of[cpus[0]]
+        slots.append(WorkerSlot(index=index, node=node, cpus=sorted(set(cpus))))
+    return slots
+
+
+def _libnuma():
+    name = ctypes.util.find_library("numa")
+    if name is None:
+        return None
+    try:
+        lib = ctypes.CDLL(name)
+        return lib if lib.numa_available() >= 0 else None
+    except (OSError, AttributeError):
+        return None
+
+
+def pin_current_process(slot: WorkerSlot) -> Dict:
+    """
+    Pin the calling process to ``slot`` and prefer its node's memory.
+
+    Sets ``OMP_NUM_THREADS`` / ``MKL_NUM_THREADS``, so call it before torch is
+    imported.
+
+    Returns:
+        What was applied: ``cpus`` (or None if affinity is unsupported) and
+        ``numa`` ("libnuma" or "first-touch")
+    """
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(slot.threads)
+    applied = {"cpus": None, "numa": "first-touch"}
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, slot.cpus)
+        applied["cpus"] = slot.cpus
+    lib = _libnuma()
+    if lib is not None:
+        lib.numa_set_preferred(ctypes.c_int(slot.node))
+        applied["numa"] = "libnuma"
+    return applied
+
+
+def _worker_main(slot: WorkerSlot, detector_options: Dict, tasks, results):
+    try:
+        placement = pin_current_process(slot)
+        import torch
+        from .detector import LarkDetector
+
+        torch.set_num_threads(slot.threads)
+        detector = LarkDetector(**{**detector_options, "num_threads": slot.threads})
+    except Exception as e:
+        results.put(("error", slot.index, repr(e)))
+        return
+    results.put(("ready", slot.index, placement))
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        task_id, texts, max_len = task
+        try:
+            results.put(("done", task_id, detector.detect_batch(texts, max_len=max_len)))
+        except Exception as e:
+            results.put(("error", task_id, repr(e)))
+
+
+class DetectorPool:
+    """
+    Pool of pinned detector worker processes.
+
+    Args:
+        layout: ``"<workers>x<threads>"`` string or a list of ``WorkerSlot``
+        detector_options: ``LarkDetector`` keyword arguments for every worker
+            (``num_threads`` is set from the layout)
+        chunk_size: Texts per task handed to a worker
+        oversubscribe: See ``plan_layout``
+        topology: Node to CPUs mapping (default: ``numa_topology()``)
+    """
+
+    def __init__(self, layout: Union[str, Sequence[WorkerSlot]] = "1x1",
+                 detector_options: Optional[Dict] = None, chunk_size: int = 64,
+                 oversubscribe: bool = False, topology: Optional[Dict[int, List[int]]] = None):
+        if isinstance(layout, str):
+            layout = plan_layout(*parse_layout(layout), topology=topology, oversubscribe=oversubscribe)
+        self.slots: List[WorkerSlot] = list(layout)
+        self.chunk_size = chunk_size
+        self.placements: Dict[int, Dict] = {}
+        self._calls = itertools.count()
+        if not hasattr(os, "sched_setaffinity"):
+            warnings.warn("CPU affinity is not supported on this platform; workers are not pinned",
+                          RuntimeWarning)
+
+        ctx = multiprocessing.get_context("spawn")
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        self._processes = [
+            ctx.Process(target=_worker_main, daemon=True,
+                        args=(slot, dict(detector_options or {}), self._tasks, self._results))
+            for slot in self.slots
+        ]
+        for process in self._processes:
+            process.start()
+        for _ in self._processes:
+            try:
+                kind, index, payload = self._get()
+            except RuntimeError:
+                self.close()
+                raise
+            if kind == "error":
+                self.close()
+                raise RuntimeError(f"Worker {index} failed to start: {payload}")
+            self.placements[index] = payload
+
+    @property
+    def layout(self) -> str:
+        return f"{len(self.slots)}x{self.slots[0].threads}" if self.slots else "0x0"
+
+    def detect_batch(self, texts: List[str], max_len: int = 1024) -> List[Tuple[str, float]]:
+        """
+        Detect languages across the workers.
+
+        Args:
+            texts: List of input text strings
+            max_len: Maximum sequence length
+
+        Returns:
+            List of tuples (detected_language, confidence_score), in input order
+        """
+        chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        # Results of an earlier call that raised may still arrive; they carry its call id
+        call = next(self._calls)
+        for chunk_id, chunk in enumerate(chunks):
+            self._tasks.put(((call, chunk_id), chunk, max_len))
+        results: List[Optional[List[Tuple[str, float]]]] = [None] * len(chunks)
+        pending = len(chunks)
+        while pending:
+            kind, task_id, payload = self._get()
+            if not isinstance(task_id, tuple) or task_id[0] != call:
+                continue
+            chunk_id = task_id[1]
+            if kind == "error":
+                raise RuntimeError(f"Worker failed on chunk {chunk_id}: {payload}")
+            results[chunk_id] = payload
+            pending -= 1
+        return [r for chunk in results for r in chunk]
+
+    def _get(self) -> Tuple:
+        """Next result, raising if a worker process has died meanwhile."""
+        while True:
+            try:
+                return self._results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                dead = {slot.index: process.exitcode
+                        for slot, process in zip(self.slots, self._processes) if not process.is_alive()}
+                if dead:
+                    raise RuntimeError(f"Worker process exited (worker: exit code) {dead}")
+
+    def close(self):
+        """Stop the workers."""
+        for process in self._processes:
+            if process.is_alive():
+                self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+    def __enter__(self) -> "DetectorPool":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+__all__ = ["DetectorPool", "WorkerSlot", "numa_topology", "parse_layout", "pin_current_process",
+           "plan_layout"]
@@ -32,13 +32,18 @@ setup(
     ],
     python_requires=">=3.8",
     install_requires=requirements,
+    extras_require={
+        "arrow": ["pyarrow>=10.0.0", "pandas>=1.5.0"],
+    },
     include_package_data=True,
     package_data={
         "lark": ["*.json"],
     },
     entry_points={
         "console_scripts": [
-            "lark-detect=lark.cli:main",
+            "lark=lark.cli:main",
+            "lark-detect=lark.cli:detect_main",
+            "lark-client=lark.client:main",
         ],
     },
     keywords="language-detection, nlp, machine-learning, deep-learning",
@@ -8,7 +8,6 @@
 
 import torch
 import json
-import time
 from model import LarkModel
 from tokenizer import batch_tokenize
 
@@ -176,28 +175,22 @@ def test_simple_inference():
 
 
 def benchmark_inference():
-    """性能基准测试"""
+    """性能基准测试 (完整的参数扫描见 benchmarks/run.py)"""
     print("\n=== 性能基准测试 ===")
-    inference = SimpleInference()
-    
-    # 创建测试数据
-    test_texts = ["Hello world, this is a test text for language detection."] * 50
-    
-    # 预热
-    _ = inference.predict(test_texts[:5])
-    
-    # 基准测试
-    start_time = time.time()
-    predictions, _ = inference.predict(test_texts)
-    end_time = time.time()
-    
-    total_time = end_time - start_time
-    avg_time = total_time / len(test_texts)
-    
-    print(f"总文本数: {len(test_texts)}")
-    print(f"总耗时: {total_time:.4f} 秒")
-    print(f"平均每文本: {avg_time*1000:.2f} 毫秒")
-    print(f"QPS: {len(test_texts)/total_time:.2f}")
+    from benchmarks.run import run_point
+    
+    # 使用可复现的多语言合成负载，而不是重复同一句英文
+    result = run_point({
+        "backend": "float16", "threads": torch.get_num_threads(), "batch_size": 32,
+        "max_len": 1024, "n_texts": 128, "seed": 0, "profile": "mixed", "warmup": 1,
+    })
+    
+    print(f"总文本数: {result['n_texts']}")
+    print(f"吞吐量: {result['throughput_texts_per_s']:.2f} 文本/秒")
+    print(f"批次延迟 p50/p95/p99: {result['latency_ms']['p50']:.2f} / "
+          f"{result['latency_ms']['p95']:.2f} / {result['latency_ms']['p99']:.2f} 毫秒")
+    print(f"峰值内存: {result['peak_rss_mb']:.1f} MB")
+    print("完整扫描: python -m benchmarks.run --help")
 
 
 def export_for_production():
@@ -0,0 +1,21 @@
+"""
+Shared fixtures for Lark tests
+"""
+
+import pytest
+import torch
+
+from lark.model import LarkModel
+
+
+@pytest.fixture(scope="session")
+def checkpoint_path(tmp_path_factory):
+    """A seeded, randomly initialized checkpoint so tests run offline."""
+    torch.manual_seed(0)
+    model = LarkModel(
+        d_model=256, n_layers=4, n_heads=8, ff=512,
+        label_size=102, dropout=0.0, max_len=1024
+    )
+    path = tmp_path_factory.mktemp("weights") / "lark_test.pth"
+    torch.save(model.state_dict(), path)
+    return str(path)
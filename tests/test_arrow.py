@@ -0,0 +1,61 @@
+"""
+Tests for Arrow / pandas column detection
+"""
+
+import numpy as np
+import pytest
+import torch
+
+from lark import LarkDetector
+from lark.tokenizer import batch_tokenize, tokenize_buffer
+
+pa = pytest.importorskip("pyarrow")
+
+
+TEXTS = ["Hello world", "", "今天天气真好", "x" * 100, "こんにちは"]
+
+
+@pytest.fixture(scope="module")
+def detector(checkpoint_path):
+    return LarkDetector(model_path=checkpoint_path)
+
+
+class TestArrow:
+    """Test cases for the buffer tokenizer and detect_arrow"""
+
+    @pytest.mark.parametrize("max_len", [1, 2, 13, 64])
+    def test_tokenize_buffer_matches_batch_tokenize(self, max_len):
+        encoded = [t.encode("utf-8") for t in TEXTS]
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        offsets = np.concatenate([[0], np.cumsum([len(e) for e in encoded])])
+        token_ids, pad_mask = tokenize_buffer(data, offsets, max_len)
+        expected_ids, expected_mask = batch_tokenize(TEXTS, max_len=max_len)
+        assert torch.equal(token_ids, expected_ids)
+        assert torch.equal(pad_mask, expected_mask)
+
+    def test_detect_arrow_matches_detect_batch(self, detector):
+        array = pa.array(["Hello world", None, "今天天气真好", "こんにちは"])
+        result = detector.detect_arrow(array[1:], max_len=64)
+        expected = detector.detect_batch(["今天天气真好", "こんにちは"], max_len=64)
+
+        assert len(result) == 3
+        assert not result.is_valid()[0].as_py()
+        rows = result.to_pylist()[1:]
+        assert [r["language"] for r in rows] == [e[0] for e in expected]
+        np.testing.assert_allclose([r["confidence"] for r in rows],
+                                   [e[1] for e in expected], atol=1e-3)
+
+    def test_detect_arrow_chunked_large_string(self, detector):
+        chunked = pa.chunked_array([pa.array(["Hello world"], pa.large_string()),
+                                    pa.array(["Bonjour", "Hola"], pa.large_string())])
+        result = detector.detect_arrow(chunked, max_len=64, batch_size=1)
+        expected = detector.detect_batch(["Hello world", "Bonjour", "Hola"], max_len=64)
+        assert [r["language"] for r in result.to_pylist()] == [e[0] for e in expected]
+
+    def test_detect_series(self, detector):
+        pd = pytest.importorskip("pandas")
+        series = pd.Series(["Hello world", "今天天气真好"], index=["a", "b"])
+        frame = detector.detect_series(series, max_len=64)
+        expected = detector.detect_batch(list(series), max_len=64)
+        assert list(frame.index) == ["a", "b"]
+        assert list(frame["language"]) == [e[0] for e in expected]
@@ -0,0 +1,60 @@
+"""
+Tests for the NumPy batch APIs
+"""
+
+import numpy as np
+import pytest
+import torch
+
+from lark import LarkDetector
+
+
+TEXTS = ["Hello world", "今天天气真好", "こんにちは", "Bonjour tout le monde"]
+
+
+@pytest.fixture(scope="module")
+def detector(checkpoint_path):
+    return LarkDetector(model_path=checkpoint_path)
+
+
+class TestBatchArrays:
+    """Test cases for detect_topk_batch and detect_batch_arrays"""
+
+    def test_topk_batch_matches_single(self, detector):
+        label_ids, probs, unknown = detector.detect_topk_batch(TEXTS, k=3, max_len=64)
+        assert label_ids.shape == (4, 3) and label_ids.dtype == np.int64
+        assert probs.shape == (4, 3) and probs.dtype == np.float32
+        assert unknown.shape == (4,) and unknown.dtype == np.bool_
+        assert np.all(np.diff(probs, axis=1) <= 0)
+
+        for i, text in enumerate(TEXTS):
+            language, confidence, top_k = detector.detect_with_topk(text, k=3, max_len=64)
+            assert detector.id2label[int(label_ids[i, 0])] == language
+            assert probs[i, 0] == pytest.approx(confidence, abs=1e-3)
+            assert [detector.id2label[int(j)] for j in label_ids[i]] == \
+                [item["language"] for item in top_k]
+
+    def test_batch_arrays_threshold(self, detector):
+        label_ids, confidences, unknown = detector.detect_batch_arrays(
+            TEXTS, confidence_threshold=1.01, max_len=64)
+        assert unknown.all()
+        results = detector.detect_batch(TEXTS, max_len=64)
+        assert [detector.id2label[int(i)] for i in label_ids] == [r[0] for r in results]
+        np.testing.assert_allclose(confidences, [r[1] for r in results], atol=1e-3)
+
+    def test_prefilter_undefined_rows(self, checkpoint_path):
+        detector = LarkDetector(model_path=checkpoint_path, prefilter=True)
+        label_ids, confidences, unknown = detector.detect_batch_arrays(["", "Hello"], max_len=64)
+        assert label_ids[0] == -1 and confidences[0] == 0 and unknown[0]
+        assert label_ids[1] >= 0
+        assert detector.prefilter.stats()["texts"] == 2
+
+    def test_topk_keeps_underflowed_candidates(self, checkpoint_path, monkeypatch):
+        detector = LarkDetector(model_path=checkpoint_path, prefilter=True)
+        probabilities = torch.zeros(3, len(detector.id2label))
+        probabilities[[0, 2], 7] = 1.0  # confident rows with an fp16 tail of zeros; "" is undefined
+        monkeypatch.setattr(detector, "_predict_batch", lambda texts, max_len: (None, probabilities))
+        label_ids, probs, _ = detector.detect_topk_batch(["Hello world", "", "こんにちは"], k=3)
+        assert label_ids[0, 0] == 7 and (label_ids[0, 1:] >= 0).all()
+        assert (label_ids[1] == -1).all()
+
@@ -0,0 +1,37 @@
+"""
+Tests for the benchmark suite helpers
+"""
+
+from benchmarks.run import compare_with_baseline, percentile
+from benchmarks.workload import describe_workload, generate_workload
+
+
+class TestBenchmarks:
+    """Test cases for workload generation and regression checks"""
+
+    def test_workload_is_reproducible(self):
+        assert generate_workload(50, seed=3) == generate_workload(50, seed=3)
+        assert generate_workload(50, seed=3) != generate_workload(50, seed=4)
+
+    def test_workload_length_profiles(self):
+        chat = describe_workload(generate_workload(200, profile="chat"))
+        doc = describe_workload(generate_workload(200, profile="doc"))
+        assert chat["bytes_p50"] < doc["bytes_p50"]
+        assert len(chat["languages"]) > 5
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([], 50) == 0.0
+
+    def test_compare_with_baseline(self):
+        base = [{"key": "a", "throughput_texts_per_s": 100.0,
+                 "latency_ms": {"p99": 10.0}, "peak_rss_mb": 500.0}]
+        same = [{"key": "a", "throughput_texts_per_s": 98.0,
+                 "latency_ms": {"p99": 10.5}, "peak_rss_mb": 510.0}]
+        slower = [{"key": "a", "throughput_texts_per_s": 70.0,
+                   "latency_ms": {"p99": 15.0}, "peak_rss_mb": 500.0}]
+        assert compare_with_baseline(same, base, tolerance=0.1) == []
+        metrics = {r["metric"] for r in compare_with_baseline(slower, base, tolerance=0.1)}
+        assert metrics == {"throughput_texts_per_s", "latency_ms.p99"}
@@ -0,0 +1,62 @@
+"""
+Tests for the preallocated input buffer pool
+"""
+
+import numpy as np
+import torch
+
+import pytest
+
+from lark import LarkDetector
+from lark.buffers import InputBufferPool
+from lark.tokenizer import batch_tokenize, tokenize_buffer
+
+
+TEXTS = ["Hello world", "", "Bonjour le monde", "你好，世界", "x" * 200]
+
+
+class TestInputBufferPool:
+    """Test cases for InputBufferPool"""
+
+    def test_reuse_and_buckets(self):
+        pool = InputBufferPool(batch_buckets=(4, 16))
+        buffers, hit = pool.acquire(3, 64)
+        assert not hit and buffers[0].shape == (4, 64)
+        pool.release(buffers)
+        again, hit = pool.acquire(4, 64)
+        assert hit and again[0].data_ptr() == buffers[0].data_ptr()
+        pool.release(again)
+        assert pool.stats()["pooled"] == 1
+
+    def test_bounded(self):
+        pool = InputBufferPool(batch_buckets=(1, 2, 4), max_buffers=2)
+        for batch_size in (1, 2, 4):
+            pool.release(pool.acquire(batch_size, 32)[0])
+        assert pool.stats()["keys"] == [(2, 32), (4, 32)]
+        # oversized batches are never pooled
+        pool.release(pool.acquire(100, 32)[0])
+        assert pool.stats()["pooled"] == 2
+
+    def test_tokenize_in_place_matches(self):
+        encoded = [t.encode("utf-8") for t in TEXTS]
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        offsets = np.concatenate([[0], np.cumsum([len(e) for e in encoded])])
+        out = (torch.full((8, 64), 7, dtype=torch.long), torch.full((8, 64), 0.5))
+        token_ids, pad_mask = tokenize_buffer(data, offsets, 64, out=out)
+        expected_ids, expected_mask = batch_tokenize(TEXTS, max_len=64)
+        assert token_ids.data_ptr() == out[0].data_ptr()
+        assert torch.equal(token_ids, expected_ids)
+        assert torch.equal(pad_mask, expected_mask)
+
+    @pytest.mark.parametrize("pad_rows", [True, False])
+    def test_detector_serving_mode(self, checkpoint_path, pad_rows):
+        plain = LarkDetector(model_path=checkpoint_path, dtype="float32")
+        pooled = LarkDetector(model_path=checkpoint_path, dtype="float32",
+                              buffer_pool=InputBufferPool(pad_rows=pad_rows))
+        for _ in range(3):
+            result = pooled.detect_batch(TEXTS, max_len=128)
+        expected = plain.detect_batch(TEXTS, max_len=128)
+        assert [lang for lang, _ in result] == [lang for lang, _ in expected]
+        assert np.allclose([c for _, c in result], [c for _, c in expected], atol=1e-5)
+        cache = pooled.metrics.snapshot()["caches"]["input_buffers"]
+        assert cache == {"hits": 2, "misses": 1, "hit_rate": 2 / 3}
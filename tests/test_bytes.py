@@ -0,0 +1,41 @@
+"""
+Tests for raw bytes and pre-tokenized input
+"""
+
+import numpy as np
+import pytest
+
+from lark import LarkDetector
+from lark.tokenizer import batch_tokenize
+
+
+TEXTS = ["Hello world", "今天天气真好", "", "こんにちは"]
+
+
+@pytest.fixture(scope="module")
+def detector(checkpoint_path):
+    return LarkDetector(model_path=checkpoint_path)
+
+
+class TestBytesInput:
+    """Test cases for detect_bytes, detect_bytes_batch and detect_tokens"""
+
+    def test_bytes_batch_matches_detect_batch(self, detector):
+        expected = detector.detect_batch(TEXTS, max_len=64)
+        payloads = [TEXTS[0].encode(), bytearray(TEXTS[1].encode()),
+                    memoryview(b""), memoryview(TEXTS[3].encode())]
+        assert detector.detect_bytes_batch(payloads, max_len=64) == expected
+        assert detector.detect_bytes(TEXTS[0].encode(), max_len=64) == expected[0]
+
+    def test_detect_tokens(self, detector):
+        token_ids, pad_mask = batch_tokenize(TEXTS, max_len=64)
+        expected = detector.detect_batch(TEXTS, max_len=64)
+        assert detector.detect_tokens(token_ids, pad_mask) == expected
+        assert detector.detect_tokens(token_ids.numpy(), pad_mask.numpy().astype(np.int8)) == expected
+
+    def test_detect_tokens_validation(self, detector):
+        token_ids, pad_mask = batch_tokenize(TEXTS, max_len=16)
+        with pytest.raises(ValueError):
+            detector.detect_tokens(token_ids, pad_mask[:, :8])
+        with pytest.raises(ValueError):
+            detector.detect_tokens(token_ids + 1000, pad_mask)
@@ -0,0 +1,91 @@
+"""
+Tests for the detection daemon and its thin client
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from lark import LarkDetector
+from lark.client import LarkClient
+from lark.daemon import LarkDaemon, serve
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "getuid"), reason="Unix domain sockets only")
+
+TEXTS = [
+    "Hello, how are you today?",
+    "Bonjour, comment allez-vous?",
+    "这是一个中文句子。",
+    "",
+    "Привет, как дела?",
+]
+
+
+@pytest.fixture(scope="module")
+def detector(checkpoint_path):
+    return LarkDetector(model_path=checkpoint_path)
+
+
+@pytest.fixture
+def daemon(detector, tmp_path):
+    server = serve(detector, str(tmp_path / "lark.sock"))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _assert_same(results, expected):
+    assert [r[0] for r in results] == [e[0] for e in expected]
+    for (_, conf), (_, expected_conf) in zip(results, expected):
+        assert conf == pytest.approx(expected_conf, abs=1e-3)
+
+
+class TestDaemon:
+    """Test cases for lark.daemon and lark.client"""
+
+    def test_results_match_detector(self, detector, daemon):
+        expected = detector.detect_batch(TEXTS, max_len=64)
+        with LarkClient(daemon.socket_path) as client:
+            _assert_same(client.detect_batch(TEXTS, max_len=64), expected)
+            # Several requests over one connection
+            _assert_same([client.detect(TEXTS[1], max_len=64)], expected[1:2])
+            assert client.detect_batch([]) == []
+
+    def test_shared_memory_path(self, detector, daemon):
+        if not os.path.isdir("/dev/shm"):
+            pytest.skip("no /dev/shm")
+        expected = detector.detect_batch(TEXTS, max_len=64)
+        with LarkClient(daemon.socket_path, shm_threshold=0) as client:
+            _assert_same(client.detect_batch(TEXTS, max_len=64), expected)
+            assert client.stats()["shm_requests"] == 1
+        assert not [f for f in os.listdir("/dev/shm") if f.startswith("lark-")]
+
+    def test_ping_stats_and_errors(self, daemon):
+        with LarkClient(daemon.socket_path) as client:
+            assert client.ping()["pid"] == os.getpid()
+            with pytest.raises(RuntimeError, match="Unknown op"):
+                client._call({"op": "nope"})
+            stats = client.stats()
+        assert stats["errors"] == 1
+        assert stats["metrics"]["requests"]
+
+    def test_refuses_live_socket_and_replaces_stale(self, detector, daemon, tmp_path):
+        with pytest.raises(RuntimeError, match="already listening"):
+            LarkDaemon(detector, daemon.socket_path)
+        stale = tmp_path / "stale.sock"
+        stale.touch()
+        server = LarkDaemon(detector, str(stale))
+        server.server_close()
+        assert not stale.exists()
+
+    def test_missing_daemon(self, tmp_path):
+        with pytest.raises(ConnectionError, match="lark daemon"):
+            LarkClient(str(tmp_path / "missing.sock"))
+
+    def test_client_does_not_import_torch(self):
+        code = "import sys, lark.client, lark.cli; print('torch' in sys.modules, 'numpy' in sys.modules)"
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                             check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        assert out.stdout.split() == ["False", "False"]
@@ -125,6 +125,15 @@ class TestModelComponents:
         assert pad_mask.shape[0] == len(texts)
         assert token_ids.shape[1] == 10
         assert pad_mask.shape[1] == 10
+    
+    def test_tokenizer_empty_text(self):
+        """Empty text must not truncate the rest of the batch"""
+        from lark.tokenizer import batch_tokenize
+        
+        token_ids, pad_mask = batch_tokenize(["", "Hello"], max_len=10)
+        assert token_ids.shape == (2, 10)
+        assert pad_mask[0].sum().item() == 1
+        assert pad_mask[1].sum().item() == 7
 
 
 if __name__ == "__main__":
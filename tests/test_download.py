@@ -0,0 +1,113 @@
+"""
+Tests for the streaming model downloader
+"""
+
+import hashlib
+import http.server
+import os
+import threading
+
+import pytest
+
+from lark.download import DownloadError, download_file, get_cache_dir, sha256_file
+
+
+PAYLOAD = os.urandom(256 * 1024 + 123)
+PAYLOAD_SHA256 = hashlib.sha256(PAYLOAD).hexdigest()
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """Serves PAYLOAD with Range support; can drop the first transfer midway."""
+
+    drop_after = None
+    requests_seen = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        type(self).requests_seen.append(self.headers.get("Range"))
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header:
+            start = int(range_header.split("=")[1].split("-")[0])
+            if start >= len(PAYLOAD):
+                self.send_response(416)
+                self.end_headers()
+                return
+            self.send_response(206)
+        else:
+            self.send_response(200)
+        body = PAYLOAD[start:]
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", f'"{PAYLOAD_SHA256}"')
+        self.end_headers()
+        if type(self).drop_after is not None:
+            self.wfile.write(body[:type(self).drop_after])
+            type(self).drop_after = None
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    _Handler.drop_after = None
+    _Handler.requests_seen = []
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/lark_epoch1.pth"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestDownload:
+    """Test cases for download_file"""
+
+    def test_download_and_verify(self, server, tmp_path):
+        target = str(tmp_path / "model.pth")
+        download_file(server, target, sha256=PAYLOAD_SHA256, chunk_size=4096)
+        assert sha256_file(target) == PAYLOAD_SHA256
+        assert not os.path.exists(target + ".part")
+
+    def test_resume_after_dropped_connection(self, server, tmp_path):
+        _Handler.drop_after = 100_000
+        target = str(tmp_path / "model.pth")
+        download_file(server, target, chunk_size=4096, retries=2)
+        assert sha256_file(target) == PAYLOAD_SHA256
+        resumed = _Handler.requests_seen[-1]
+        assert resumed is not None and int(resumed[6:-1]) > 0
+
+    def test_resume_from_existing_partial(self, server, tmp_path):
+        target = str(tmp_path / "model.pth")
+        with open(target + ".part", "wb") as f:
+            f.write(PAYLOAD[:5000])
+        download_file(server, target)
+        assert sha256_file(target) == PAYLOAD_SHA256
+        assert _Handler.requests_seen == ["bytes=5000-"]
+
+    def test_checksum_mismatch(self, server, tmp_path):
+        target = str(tmp_path / "model.pth")
+        with pytest.raises(DownloadError):
+            download_file(server, target, sha256="0" * 64)
+        assert not os.path.exists(target)
+        assert not os.path.exists(target + ".part")
+
+    def test_parallel_workers_download_once(self, server, tmp_path):
+        target = str(tmp_path / "model.pth")
+        threads = [
+            threading.Thread(target=download_file, args=(server, target))
+            for _ in range(4)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sha256_file(target) == PAYLOAD_SHA256
+        assert len(_Handler.requests_seen) == 1
+
+    def test_cache_dir_from_env(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("LARK_CACHE_DIR", str(tmp_path / "cache"))
+        assert get_cache_dir() == str(tmp_path / "cache")
+        assert os.path.isdir(tmp_path / "cache")
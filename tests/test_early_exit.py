@@ -0,0 +1,83 @@
+"""
+Tests for early-exit heads
+"""
+
+import json
+
+import pytest
+import torch
+
+from benchmarks.workload import generate_workload
+from lark import LarkDetector
+from lark.cli import main as cli_main
+from lark.early_exit import ExitHeads, early_exit_forward, train_exit_heads
+from lark.tokenizer import batch_tokenize
+
+
+@pytest.fixture(scope="module")
+def detector(checkpoint_path):
+    return LarkDetector(model_path=checkpoint_path)
+
+
+@pytest.fixture(scope="module")
+def sample():
+    return generate_workload(24, seed=5, profile="chat")
+
+
+@pytest.fixture(scope="module")
+def heads(detector, sample):
+    return train_exit_heads(detector.model, [t for t, _ in sample], max_len=64, epochs=5)
+
+
+class TestEarlyExit:
+    """Test cases for lark.early_exit and LarkDetector(early_exit=...)"""
+
+    def test_heads_layout(self, heads):
+        assert sorted(heads.encoder_heads) == ["0", "1", "2", "3"]
+        assert sorted(heads.decoder_heads) == ["0", "1", "2"]
+        assert heads.max_depth == 8
+
+    def test_no_exit_matches_model(self, detector, heads, sample):
+        token_ids, pad_mask = batch_tokenize([t for t, _ in sample], max_len=64)
+        with torch.no_grad():
+            expected = detector.model(token_ids, pad_mask).float()
+        logits, depth = early_exit_forward(detector.model, heads, token_ids, pad_mask, threshold=1.1)
+        assert (depth == 8).all()
+        assert torch.equal(logits.argmax(-1), expected.argmax(-1))
+        assert torch.allclose(torch.softmax(logits, -1), torch.softmax(expected, -1), atol=1e-3)
+
+    def test_exit_at_first_layer(self, detector, heads, sample):
+        token_ids, pad_mask = batch_tokenize([t for t, _ in sample], max_len=64)
+        logits, depth = early_exit_forward(detector.model, heads, token_ids, pad_mask, threshold=0.0)
+        assert (depth == 1).all()
+        assert torch.isfinite(logits).all()
+
+    def test_detector_reports_depth(self, checkpoint_path, heads, sample):
+        texts = [t for t, _ in sample]
+        detector = LarkDetector(model_path=checkpoint_path, early_exit=heads, exit_threshold=0.0)
+        results = detector.detect_batch_with_depth(texts, max_len=64)
+        assert [depth for _, _, depth in results] == [1] * len(texts)
+        assert [r[:2] for r in results] == detector.detect_batch(texts, max_len=64)
+        assert detector.metrics.snapshot()["counters"]["exit_depth_1"] == 2 * len(texts)
+
+    def test_save_load_and_architecture_check(self, checkpoint_path, heads, tmp_path):
+        path = str(tmp_path / "exits.pth")
+        heads.save(path)
+        loaded = ExitHeads.load(path)
+        assert loaded.config == heads.config
+        LarkDetector(model_path=checkpoint_path, early_exit=path)
+        with pytest.raises(ValueError, match="n_encoder"):
+            LarkDetector(model_path=checkpoint_path,
+                         early_exit=ExitHeads(256, 102, n_encoder=2, n_decoder=4))
+
+    def test_cli_train_exits(self, checkpoint_path, sample, tmp_path):
+        data = tmp_path / "sample.tsv"
+        data.write_text("".join(f"{label}\t{text}\n" for text, label in sample[:8]), encoding="utf-8")
+        output = tmp_path / "exits.pth"
+        assert cli_main(["train-exits", str(data), "--output", str(output), "--epochs", "2",
+                         "--max-len", "64", "--thresholds", "0,1.1",
+                         "--model-path", checkpoint_path]) == 0
+        report = json.loads((tmp_path / "exits_report.json").read_text())
+        assert report["full"]["mean_depth"] == 8
+        assert [row["mean_depth"] for row in report["early_exit"]] == [1, 8]
+        assert report["early_exit"][1]["agreement"] == 1.0
@@ -0,0 +1,75 @@
+"""
+Tests for the embedding output mode (CLS and pooled encoder vectors)
+"""
+
+import numpy as np
+import pytest
+import torch
+
+from benchmarks.workload import generate_workload
+from lark import LarkDetector
+from lark.tokenizer import batch_tokenize
+
+
+@pytest.fixture(scope="module")
+def detector(checkpoint_path):
+    return LarkDetector(model_path=checkpoint_path)
+
+
+@pytest.fixture(scope="module")
+def texts():
+    return [t for t, _ in generate_workload(24, seed=11, profile="mixed")]
+
+
+class TestEmbeddings:
+    """Test cases for LarkDetector.embed_batch and detect_batch(return_embeddings=True)"""
+
+    def test_labels_and_vectors_from_one_pass(self, detector, texts):
+        calls = []
+        handle = detector.model.register_forward_hook(lambda *_: calls.append(1))
+        try:
+            results, embeddings = detector.detect_batch(texts, max_len=128, return_embeddings=True)
+        finally:
+            handle.remove()
+        assert len(calls) == 1
+        assert embeddings.dtype == np.float32 and embeddings.flags["C_CONTIGUOUS"]
+        assert embeddings.shape == (len(texts), detector.model.config["d_model"])
+        plain = detector.detect_batch(texts, max_len=128)
+        assert [r[0] for r in results] == [r[0] for r in plain]
+        assert [r[1] for r in results] == pytest.approx([r[1] for r in plain], abs=1e-3)
+
+    def test_pooling_modes(self, detector, texts):
+        d_model = detector.model.config["d_model"]
+        cls = detector.embed_batch(texts, max_len=128)
+        encoder = detector.embed_batch(texts, max_len=128, pooling="encoder")
+        both = detector.embed_batch(texts, max_len=128, pooling="both")
+        assert both.shape == (len(texts), 2 * d_model)
+        np.testing.assert_allclose(both[:, :d_model], cls, atol=1e-3)
+        np.testing.assert_allclose(both[:, d_model:], encoder, atol=1e-3)
+
+        # The encoder vector is the mean of the ByteEncoder states over the real bytes
+        token_ids, pad_mask = batch_tokenize(texts[:1], max_len=128)
+        with torch.no_grad():
+            h = detector.model.encoder(token_ids, pad_mask)
+        np.testing.assert_allclose(encoder[0], h[0].float().mean(dim=0).numpy(), atol=1e-3)
+
+    def test_rows_do_not_depend_on_batch(self, detector, texts, checkpoint_path):
+        batch = detector.embed_batch(texts, max_len=128, pooling="both")
+        single = np.concatenate([detector.embed_batch([t], max_len=128, pooling="both") for t in texts[:4]])
+        np.testing.assert_allclose(single, batch[:4], atol=2e-2)
+
+        planned = LarkDetector(model_path=checkpoint_path, batch_planner=True, regroup_decoder=True)
+        np.testing.assert_allclose(planned.embed_batch(texts, max_len=128, pooling="both"), batch, atol=2e-2)
+
+    def test_bypasses_prefilter(self, checkpoint_path):
+        prefiltered = LarkDetector(model_path=checkpoint_path, prefilter=True)
+        results, embeddings = prefiltered.detect_batch(["", "12345", "Hello world"], max_len=64,
+                                                       return_embeddings=True)
+        assert embeddings.shape[0] == 3 and np.isfinite(embeddings).all()
+        assert prefiltered.metrics.snapshot()["counters"].get("prefilter_undefined", 0) == 0
+
+    def test_edge_cases(self, detector):
+        results, embeddings = detector.detect_batch([], return_embeddings=True)
+        assert results == [] and embeddings.shape == (0, detector.model.config["d_model"])
+        with pytest.raises(ValueError, match="pooling"):
+            detector.embed_batch(["hi"], pooling="max")
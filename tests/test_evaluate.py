@@ -0,0 +1,75 @@
+"""
+Tests for the evaluation runner and report format
+"""
+
+import json
+import os
+
+import numpy as np
+
+from analyze_accuracy import parse_classification_report
+from benchmarks.workload import generate_workload
+from lark import LarkDetector
+from lark.cli import main as cli_main
+from lark.evaluate import classification_metrics, evaluate, format_report
+
+
+class TestEvaluate:
+    """Test cases for lark.evaluate"""
+
+    def test_metrics_from_confusion(self):
+        # gold x predicted, last column = no prediction
+        confusion = np.array([[3, 1, 0, 1],
+                              [0, 2, 0, 0],
+                              [0, 0, 0, 0]])
+        m = classification_metrics(confusion, ["a", "b", "c"])
+        assert list(m["per_label"]) == ["a", "b"]
+        assert m["per_label"]["a"]["support"] == 5
+        assert np.allclose([m["per_label"]["a"][k] for k in ("precision", "recall", "f1")],
+                           [1.0, 0.6, 0.75])
+        assert np.isclose(m["per_label"]["b"]["precision"], 2 / 3)
+        assert np.isclose(m["accuracy"], 5 / 7)
+        assert np.isclose(m["micro"]["precision"], 5 / 6)
+        assert m["macro"]["support"] == 7
+
+    def test_evaluate_matches_detect_batch(self, checkpoint_path):
+        detector = LarkDetector(model_path=checkpoint_path, dtype="float32")
+        examples = generate_workload(40, seed=2, profile="chat") + [("text", "not-a-label")]
+        result = evaluate(detector, iter(examples), batch_size=16, max_len=128)
+        predictions = detector.detect_batch([t for t, _ in examples[:-1]], max_len=128)
+        correct = sum(p == l for (p, _), (_, l) in zip(predictions, examples))
+        assert result["skipped"] == 1
+        assert result["confusion"].sum() == 40
+        assert np.isclose(result["accuracy"], correct / 40)
+        assert result["throughput"]["texts"] == 40
+
+    def test_report_roundtrip(self, checkpoint_path, tmp_path):
+        data = tmp_path / "eval.tsv"
+        data.write_text("".join(f"{l}\t{t}\n" for t, l in generate_workload(24, seed=3)),
+                        encoding="utf-8")
+        output = tmp_path / "classification_report.txt"
+        assert cli_main(["evaluate", str(data), "--model-path", checkpoint_path,
+                         "--output", str(output), "--max-len", "128"]) == 0
+        text = output.read_text(encoding="utf-8")
+        assert text.startswith("Detailed Classification Report\n" + "=" * 40 + "\n")
+        assert text.endswith("Total supported languages: 102\n")
+        parsed = parse_classification_report(str(output))
+        metrics = json.loads((tmp_path / "classification_report.json").read_text())
+        assert sum(m["support"] for m in parsed["languages"].values()) == 24
+        assert set(parsed["languages"]) == set(metrics["per_label"])
+        assert metrics["throughput"]["texts_per_s"] > 0
+
+    def test_format_matches_shipped_layout(self):
+        result = {
+            "labels": ["af", "zh-TW"],
+            "per_label": {"af": {"precision": 0.71, "recall": 0.68, "f1": 0.7, "support": 2000}},
+            "micro": {"precision": 0.9, "recall": 0.9, "f1": 0.9, "support": 385306},
+            "macro": {"precision": 0.88, "recall": 0.79, "f1": 0.82, "support": 385306},
+            "weighted": {"precision": 0.9, "recall": 0.9, "f1": 0.89, "support": 385306},
+        }
+        shipped_path = os.path.join(os.path.dirname(__file__), "..", "classification_report.txt")
+        with open(shipped_path, encoding="utf-8") as f:
+            shipped = f.read().splitlines()
+        lines = format_report(result).splitlines()
+        assert lines[:5] == shipped[:5]
+        assert lines[-6:-2] == shipped[-6:-2]
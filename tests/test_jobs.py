@@ -0,0 +1,184 @@
+"""
+Tests for the file-based, resumable labeling job coordinator
+"""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+from benchmarks.workload import generate_workload
+from lark import LarkDetector
+from lark.jobs import LabelingJob, LeaseLost, iter_documents, split_file
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def detector(checkpoint_path):
+    return LarkDetector(model_path=checkpoint_path, metrics=False)
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """Two inputs (plain text and .jsonl with ids) and the expected document order."""
+    texts = [t.replace("\n", " ") for t, _ in generate_workload(120, seed=5, profile="chat")]
+    plain = tmp_path / "a.txt"
+    plain.write_text("\n".join(texts[:70]), encoding="utf-8")  # no trailing newline
+    records = tmp_path / "b.jsonl"
+    records.write_text("".join(json.dumps({"id": i, "text": t}) + "\n" for i, t in enumerate(texts[70:])),
+                       encoding="utf-8")
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("a.txt\nb.jsonl\n", encoding="utf-8")
+    return {"inputs": [str(plain), str(records)], "manifest": str(manifest), "texts": texts}
+
+
+def read_output(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class Crash(Exception):
+    pass
+
+
+class CrashingDetector:
+    """Stands in for a worker that is killed after ``batches`` batches."""
+
+    def __init__(self, detector, batches):
+        self.detector = detector
+        self.batches = batches
+
+    def detect_batch(self, texts, max_len=1024):
+        if self.batches == 0:
+            raise Crash()
+        self.batches -= 1
+        return self.detector.detect_batch(texts, max_len=max_len)
+
+
+class TestJobs:
+    """Test cases for lark.jobs"""
+
+    def test_shards_cover_every_line_once(self, corpus):
+        for path in corpus["inputs"]:
+            ranges = split_file(path, shard_bytes=500)
+            assert ranges[0][0] == 0 and ranges[-1][1] == os.path.getsize(path)
+            assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+            documents = [text for start, end in ranges for _, text, _ in iter_documents(path, start, end)]
+            assert documents == [text for _, text, _ in iter_documents(path, 0, os.path.getsize(path))]
+        plain, records = corpus["inputs"]
+        assert len(list(iter_documents(plain, 0, os.path.getsize(plain)))) == 70
+        assert [doc_id for _, _, doc_id in iter_documents(records, 0, os.path.getsize(records))] == list(range(50))
+
+    def test_run_and_merge_in_order(self, corpus, detector, tmp_path):
+        job = LabelingJob.create(str(tmp_path / "job"), corpus["inputs"], shard_bytes=1000)
+        assert len(job.shards) > 3
+        summary = job.run_worker(detector, batch_size=16, max_len=64)
+        assert summary["documents"] == 120 and summary["shards"] == len(job.shards)
+        assert job.status()["complete"] and job.claim() is None
+
+        records = read_output(_merge(job, tmp_path))
+        expected = detector.detect_batch(corpus["texts"], max_len=64)
+        assert [r["language"] for r in records] == [language for language, _ in expected]
+        assert [r.get("id") for r in records] == [None] * 70 + list(range(50))
+
+    def test_merge_requires_all_shards(self, corpus, tmp_path):
+        job = LabelingJob.create(str(tmp_path / "job"), corpus["inputs"], shard_bytes=1000)
+        with pytest.raises(RuntimeError, match="not done"):
+            job.merge(str(tmp_path / "out.jsonl"))
+
+    def test_killed_shard_is_resumed(self, corpus, detector, tmp_path):
+        job_dir = str(tmp_path / "job")
+        first = LabelingJob.create(job_dir, corpus["inputs"], shard_bytes=1 << 20)
+        with pytest.raises(Crash):
+            first.run_worker(CrashingDetector(detector, batches=2), batch_size=16, max_len=64)
+        shard_id = first.shards[0]["id"]
+        assert first.checkpoint(shard_id)["records"] == 32
+        # A torn write after the last checkpoint
+        with open(first._path("output", shard_id), "ab") as f:
+            f.write(b'{"language": "xx", "conf')
+
+        # The dead worker's lock blocks others until its lease expires
+        second = LabelingJob(job_dir, lease=600)
+        assert second.claim()["id"] != shard_id
+        second.release(second.shards[1]["id"])
+        lock = first._path("locks", shard_id)
+        os.utime(lock, (time.time() - 3600,) * 2)
+        assert second.status()["stale"] == 1
+
+        summary = second.run_worker(detector, batch_size=16, max_len=64)
+        assert summary["documents"] == 120 - 32
+        with pytest.raises(LeaseLost):
+            first.heartbeat(shard_id)
+
+        records = read_output(_merge(second, tmp_path))
+        expected = detector.detect_batch(corpus["texts"], max_len=64)
+        assert [r["language"] for r in records] == [language for language, _ in expected]
+
+    def test_take_over_keeps_a_fresh_lock(self, corpus, tmp_path, monkeypatch):
+        job_dir = str(tmp_path / "job")
+        LabelingJob.create(job_dir, corpus["inputs"], shard_bytes=1 << 20)
+        dead, racer, late = (LabelingJob(job_dir, lease=60) for _ in range(3))
+        shard_id = dead.claim()["id"]
+        lock = dead._path("locks", shard_id)
+        os.utime(lock, (time.time() - 3600,) * 2)
+
+        # Right after late's staleness check, racer takes the shard over
+        stat = os.stat
+        raced = []
+
+        def racing_stat(path, *args, **kwargs):
+            result = stat(path, *args, **kwargs)
+            if path == lock and not raced:
+                raced.append(True)
+                assert racer._take_over(lock)
+            return result
+
+        monkeypatch.setattr(os, "stat", racing_stat)
+        assert not late._take_over(lock)
+        monkeypatch.setattr(os, "stat", stat)
+        assert racer.owns(shard_id) and not late.owns(shard_id)
+        assert [name for name in os.listdir(os.path.dirname(lock)) if ".stale." in name] == []
+
+    def test_local_workers_with_kill(self, corpus, checkpoint_path, tmp_path):
+        job_dir = str(tmp_path / "job")
+        env = {**os.environ, "PYTHONPATH": ROOT + os.pathsep + os.environ.get("PYTHONPATH", "")}
+        run = [sys.executable, "-m", "lark.cli", "job"]
+        subprocess.run(run + ["plan", corpus["manifest"], job_dir, "--shard-mb", "0.002"], env=env,
+                       check=True, capture_output=True)
+        job = LabelingJob(job_dir)
+        assert len(job.shards) > 3
+        work = run + ["work", job_dir, "--batch-size", "4", "--max-len", "64",
+                      "--model-path", checkpoint_path, "--lease", "2"]
+        workers = [subprocess.Popen(work, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+                   for _ in range(2)]
+        # Kill one worker as soon as it has checkpointed progress
+        deadline = time.time() + 300
+        while time.time() < deadline and not any(job.checkpoint(s["id"]) for s in job.shards):
+            time.sleep(0.05)
+        workers[0].send_signal(signal.SIGKILL)
+        workers[0].wait()
+        workers[1].wait(timeout=600)
+        # Restarted workers take over what the killed one left once its lease expires
+        for _ in range(5):
+            if job.status()["complete"]:
+                break
+            time.sleep(2)
+            subprocess.run(work, env=env, check=True, capture_output=True, timeout=600)
+        assert job.status()["complete"]
+
+        output = str(tmp_path / "labels.jsonl")
+        subprocess.run(run + ["merge", job_dir, output], env=env, check=True, capture_output=True)
+        records = read_output(output)
+        assert len(records) == 120
+        assert [r.get("id") for r in records[70:]] == list(range(50))
+
+
+def _merge(job, tmp_path):
+    output = str(tmp_path / "labels.jsonl")
+    assert job.merge(output) == 120
+    return output
@@ -0,0 +1,58 @@
+"""
+Tests for cumulative detector metrics
+"""
+
+import pytest
+import torch
+
+from lark import LarkDetector
+from lark.metrics import DetectorMetrics, Histogram
+
+
+@pytest.fixture(scope="module")
+def detector(checkpoint_path):
+    return LarkDetector(model_path=checkpoint_path)
+
+
+class TestMetrics:
+    """Test cases for DetectorMetrics"""
+
+    def test_histogram_buckets(self):
+        hist = Histogram([1, 10])
+        hist.observe(1)
+        hist.observe_many(torch.tensor([5, 10, 50]))
+        snap = hist.snapshot()
+        assert snap["buckets"] == {"1": 1, "10": 3, "+Inf": 4}
+        assert snap["count"] == 4
+        assert snap["sum"] == 66
+
+    def test_entry_points_are_counted_once(self, detector):
+        detector.metrics = DetectorMetrics()
+        detector.detect("Hello world", max_len=32)
+        detector.detect_batch(["Hello", "world", "你好"], max_len=32)
+        detector.detect_with_confidence("Hello world", max_len=32)
+        snap = detector.metrics.snapshot()
+
+        assert snap["requests"] == {"detect": 1, "detect_batch": 1, "detect_with_confidence": 1}
+        assert snap["texts"]["detect_batch"] == 3
+        assert snap["batch_size"]["count"] == 3
+        assert snap["seq_len_bytes"]["count"] == 5
+        # single texts run unpadded on the single-text path, in an 18-token bucket
+        assert snap["padded_bytes"] == 3 * 32 + 2 * detector.single_path.bucket_for(13)
+        assert 0 < snap["padding_waste_ratio"] < 1
+
+    def test_prometheus_export(self, detector):
+        detector.metrics = DetectorMetrics()
+        detector.detect_batch(["Hello", "world"], max_len=32)
+        detector.metrics.record_cache("result", hits=3, misses=1)
+        text = detector.metrics.to_prometheus()
+        assert 'lark_requests_total{entry="detect_batch"} 1' in text
+        assert 'lark_request_latency_seconds_count{entry="detect_batch"} 1' in text
+        assert 'lark_batch_size_bucket{le="2"} 1' in text
+        assert 'lark_cache_lookups_total{cache="result",result="hit"} 3' in text
+        assert text.endswith("\n")
+
+    def test_metrics_can_be_disabled(self, checkpoint_path):
+        detector = LarkDetector(model_path=checkpoint_path, metrics=False)
+        detector.detect("Hello", max_len=32)
+        assert detector.metrics is None
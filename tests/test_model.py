@@ -0,0 +1,58 @@
+"""
+Tests for LarkModel inference modes
+"""
+
+import pytest
+import torch
+
+from lark.model import LarkModel, regroup_by_segments
+from lark.tokenizer import batch_tokenize
+
+
+@pytest.fixture(scope="module")
+def model(checkpoint_path):
+    model = LarkModel(
+        d_model=256, n_layers=4, n_heads=8, ff=512,
+        label_size=102, dropout=0.0, max_len=1024
+    )
+    model.load_state_dict(torch.load(checkpoint_path, map_location="cpu"))
+    return model.eval()
+
+
+MIXED_TEXTS = [
+    "Hi",
+    "Hello world, this is a somewhat longer English sentence for testing.",
+    "今天的天气真不错",
+    "ok",
+    "Привет! Как твои дела? Надеюсь, у тебя всё отлично сегодня. " * 3,
+    "a",
+    "Bonjour",
+    "こんにちは！今日はどんな一日でしたか？ Hello again, mixed script text here.",
+]
+
+
+class TestRegroupedDecoding:
+    """Test cases for two-stage decoder scheduling"""
+
+    def test_regroup_by_segments(self):
+        counts = torch.tensor([3, 50, 4, 3, 48, 5, 2, 60])
+        groups = regroup_by_segments(counts, tolerance=0.25, min_size=2)
+        assert sorted(torch.cat(groups).tolist()) == list(range(8))
+        assert len(groups) > 1
+        for idx in groups:
+            group_counts = counts[idx]
+            assert group_counts.max() <= group_counts.min() * 1.25 + 1 or len(idx) <= 2
+
+    def test_regrouped_logits_match(self, model):
+        token_ids, pad_mask = batch_tokenize(MIXED_TEXTS, max_len=256)
+        with torch.no_grad():
+            expected = model(token_ids, pad_mask)
+            model.regroup_decoder = True
+            model.regroup_min_size = 1
+            try:
+                regrouped = model(token_ids, pad_mask)
+            finally:
+                model.regroup_decoder = False
+        assert regrouped.shape == expected.shape
+        assert torch.allclose(regrouped.float(), expected.float(), atol=2e-2)
+        assert torch.equal(regrouped.argmax(-1), expected.argmax(-1))
@@ -0,0 +1,96 @@
+"""
+Tests for the byte n-gram classifier and the cascade mode
+"""
+
+import json
+
+import numpy as np
+import pytest
+import torch
+
+from benchmarks.workload import generate_workload
+from lark import LarkDetector
+from lark.cli import main as cli_main
+from lark.ngram import NgramClassifier, build_ngram, cascade_report, hash_ngrams
+
+
+@pytest.fixture(scope="module")
+def detector(checkpoint_path):
+    return LarkDetector(model_path=checkpoint_path)
+
+
+@pytest.fixture(scope="module")
+def sample():
+    return generate_workload(400, seed=3, profile="chat")
+
+
+@pytest.fixture(scope="module")
+def classifier(detector, sample):
+    return build_ngram(detector, sample, distill=False, n_buckets=1 << 12, max_len=128, epochs=20)
+
+
+class TestNgram:
+    """Test cases for lark.ngram and LarkDetector(cascade=...)"""
+
+    def test_hash_ngrams_layout(self):
+        buckets, offsets = hash_ngrams(["ab", "", "é"], n_buckets=97, orders=(1, 2))
+        # framed lengths 4, 2, 4 -> unigrams + bigrams: 4+3, 2+1, 4+3
+        assert offsets.tolist() == [0, 7, 10]
+        assert len(buckets) == 17
+        assert buckets.min() >= 0 and buckets.max() < 97
+        # n-grams of a text do not depend on its neighbours
+        alone, _ = hash_ngrams(["ab"], n_buckets=97, orders=(1, 2))
+        assert sorted(alone.tolist()) == sorted(buckets[:7].tolist())
+
+    def test_learns_gold_labels(self, classifier, sample):
+        predicted = classifier.predict_proba([t for t, _ in sample]).argmax(dim=-1).tolist()
+        accuracy = np.mean([classifier.labels[p] == label for p, (_, label) in zip(predicted, sample)])
+        assert accuracy > 0.9
+
+    def test_save_load_roundtrip(self, classifier, tmp_path):
+        path = str(tmp_path / "ngram.npz")
+        classifier.save(path)
+        loaded = NgramClassifier.load(path)
+        assert loaded.labels == classifier.labels and loaded.orders == classifier.orders
+        texts = ["Hello world", "Привет мир"]
+        assert torch.allclose(loaded.logits(texts), classifier.logits(texts), atol=1e-2)
+
+    def test_cascade_thresholds(self, detector, classifier, checkpoint_path, sample):
+        texts = [t for t, _ in sample[:16]]
+        transformer = detector.detect_batch(texts, max_len=64)
+
+        escalate_all = LarkDetector(model_path=checkpoint_path, cascade=classifier,
+                                    cascade_threshold=1.1)
+        assert escalate_all.detect_batch(texts, max_len=64) == transformer
+        assert escalate_all.metrics.snapshot()["counters"]["cascade_escalated"] == 16
+
+        ngram_only = LarkDetector(model_path=checkpoint_path, cascade=classifier,
+                                  cascade_threshold=0.0)
+        expected = classifier.predict_proba(texts).max(dim=-1)
+        results = ngram_only.detect_batch(texts, max_len=64)
+        assert [r[0] for r in results] == [classifier.labels[i] for i in expected.indices.tolist()]
+        assert ngram_only.metrics.snapshot()["counters"]["cascade_ngram"] == 16
+
+    def test_rejects_other_label_set(self, checkpoint_path):
+        other = NgramClassifier(np.zeros((8, 2)), np.zeros(2), ["a", "b"])
+        with pytest.raises(ValueError, match="label set"):
+            LarkDetector(model_path=checkpoint_path, cascade=other)
+
+    def test_cascade_report(self, detector, classifier, sample):
+        report = cascade_report(detector, classifier, sample[:32], thresholds=(0.0, 1.1), max_len=64)
+        never, always = report["cascade"]
+        assert never["escalation_rate"] == 0.0
+        assert never["accuracy"] == pytest.approx(report["ngram"]["accuracy"])
+        assert always["escalation_rate"] == 1.0 and always["agreement"] == 1.0
+        assert always["accuracy"] == pytest.approx(report["transformer"]["accuracy"])
+
+    def test_cli_build_ngram(self, checkpoint_path, sample, tmp_path):
+        data = tmp_path / "train.tsv"
+        data.write_text("".join(f"{label}\t{text}\n" for text, label in sample[:64]), encoding="utf-8")
+        output = tmp_path / "ngram.npz"
+        assert cli_main(["build-ngram", str(data), "--output", str(output), "--n-buckets", "1024",
+                         "--max-len", "64", "--epochs", "1", "--thresholds", "0.5,0.9",
+                         "--model-path", checkpoint_path]) == 0
+        report = json.loads((tmp_path / "ngram_report.json").read_text())
+        assert [row["threshold"] for row in report["cascade"]] == [0.5, 0.9]
+        assert NgramClassifier.load(str(output)).n_buckets == 1024
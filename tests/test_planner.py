@@ -0,0 +1,86 @@
+"""
+Tests for the memory-bounded batch planner
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from lark import LarkDetector
+from lark.planner import BatchPlanner
+
+
+class TestBatchPlanner:
+    """Test cases for BatchPlanner"""
+
+    def test_plan_respects_budgets(self):
+        planner = BatchPlanner(memory_budget_mb=64, token_budget=8192)
+        lengths = np.random.RandomState(0).randint(0, 2000, size=200)
+        plan = planner.plan(lengths, 1024)
+        rows = np.concatenate([r for r, _ in plan])
+        assert sorted(rows.tolist()) == list(range(200))
+        for group, seq_len in plan:
+            assert seq_len % 16 == 0 and seq_len <= 1024
+            assert (planner.padded_length(lengths[group], 1024) <= seq_len).all()
+            if len(group) > 1:
+                assert planner.estimate_bytes(len(group), seq_len) <= 64 * 1024 ** 2
+                assert len(group) * seq_len <= 8192
+
+    def test_short_texts_split_from_long(self):
+        planner = BatchPlanner(memory_budget_mb=None, min_batch_size=2)
+        plan = planner.plan([1000, 900, 10, 12, 11], 1024)
+        assert [(sorted(r.tolist()), L) for r, L in plan] == [([0, 1], 1008), ([2, 3, 4], 16)]
+
+    def test_detector_results_unchanged(self, checkpoint_path):
+        texts = ["Hello world", "", "日本語のテキスト" * 30, "Bonjour", "x" * 1500] * 3
+        plain = LarkDetector(model_path=checkpoint_path, dtype="float32")
+        planned = LarkDetector(model_path=checkpoint_path, dtype="float32",
+                               batch_planner=BatchPlanner(memory_budget_mb=16, min_batch_size=2))
+        expected = plain.detect_batch(texts, max_len=512)
+        result = planned.detect_batch(texts, max_len=512)
+        assert [lang for lang, _ in result] == [lang for lang, _ in expected]
+        assert np.allclose([c for _, c in result], [c for _, c in expected], atol=1e-4)
+        assert planned.metrics.snapshot()["counters"]["planned_sub_batches"] > 1
+
+
+# VmHWM rather than ru_maxrss: Linux carries ru_maxrss over from the parent
+# across exec, which would hide the child's own peak behind pytest's.
+PEAK_RSS_SCRIPT = r"""
+import json, sys
+import torch
+from lark import LarkDetector
+from lark.planner import BatchPlanner
+
+def peak_kb():
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+
+torch.set_num_threads(1)
+budget = float(sys.argv[2]) if sys.argv[2] != "none" else None
+detector = LarkDetector(model_path=sys.argv[1],
+                        batch_planner=BatchPlanner(memory_budget_mb=budget) if budget else False)
+detector.detect_batch(["warm up"] * 2, max_len=64)
+base = peak_kb()
+detector.detect_batch(["Lorem ipsum dolor sit amet. " * 40] * 32, max_len=512)
+peak = peak_kb()
+print(json.dumps({"growth_mb": (peak - base) / 1024}))
+"""
+
+
+def _peak_growth(checkpoint_path, budget):
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    out = subprocess.run([sys.executable, "-c", PEAK_RSS_SCRIPT, checkpoint_path, str(budget)],
+                         capture_output=True, text=True, env=env, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])["growth_mb"]
+
+
+def test_peak_rss_ceiling(checkpoint_path):
+    if not sys.platform.startswith("linux"):
+        return
+    unbounded = _peak_growth(checkpoint_path, "none")
+    bounded = _peak_growth(checkpoint_path, 64)
+    assert bounded <= 64 * 1.25
+    assert bounded < unbounded / 2
@@ -0,0 +1,51 @@
+"""
+Tests for the pre-model script prefilter
+"""
+
+import pytest
+
+from lark import LarkDetector
+from lark.prefilter import Prefilter, TO_MODEL, UNDEFINED
+
+
+@pytest.fixture(scope="module")
+def detector(checkpoint_path):
+    return LarkDetector(model_path=checkpoint_path, prefilter=True)
+
+
+class TestPrefilter:
+    """Test cases for Prefilter"""
+
+    def test_classify(self, detector):
+        prefilter = Prefilter(detector.label2id)
+        texts = ["", "   ", "12,345.67 !!", "გამარჯობა მსოფლიო", "Բարեւ աշխարհ 2024",
+                 "សួស្តី", "Hello world", "שלום", "გამარჯობა hello", "こんにちは。"]
+        decisions = prefilter.classify(texts).tolist()
+        label2id = detector.label2id
+        assert decisions == [UNDEFINED, UNDEFINED, UNDEFINED, label2id["ka"], label2id["hy"],
+                             label2id["km"], TO_MODEL, TO_MODEL, TO_MODEL, label2id["ja"]]
+        stats = prefilter.stats()
+        assert stats["undefined"] == 3
+        assert stats["script"] == 4
+        assert stats["model"] == 3
+
+    def test_policy_can_disable_resolution(self, detector):
+        prefilter = Prefilter(detector.label2id, resolve_undefined=False, resolve_scripts=False)
+        assert prefilter.classify(["", "123", "გამარჯობა"]).tolist() == [TO_MODEL] * 3
+
+    def test_detector_skips_model(self, detector):
+        detector.prefilter.reset()
+        results = detector.detect_batch(["", "გამარჯობა", "Hello world", "42"])
+        assert results[0] == ("unknown", 0.0)
+        assert results[1] == ("ka", 1.0)
+        assert results[3] == ("unknown", 0.0)
+        assert results[2][0] in detector.get_supported_languages()
+        assert detector.prefilter.stats()["model"] == 1
+        assert detector.metrics.snapshot()["counters"]["prefilter_model"] >= 1
+
+    def test_model_rows_unchanged(self, detector, checkpoint_path):
+        plain = LarkDetector(model_path=checkpoint_path)
+        texts = ["Hello world", "今天天气真好"]
+        expected = plain.detect_batch(texts, max_len=64)
+        mixed = detector.detect_batch(["", texts[0], "ქართული", texts[1]], max_len=64)
+        assert [mixed[1], mixed[3]] == expected
@@ -0,0 +1,87 @@
+"""
+Tests for the shared-prefix encoder-state cache
+"""
+
+import pytest
+import torch
+
+from benchmarks.bench_prefix import templated_workload
+from lark import LarkDetector
+from lark.prefix_cache import PrefixCache, PrefixState, encode
+
+TEMPLATE = "Your order has shipped and will arrive within 3-5 business days. Details: "
+
+
+@pytest.fixture(scope="module")
+def plain(checkpoint_path):
+    return LarkDetector(model_path=checkpoint_path, metrics=False)
+
+
+def make_state(tokens, nbytes=100):
+    state = PrefixState(tuple(tokens), [], [], torch.zeros(0))
+    state.nbytes = nbytes
+    return state
+
+
+class TestPrefixCache:
+    """Test cases for lark.prefix_cache and LarkDetector(prefix_cache=...)"""
+
+    def test_encode_continues_prefix(self, plain):
+        encoder = plain.model.encoder
+        token_ids = torch.randint(1, 256, (2, 40))
+        pad_mask = torch.ones(2, 40)
+        pad_mask[1, 30:] = 0
+        with torch.no_grad():
+            reference = encoder(token_ids, pad_mask)
+            full, keys, values = encode(encoder, token_ids, pad_mask)
+            assert torch.allclose(full[pad_mask.bool()].float(), reference[pad_mask.bool()].float(), atol=1e-2)
+
+            state = PrefixState(tuple(token_ids[0, :16].tolist()), [k[0, :16] for k in keys],
+                                [v[0, :16] for v in values], full[0, :16])
+            suffix, _, _ = encode(encoder, token_ids[:1, 16:], pad_mask[:1, 16:], state)
+        assert torch.allclose(suffix[0].float(), full[0, 16:].float(), atol=2e-2)
+
+    def test_observe_thresholds(self):
+        cache = PrefixCache(min_prefix=4, min_count=2, max_prefix=6)
+        assert cache.observe([1, 2, 3, 4, 5, 6, 7, 8]) == 0
+        assert cache.observe([1, 2, 3, 9, 9]) == 0  # shared prefix shorter than min_prefix
+        assert cache.observe([1, 2, 3, 4, 5, 6, 7, 9]) == 6  # capped at max_prefix
+
+    def test_lookup_leaves_a_suffix_token(self):
+        cache = PrefixCache()
+        cache.insert(make_state([1, 2, 3]))
+        cache.insert(make_state([1, 2, 3, 4, 5]))
+        assert cache.lookup([1, 2, 3, 4, 5, 6]).tokens == (1, 2, 3, 4, 5)
+        assert cache.lookup([1, 2, 3, 4, 5]).tokens == (1, 2, 3)
+        assert cache.lookup([1, 2, 3]) is None
+        assert cache.lookup([2, 3, 4, 5]) is None
+
+    def test_lru_eviction(self):
+        cache = PrefixCache(max_bytes=250)
+        for first in (1, 2):
+            cache.insert(make_state([first] * 4))
+        cache.lookup([1, 1, 1, 1, 0])  # refresh [1, 1, 1, 1]
+        cache.insert(make_state([3] * 4))
+        assert len(cache) == 2 and cache.stats()["evictions"] == 1
+        assert cache.lookup([2, 2, 2, 2, 0]) is None
+        assert cache.lookup([1, 1, 1, 1, 0]) is not None
+        assert cache.cached_bytes == 200
+        cache.insert(make_state([9] * 4, nbytes=1000))  # larger than the whole cache
+        assert len(cache) == 2
+
+    def test_detector_matches_plain(self, plain, checkpoint_path):
+        cached = LarkDetector(model_path=checkpoint_path, prefix_cache=True)
+        texts = [TEMPLATE + body for body in ("tomorrow", "Lieferung morgen", "明日届きます")] * 4
+        texts += templated_workload(60, templated=0.8, seed=3)
+        results = []
+        for i in range(0, len(texts), 16):
+            results.extend(cached.detect_batch(texts[i:i + 16], max_len=256))
+        expected = plain.detect_batch(texts, max_len=256)
+        assert [r[0] for r in results] == [r[0] for r in expected]
+        assert [r[1] for r in results] == pytest.approx([r[1] for r in expected], abs=5e-3)
+        assert cached.detect(TEMPLATE + "done")[0] == plain.detect(TEMPLATE + "done")[0]
+
+        stats = cached.prefix_cache.stats()
+        assert stats["hits"] > 0 and 0 < stats["hit_rate"] <= 1
+        assert stats["bytes_saved"] > 0 and stats["prefixes"] > 0
+        assert cached.metrics.snapshot()["counters"]["prefix_bytes_saved"] == stats["bytes_saved"]
@@ -0,0 +1,73 @@
+"""
+Tests for per-stage inference profiling
+"""
+
+import pytest
+
+from lark import LarkDetector
+
+
+@pytest.fixture(scope="module")
+def detector(checkpoint_path):
+    return LarkDetector(model_path=checkpoint_path)
+
+
+class TestProfiling:
+    """Test cases for StageProfiler integration"""
+
+    def test_disabled_by_default(self, detector):
+        assert detector.stats() == {}
+        assert detector.model.profiler is None
+
+    def test_stats_and_callback(self, detector):
+        records = []
+        detector.enable_profiling(callback=records.append)
+        try:
+            expected = detector.detect_batch(["Hello world", "今天天气真好"], max_len=64)
+            detector.disable_profiling()
+            assert detector.detect_batch(["Hello world", "今天天气真好"], max_len=64) == expected
+            detector.enable_profiling(callback=records.append)
+            detector.detect_batch(["Hello world", "今天天气真好"], max_len=64)
+            stats = detector.stats()
+        finally:
+            detector.disable_profiling()
+
+        assert stats["calls"] == 1
+        assert set(stats["stages"]) == {
+            "tokenize", "encoder", "boundary", "downsample", "decoder", "postprocess"
+        }
+        assert stats["padded_bytes"] == 2 * 64
+        # "Hello world" is 11 bytes, the Chinese text 18, each plus START/END
+        assert stats["real_bytes"] == 13 + 20
+        assert len(records) == 2
+        assert records[-1]["batch_size"] == 2
+        assert records[-1]["seq_len"] == 64
+        assert records[-1]["segment_len"] >= 1
+
+    def test_single_text_keeps_fast_path(self, detector):
+        expected = detector.detect("Hello world", max_len=64)
+        records = []
+        detector.enable_profiling(callback=records.append)
+        try:
+            assert detector.detect("Hello world", max_len=64) == expected
+        finally:
+            detector.disable_profiling()
+        record = records[-1]
+        assert record["single_path"] is True
+        assert set(record["stages"]) == {"tokenize", "encoder", "downsample", "decoder", "postprocess"}
+        assert record["real_bytes"] == 13
+        assert record["padded_bytes"] == detector.single_path.bucket_for(13)
+
+    def test_prefix_cache_groups_are_profiled(self, checkpoint_path):
+        cached = LarkDetector(model_path=checkpoint_path, prefix_cache=True, metrics=False)
+        template = "Your order has shipped and will arrive within 3-5 business days. Note: "
+        texts = [template + body for body in ("soon", "bientôt", "bald", "pronto")]
+        cached.detect_batch(texts, max_len=128)
+        records = []
+        cached.enable_profiling(callback=records.append)
+        cached.detect_batch(texts, max_len=128)
+        prefixed = [r for r in records if "prefix_len" in r]
+        assert sum(r["batch_size"] for r in prefixed) == len(texts)
+        for record in prefixed:
+            assert {"encoder", "boundary", "decoder"} <= set(record["stages"])
+            assert record["real_bytes"] < record["batch_size"] * record["prefix_len"]
@@ -0,0 +1,83 @@
+"""
+Tests for structured pruning and pruned checkpoint loading
+"""
+
+import json
+
+import pytest
+import torch
+
+from benchmarks.workload import generate_workload
+from lark import LarkDetector
+from lark.cli import main as cli_main
+from lark.data import load_labeled
+from lark.prune import importance_scores, prune_model, save_variant
+
+
+@pytest.fixture(scope="module")
+def detector(checkpoint_path):
+    return LarkDetector(model_path=checkpoint_path, metrics=False)
+
+
+@pytest.fixture(scope="module")
+def sample():
+    return generate_workload(32, seed=1, profile="chat")
+
+
+@pytest.fixture(scope="module")
+def scores(detector, sample):
+    return importance_scores(detector.model, sample, detector.label2id, max_len=64, batch_size=16)
+
+
+class TestPrune:
+    """Test cases for lark.prune"""
+
+    def test_scores_shapes(self, scores):
+        assert len(scores["heads"]["encoder"]) == 4
+        assert scores["heads"]["decoder"][0].shape == (8,)
+        assert scores["ffn"]["encoder"][0].shape == (512,)
+        assert len(scores["layers"]["decoder"]) == 4
+
+    def test_prune_model(self, detector, scores):
+        pruned, summary = prune_model(detector.model, scores, ffn_ratio=0.5,
+                                      head_ratio=0.25, layer_ratio=0.5)
+        assert len(pruned.encoder.encoder.layers) == 2
+        assert len(pruned.decoder.transformer_layers) == 2
+        assert pruned.config["encoder_ff"] == [256, 256]
+        assert all(len(h) == 2 for h in summary["zeroed_heads"]["encoder"].values())
+        # the original model is untouched
+        assert len(detector.model.encoder.encoder.layers) == 4
+
+    def test_variant_loads(self, detector, scores, tmp_path):
+        pruned, summary = prune_model(detector.model, scores, ffn_ratio=0.25, layer_ratio=0.25)
+        path = tmp_path / "variant.pth"
+        save_variant(pruned, str(path), summary)
+        variant = LarkDetector(model_path=str(path), allow_random_init=False, dtype="float32")
+        assert variant.model.config["decoder_ff"] == pruned.config["decoder_ff"]
+        pruned = pruned.float().eval()
+        token_ids, pad_mask = torch.randint(0, 256, (2, 32)), torch.ones(2, 32)
+        with torch.no_grad():
+            assert torch.allclose(variant.model(token_ids, pad_mask), pruned(token_ids, pad_mask))
+
+    def test_cli(self, checkpoint_path, sample, tmp_path):
+        data = tmp_path / "sample.jsonl"
+        data.write_text("\n".join(json.dumps({"text": t, "label": l}) for t, l in sample),
+                        encoding="utf-8")
+        out = tmp_path / "variants"
+        assert cli_main(["prune", "--data", str(data), "--model-path", checkpoint_path,
+                         "--output-dir", str(out), "--levels", "0.5", "--max-len", "64"]) == 0
+        report = json.loads((out / "prune_report.json").read_text())
+        assert [r["level"] for r in report] == [0.0, 0.5]
+        assert report[1]["parameters"] < report[0]["parameters"]
+
+
+def test_load_labeled(tmp_path):
+    jsonl = tmp_path / "a.jsonl"
+    jsonl.write_text('{"text": "hello", "lang": "en"}\n\n{"text": "hallo", "label": "de"}\n')
+    assert load_labeled(str(jsonl)) == [("hello", "en"), ("hallo", "de")]
+    tsv = tmp_path / "b.tsv"
+    tsv.write_text("fr\tbonjour\tmonde\nes\thola\n")
+    assert load_labeled(str(tsv), limit=1) == [("bonjour\tmonde", "fr")]
+    tsv.write_text("no tab here\n")
+    with pytest.raises(ValueError):
+        load_labeled(str(tsv))
@@ -0,0 +1,46 @@
+"""
+Tests for the shared detector registry
+"""
+
+import threading
+
+from lark import DetectorRegistry, detect_language, detect_languages, default_registry
+
+
+class TestDetectorRegistry:
+    """Test cases for DetectorRegistry"""
+
+    def test_same_instance_for_same_key(self, checkpoint_path):
+        registry = DetectorRegistry()
+        first = registry.get(checkpoint_path)
+        assert registry.get(checkpoint_path) is first
+        assert len(registry) == 1
+
+    def test_clear_and_preload(self, checkpoint_path):
+        registry = DetectorRegistry()
+        first = registry.preload(checkpoint_path)
+        registry.clear()
+        assert len(registry) == 0
+        assert registry.get(checkpoint_path) is not first
+
+    def test_concurrent_get_builds_once(self, checkpoint_path):
+        registry = DetectorRegistry()
+        found = []
+        threads = [
+            threading.Thread(target=lambda: found.append(registry.get(checkpoint_path)))
+            for _ in range(4)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len({id(d) for d in found}) == 1
+
+    def test_convenience_functions_share_detector(self, checkpoint_path):
+        default_registry.clear()
+        language, confidence = detect_language("Hello world", model_path=checkpoint_path)
+        results = detect_languages(["Hello world", "你好"], model_path=checkpoint_path)
+        assert len(default_registry) == 1
+        assert results[0][0] == language
+        assert abs(results[0][1] - confidence) < 1e-3
+        default_registry.clear()
@@ -0,0 +1,136 @@
+"""
+Tests for the persistent result cache
+"""
+
+import multiprocessing
+import sqlite3
+import time
+
+import numpy as np
+import pytest
+
+from lark import LarkDetector
+from lark.ngram import NgramClassifier
+from lark.result_cache import ResultCache, make_keys
+
+TEXTS = ["Hello, how are you today?", "Bonjour, comment allez-vous?",
+         "Hello, how are you today?", "这是一个中文句子。"]
+
+
+def _probabilities(seed: int) -> bytes:
+    return np.random.default_rng(seed).random(102, dtype=np.float32).tobytes()
+
+
+def _writer(path, worker, n):
+    cache = ResultCache(path, timeout=60)
+    keys = make_keys(f"worker{worker}", 64, [str(i) for i in range(n)])
+    for i in range(0, n, 10):
+        cache.put_many((key, "en", _probabilities(i)) for key in keys[i:i + 10])
+        cache.get_many(keys[:i + 10])
+    cache.close()
+
+
+@pytest.fixture(scope="module")
+def detector(checkpoint_path):
+    return LarkDetector(model_path=checkpoint_path)
+
+
+class TestResultCache:
+    """Test cases for lark.result_cache and LarkDetector(result_cache=...)"""
+
+    def test_keys(self):
+        a, b, c = make_keys("ns", 64, ["x", "y", "x"])
+        assert len(a) == 16 and a == c and a != b
+        assert make_keys("other", 64, ["x"])[0] != a
+        assert make_keys("ns", 128, ["x"])[0] != a
+
+    def test_put_get(self, tmp_path):
+        cache = ResultCache(str(tmp_path / "cache.db"))
+        keys = make_keys("ns", 64, ["a", "b", "c"])
+        cache.put_many([(keys[0], "en", _probabilities(0)), (keys[1], "fr", _probabilities(1))])
+        found = cache.get_many(keys + keys[:1])
+        assert set(found) == set(keys[:2])
+        assert found[keys[1]] == ("fr", _probabilities(1))
+        assert len(cache) == 2
+
+    def test_lru_eviction(self, tmp_path):
+        cache = ResultCache(str(tmp_path / "cache.db"), max_bytes=256 * 1024, touch_interval=0)
+        keys = make_keys("ns", 64, [str(i) for i in range(2000)])
+        cache.put_many((key, "en", _probabilities(0)) for key in keys[:100])
+        cache.get_many(keys[:10])  # recently used
+        for i in range(100, 2000, 100):
+            cache.put_many((key, "en", _probabilities(0)) for key in keys[i:i + 100])
+            cache.get_many(keys[:10])
+        assert cache.evictions > 0
+        assert cache.size_bytes() <= 256 * 1024
+        assert len(cache.get_many(keys[:10])) == 10
+        assert len(cache.get_many(keys[100:200])) == 0
+
+    def test_touch_does_not_wait_for_writer(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        cache = ResultCache(path, timeout=30, touch_interval=0)
+        keys = make_keys("ns", 64, ["a", "b"])
+        cache.put_many([(key, "en", _probabilities(0)) for key in keys])
+        writer = sqlite3.connect(path, isolation_level=None)
+        writer.execute("BEGIN IMMEDIATE")
+        try:
+            t0 = time.perf_counter()
+            assert set(cache.get_many(keys)) == set(keys)
+            assert time.perf_counter() - t0 < 5
+        finally:
+            writer.execute("ROLLBACK")
+            writer.close()
+
+        # Rows touched within touch_interval are not rewritten
+        recent = ResultCache(path, touch_interval=3600)
+        before = recent._connect().execute("SELECT last_used FROM results").fetchall()
+        recent.get_many(keys)
+        assert recent._connect().execute("SELECT last_used FROM results").fetchall() == before
+
+    def test_concurrent_processes(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        ctx = multiprocessing.get_context("spawn")
+        workers = [ctx.Process(target=_writer, args=(path, w, 100)) for w in range(3)]
+        for p in workers:
+            p.start()
+        for p in workers:
+            p.join(120)
+        assert [p.exitcode for p in workers] == [0, 0, 0]
+        assert len(ResultCache(path)) == 300
+
+    def test_detector_hits(self, checkpoint_path, detector, tmp_path):
+        path = str(tmp_path / "cache.db")
+        expected = detector.detect_batch(TEXTS, max_len=64)
+        expected_topk = detector.detect_topk_batch(TEXTS, k=3, max_len=64)
+
+        cached = LarkDetector(model_path=checkpoint_path, result_cache=path)
+        assert cached.detect_batch(TEXTS, max_len=64) == expected
+        assert len(cached.result_cache) == 3  # the duplicate text is computed once
+        # a second process-like instance reads the same file
+        reader = LarkDetector(model_path=checkpoint_path, result_cache=path)
+        assert reader.detect_batch(TEXTS, max_len=64) == expected
+        ids, probs, _ = reader.detect_topk_batch(TEXTS, k=3, max_len=64)
+        assert np.array_equal(ids, expected_topk[0])
+        assert np.allclose(probs, expected_topk[1])
+        caches = reader.metrics.snapshot()["caches"]["results"]
+        assert caches["misses"] == 0 and caches["hits"] == 8
+
+    def test_fingerprint_invalidates(self, checkpoint_path, detector, tmp_path):
+        path = str(tmp_path / "cache.db")
+        LarkDetector(model_path=checkpoint_path, result_cache=path).detect_batch(TEXTS, max_len=64)
+        other = LarkDetector(model_path=checkpoint_path, dtype="float32", result_cache=path)
+        assert other.fingerprint() != detector.fingerprint()
+        other.detect_batch(TEXTS, max_len=64)
+        assert other.metrics.snapshot()["caches"]["results"]["hits"] == 0
+        budget = LarkDetector(model_path=checkpoint_path, byte_budget=32)
+        assert budget.fingerprint() != detector.fingerprint()
+
+    def test_fingerprint_tracks_attached_cascade(self, checkpoint_path):
+        detector = LarkDetector(model_path=checkpoint_path, metrics=False)
+        labels = [detector.id2label[i] for i in range(len(detector.id2label))]
+        detector.cascade = NgramClassifier(np.zeros((64, len(labels))), np.zeros(len(labels)), labels)
+        first = detector.fingerprint()
+        assert detector.fingerprint() == first
+        detector.cascade = NgramClassifier(np.ones((64, len(labels))), np.zeros(len(labels)), labels)
+        assert detector.fingerprint() != first
+
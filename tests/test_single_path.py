@@ -0,0 +1,82 @@
+"""
+Tests for the low-latency single-text path
+"""
+
+import pytest
+import torch
+
+from benchmarks.bench_latency import parse_targets, texts_of_size
+from lark import LarkDetector
+from lark.single import SingleTextPath
+from lark.tokenizer import batch_tokenize, tokenize_one
+
+TEXTS = ["", "a", "Hello world", "Bonjour tout le monde, comment ça va ?", "日本語のテキストです",
+         "Привет " * 40, "x" * 3000]
+
+
+@pytest.fixture(scope="module")
+def fast(checkpoint_path):
+    return LarkDetector(model_path=checkpoint_path)
+
+
+@pytest.fixture(scope="module")
+def general(checkpoint_path):
+    return LarkDetector(model_path=checkpoint_path, single_path=False)
+
+
+def assert_same(a, b):
+    assert a[0] == b[0]
+    assert a[1] == pytest.approx(b[1], abs=2e-3)
+
+
+class TestSinglePath:
+    """Test cases for lark.single and LarkDetector(single_path=...)"""
+
+    def test_tokenize_one_matches_batch(self):
+        for text in TEXTS:
+            for options in ({"max_len": 64}, {"max_len": 64, "truncation": "excerpts", "n_excerpts": 3}):
+                token_ids, pad_mask = batch_tokenize([text], **options)
+                assert tokenize_one(text, **options) == token_ids[0, :int(pad_mask.sum())].tolist()
+
+    def test_matches_batch_path(self, fast, general):
+        for text in TEXTS:
+            for max_len in (1024, 40):
+                assert_same(fast.detect(text, max_len=max_len), general.detect(text, max_len=max_len))
+
+    def test_byte_budget(self, checkpoint_path):
+        text = "Guten Morgen, wie geht es dir? " * 20
+        budget = LarkDetector(model_path=checkpoint_path, byte_budget=96)
+        plain = LarkDetector(model_path=checkpoint_path, byte_budget=96, single_path=False)
+        assert_same(budget.detect(text), plain.detect(text))
+
+    def test_stale_scratch_is_harmless(self, fast, general):
+        fast.detect("z" * 60)
+        for text in ("ab", "Hello world"):
+            assert_same(fast.detect(text), general.detect(text))
+
+    def test_buckets(self, fast):
+        path = fast.single_path
+        assert path.bucket_for(3) == path.buckets[0]
+        assert path.bucket_for(18) == 18 and path.bucket_for(19) == 26
+        assert path.buckets[-1] <= fast.model.encoder.pos_emb.shape[1]
+        assert SingleTextPath(buckets=(8, 4096)).bind(fast.model).buckets == [8]
+
+    def test_eager_fallback_matches(self, checkpoint_path, general):
+        eager = LarkDetector(model_path=checkpoint_path, single_path=SingleTextPath(trace=False))
+        for text in TEXTS[:4]:
+            assert_same(eager.detect(text), general.detect(text))
+
+    def test_used_for_single_texts_only(self, checkpoint_path):
+        detector = LarkDetector(model_path=checkpoint_path)
+        detector.detect("Hello")
+        detector.detect_batch(["Hola"])
+        detector.detect_batch(["Hello", "Hola"])
+        snapshot = detector.metrics.snapshot()
+        assert snapshot["counters"]["single_path"] == 2
+        probabilities = detector.detect_topk_batch(["Hello"], k=3)[1]
+        assert probabilities.shape == (1, 3) and torch.isfinite(torch.from_numpy(probabilities)).all()
+
+    def test_benchmark_helpers(self):
+        assert parse_targets("16:1:2,64:3.5:7") == {16: (1.0, 2.0), 64: (3.5, 7.0)}
+        texts = texts_of_size(64, 8)
+        assert all(60 <= len(t.encode("utf-8")) <= 64 for t in texts)
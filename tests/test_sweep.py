@@ -0,0 +1,65 @@
+"""
+Tests for the accuracy-versus-latency sweep
+"""
+
+import json
+
+from benchmarks.workload import generate_workload
+from lark.cli import main as cli_main
+from lark.sweep import grid, mark_pareto, recommend, run_sweep
+
+
+def _result(accuracy, p99, **point):
+    return {"accuracy": accuracy, "latency_ms": {"p50": p99, "p95": p99, "p99": p99},
+            "dtype": "float32", "threads": 1, "batch_size": 8, "max_len": 128, **point}
+
+
+class TestSweep:
+    """Test cases for lark.sweep"""
+
+    def test_grid(self):
+        points = grid([128, 256], ["float32"], [1, 2], [8])
+        assert len(points) == 4
+        assert points[0] == {"max_len": 128, "dtype": "float32", "threads": 1, "batch_size": 8}
+
+    def test_pareto_and_recommend(self):
+        results = mark_pareto([
+            _result(0.90, 100, max_len=1024),
+            _result(0.85, 40, max_len=256),
+            _result(0.80, 50, max_len=512),   # dominated by the 256 point
+            _result(0.70, 10, max_len=64),
+        ])
+        assert [r["pareto"] for r in results] == [True, True, False, True]
+        assert recommend(results, max_latency_ms=60)["call_options"]["max_len"] == 256
+        assert recommend(results, min_accuracy=0.8)["point"]["max_len"] == 256
+        assert recommend(results)["point"]["max_len"] == 1024
+        assert recommend(results, max_latency_ms=5) is None
+
+    def test_pareto_uses_per_text_latency(self):
+        results = mark_pareto([
+            _result(0.85, 5, batch_size=1),
+            _result(0.85, 64, batch_size=32),   # 2 ms per text
+            _result(0.85, 320, batch_size=32, max_len=1024),  # dominated
+        ])
+        assert [r["pareto"] for r in results] == [False, True, False]
+        assert recommend(results, min_accuracy=0.8)["call_options"]["batch_size"] == 32
+        # A budget on the batch call still rules out the large batch
+        assert recommend(results, max_latency_ms=10)["call_options"]["batch_size"] == 1
+
+    def test_run_sweep_and_cli(self, checkpoint_path, tmp_path):
+        data = tmp_path / "eval.jsonl"
+        data.write_text("\n".join(json.dumps({"text": t, "label": l})
+                                  for t, l in generate_workload(16, seed=4, profile="chat")))
+        results = run_sweep(grid([64, 128], ["float32"], [1], [8]), str(data),
+                            model_path=checkpoint_path, isolate=False)
+        assert [r["max_len"] for r in results] == [64, 128]
+        assert all(r["texts_per_s"] > 0 for r in results)
+
+        output = tmp_path / "sweep.json"
+        code = cli_main(["sweep", str(data), "--model-path", checkpoint_path,
+                         "--max-lens", "64", "--dtypes", "float32", "--batch-sizes", "8",
+                         "--output", str(output)])
+        assert code == 0
+        report = json.loads(output.read_text())
+        assert report["results"][0]["pareto"] is True
+        assert report["recommendation"]["detector_options"] == {"dtype": "float32", "num_threads": 1}
@@ -0,0 +1,56 @@
+"""
+Tests for byte-budget excerpt sampling
+"""
+
+import numpy as np
+import pytest
+import torch
+
+from lark import LarkDetector
+from lark.tokenizer import batch_tokenize, sample_excerpts, tokenize_buffer
+
+
+LONG_TEXT = "Opening words of the text. " + "中间的内容。" * 40 + " Closing words here."
+
+
+class TestExcerpts:
+    """Test cases for sample_excerpts and the excerpts truncation mode"""
+
+    def test_short_text_unchanged(self):
+        data = "short".encode("utf-8")
+        assert sample_excerpts(data, 64) is data
+
+    def test_unknown_truncation_mode(self):
+        with pytest.raises(ValueError, match="truncation"):
+            batch_tokenize(["text"], max_len=8, truncation="tail")
+
+    @pytest.mark.parametrize("budget", [1, 7, 30, 64, 100])
+    @pytest.mark.parametrize("n_excerpts", [1, 2, 3, 5])
+    def test_excerpts_are_valid_utf8_within_budget(self, budget, n_excerpts):
+        sampled = sample_excerpts(LONG_TEXT.encode("utf-8"), budget, n_excerpts)
+        assert len(sampled) <= budget
+        sampled.decode("utf-8")  # never splits a character
+
+    def test_excerpts_cover_head_middle_tail(self):
+        sampled = sample_excerpts(LONG_TEXT.encode("utf-8"), 60, 3).decode("utf-8")
+        assert sampled.startswith("Opening")
+        assert "中间" in sampled
+        assert sampled.endswith("here.")
+
+    def test_buffer_tokenizer_matches(self):
+        texts = [LONG_TEXT, "", "Hello", "é" * 50]
+        encoded = [t.encode("utf-8") for t in texts]
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        offsets = np.concatenate([[0], np.cumsum([len(e) for e in encoded])])
+        expected = batch_tokenize(texts, max_len=40, truncation="excerpts")
+        actual = tokenize_buffer(data, offsets, 40, truncation="excerpts")
+        assert torch.equal(actual[0], expected[0])
+        assert torch.equal(actual[1], expected[1])
+
+    def test_detector_byte_budget(self, checkpoint_path):
+        detector = LarkDetector(model_path=checkpoint_path, byte_budget=64, profile=True)
+        detector.detect_batch([LONG_TEXT, "Hello"])
+        assert detector.stats()["last"]["seq_len"] == 64
+        # detect() of one text takes the single-text path, equal up to rounding
+        label, confidence = detector.detect_bytes(LONG_TEXT.encode("utf-8"))
+        assert (label, pytest.approx(confidence, abs=1e-3)) == detector.detect(LONG_TEXT)
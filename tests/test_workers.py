@@ -0,0 +1,75 @@
+"""
+Tests for NUMA-aware worker placement and the multi-process detector pool
+"""
+
+import os
+
+import pytest
+
+from lark import LarkDetector
+from lark.workers import DetectorPool, numa_topology, parse_cpulist, parse_layout, plan_layout
+
+TWO_NODES = {0: list(range(0, 16)), 1: list(range(16, 32))}
+
+
+class TestWorkers:
+    """Test cases for lark.workers"""
+
+    def test_parse_cpulist(self):
+        assert parse_cpulist("0-3,8,10-11\n") == [0, 1, 2, 3, 8, 10, 11]
+        assert parse_cpulist("") == []
+
+    def test_parse_layout(self):
+        assert parse_layout("4x8") == (4, 8)
+        assert parse_layout(" 32 X 1 ") == (32, 1)
+        for bad in ("4", "0x8", "4x", "axb"):
+            with pytest.raises(ValueError):
+                parse_layout(bad)
+
+    def test_numa_topology_from_sysfs(self, tmp_path):
+        allowed = sorted(os.sched_getaffinity(0))
+        for node, cpus in ((0, str(allowed[0])), (1, "100000-100003")):
+            (tmp_path / f"node{node}").mkdir()
+            (tmp_path / f"node{node}" / "cpulist").write_text(cpus + "\n")
+        # node 1 has no CPU in the affinity mask and is omitted
+        assert numa_topology(str(tmp_path)) == {0: [allowed[0]]}
+        assert numa_topology(str(tmp_path / "missing")) == {0: allowed}
+
+    def test_plan_keeps_workers_on_one_node(self):
+        for workers, threads in ((2, 16), (4, 8), (8, 4), (32, 1)):
+            slots = plan_layout(workers, threads, topology=TWO_NODES)
+            assert len(slots) == workers
+            used = [c for s in slots for c in s.cpus]
+            assert len(used) == len(set(used)) == workers * threads
+            for slot in slots:
+                assert slot.threads == threads
+                assert set(slot.cpus) <= set(TWO_NODES[slot.node])
+            # workers are spread evenly across nodes
+            assert sum(s.node == 0 for s in slots) == workers // 2
+
+    def test_plan_spans_and_oversubscribes(self):
+        (slot,) = plan_layout(1, 32, topology=TWO_NODES)
+        assert slot.cpus == list(range(32))
+        with pytest.raises(ValueError, match="needs 64 CPUs"):
+            plan_layout(4, 16, topology=TWO_NODES)
+        slots = plan_layout(4, 16, topology=TWO_NODES, oversubscribe=True)
+        assert [s.threads for s in slots] == [16] * 4
+
+    def test_pool_matches_detector(self, checkpoint_path):
+        texts = ["Hello world", "Bonjour le monde", "Hallo Welt", "こんにちは世界", "Hola mundo"]
+        expected = LarkDetector(model_path=checkpoint_path).detect_batch(texts, max_len=64)
+        with DetectorPool("1x1", detector_options={"model_path": checkpoint_path},
+                          chunk_size=2) as pool:
+            assert pool.layout == "1x1"
+            assert pool.placements[0]["cpus"] == pool.slots[0].cpus
+            results = pool.detect_batch(texts, max_len=64)
+            # A result left over from an earlier, failed call is ignored
+            pool._results.put(("done", (-1, 0), [("xx", 1.0)] * 2))
+            assert pool.detect_batch(texts, max_len=64) == results
+
+            pool._processes[0].kill()
+            pool._processes[0].join()
+            with pytest.raises(RuntimeError, match="exited"):
+                pool.detect_batch(texts, max_len=64)
+        assert [r[0] for r in results] == [r[0] for r in expected]
+        assert [r[1] for r in results] == pytest.approx([r[1] for r in expected], abs=1e-3)